@@ -19,13 +19,110 @@ ALLOWED_SCHEMES = set(
 )
 DISALLOW_PRIVATE_IPS = os.getenv("DISALLOW_PRIVATE_IPS", "true").lower() in {"1","true","yes"}
 
+# DNS cache used by the SSRF guard (system resolver exposes no record TTLs)
+DNS_CACHE_TTL_SECONDS = int(os.getenv("DNS_CACHE_TTL_SECONDS", "300"))
+DNS_NEGATIVE_TTL_SECONDS = int(os.getenv("DNS_NEGATIVE_TTL_SECONDS", "60"))
+DNS_CACHE_MAX_ENTRIES = int(os.getenv("DNS_CACHE_MAX_ENTRIES", "4096"))
+
+# Shared HTTP client pool (one keep-alive pool per process)
+SCRAPER_MAX_CONNECTIONS = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "100"))
+SCRAPER_MAX_CONNECTIONS_PER_HOST = int(os.getenv("SCRAPER_MAX_CONNECTIONS_PER_HOST", "6"))
+SCRAPER_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("SCRAPER_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
 # JS rendering fallback
 PLAYWRIGHT_ENABLED = os.getenv("PLAYWRIGHT_ENABLED", "false").lower() in {"1","true","yes"}
 PLAYWRIGHT_TIMEOUT_SECONDS = int(os.getenv("PLAYWRIGHT_TIMEOUT_SECONDS", "15"))
+# Warm browser pool (started at app startup when PLAYWRIGHT_ENABLED)
+PLAYWRIGHT_POOL_SIZE = int(os.getenv("PLAYWRIGHT_POOL_SIZE", "2"))
+PLAYWRIGHT_MAX_CONCURRENT_PAGES = int(os.getenv("PLAYWRIGHT_MAX_CONCURRENT_PAGES", "4"))
+PLAYWRIGHT_RECYCLE_AFTER_PAGES = int(os.getenv("PLAYWRIGHT_RECYCLE_AFTER_PAGES", "200"))
+# "fast": block non-content resources/trackers and stop once the DOM is quiet
+# "full": load everything and wait for networkidle
+PLAYWRIGHT_RENDER_MODE = os.getenv("PLAYWRIGHT_RENDER_MODE", "fast").lower()
+PLAYWRIGHT_DOM_QUIET_MS = int(os.getenv("PLAYWRIGHT_DOM_QUIET_MS", "500"))
+PLAYWRIGHT_READY_CAP_MS = int(os.getenv("PLAYWRIGHT_READY_CAP_MS", "5000"))
+# Start a speculative render when static HTML scores as an SPA shell (0..1),
+# or when the static fetch hasn't answered after the hedge delay
+SPA_SCORE_THRESHOLD = float(os.getenv("SPA_SCORE_THRESHOLD", "0.5"))
+RENDER_HEDGE_DELAY_SECONDS = float(os.getenv("RENDER_HEDGE_DELAY_SECONDS", "2.5"))
+
+# robots.txt: cached per origin; Crawl-delay spaces requests to one origin (capped)
+ROBOTS_ENABLED = os.getenv("ROBOTS_ENABLED", "true").lower() in {"1","true","yes"}
+ROBOTS_CACHE_TTL_SECONDS = int(os.getenv("ROBOTS_CACHE_TTL_SECONDS", "3600"))
+ROBOTS_ERROR_TTL_SECONDS = int(os.getenv("ROBOTS_ERROR_TTL_SECONDS", "300"))
+ROBOTS_CACHE_MAX_ENTRIES = int(os.getenv("ROBOTS_CACHE_MAX_ENTRIES", "2048"))
+ROBOTS_MAX_CRAWL_DELAY_SECONDS = float(os.getenv("ROBOTS_MAX_CRAWL_DELAY_SECONDS", "10"))
+
+# Optional same-site crawl for contact/about pages (AnalyzeRequest.crawl)
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "5"))
+CRAWL_TIME_BUDGET_SECONDS = float(os.getenv("CRAWL_TIME_BUDGET_SECONDS", "8"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+# Sitemap discovery fills crawl candidates the landing page doesn't link to
+SITEMAP_ENABLED = os.getenv("SITEMAP_ENABLED", "true").lower() in {"1","true","yes"}
+SITEMAP_MAX_FILES = int(os.getenv("SITEMAP_MAX_FILES", "10"))
+SITEMAP_MAX_URLS = int(os.getenv("SITEMAP_MAX_URLS", "50000"))
+SITEMAP_MAX_BYTES = int(os.getenv("SITEMAP_MAX_BYTES", str(50 * 1024 * 1024)))
+SITEMAP_TIME_BUDGET_SECONDS = float(os.getenv("SITEMAP_TIME_BUDGET_SECONDS", "3"))
+
+# HTML extraction (parse, contacts, main text) off the event loop:
+# "process" = spawn-based process pool, "thread" = thread pool, "inline" = on the event loop
+EXTRACTION_POOL = os.getenv("EXTRACTION_POOL", "process").lower()
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 2)))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "20"))
+
+# Main-text engine: "fast" (selectolax text/link density, readability as fallback) or "readability"
+MAIN_TEXT_ENGINE = os.getenv("MAIN_TEXT_ENGINE", "fast").lower()
+MAIN_TEXT_MIN_CHARS = int(os.getenv("MAIN_TEXT_MIN_CHARS", "250"))
+# Empty inline script/style/svg bodies, hydration blobs and long data: URIs before parsing
+# (JSON-LD and meta tags are kept)
+HTML_MINIMIZE = os.getenv("HTML_MINIMIZE", "true").lower() in {"1","true","yes"}
+
+# Phone extraction: region used when the page gives no country hint (JSON-LD, ccTLD, lang),
+# and the most digit runs per page handed to libphonenumber
+PHONE_DEFAULT_REGION = os.getenv("PHONE_DEFAULT_REGION", "US").upper()
+PHONE_MAX_CANDIDATES = int(os.getenv("PHONE_MAX_CANDIDATES", "200"))
+
+# Structured data: company attribute inference by the LLM is skipped when at least this
+# many of industry/company_size/location/target_audience are already known from JSON-LD or
+# microdata with at least this confidence (OpenGraph and DOM guesses never count)
+STRUCTURED_DATA_MIN_FIELDS = int(os.getenv("STRUCTURED_DATA_MIN_FIELDS", "3"))
+STRUCTURED_DATA_MIN_CONFIDENCE = float(os.getenv("STRUCTURED_DATA_MIN_CONFIDENCE", "0.85"))
+
+# Batch analysis: max URLs per request and concurrency caps per batch.
+# Fetch + LLM slots bound the DB connections a batch holds, keep their sum
+# below the SQLAlchemy pool size (5 + 10 overflow by default).
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_FETCH_CONCURRENCY = int(os.getenv("BATCH_FETCH_CONCURRENCY", "8"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+# Background analysis jobs (POST /analyze?async=true)
+# "redis" shares one queue across nodes; "memory" is in-process (local/tests)
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "redis").lower()
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 0 = enqueue only, no workers on this node
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
 
 # AI config
 AI_PROVIDER = os.getenv("AI_PROVIDER", "openai")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
+# Named providers created at startup, "name=kind:model" comma-separated
+# (e.g. "fast=openai:gpt-4o-mini,deep=gemini:gemini-1.5-pro"). Empty = one provider
+# per configured API key, named "openai"/"gemini". AI_PROVIDER names the default.
+AI_PROVIDERS = os.getenv("AI_PROVIDERS", "")
+# Question answering: "batch" = all questions in one JSON call, "concurrent" = one call per
+# question (at most AI_ANSWER_CONCURRENCY in flight), "auto" = batch when there are 2 to
+# AI_BATCH_MAX_QUESTIONS questions and the context is long enough that resending it costs more
+AI_ANSWER_MODE = os.getenv("AI_ANSWER_MODE", "auto").lower()
+AI_ANSWER_CONCURRENCY = int(os.getenv("AI_ANSWER_CONCURRENCY", "4"))
+AI_BATCH_MAX_QUESTIONS = int(os.getenv("AI_BATCH_MAX_QUESTIONS", "12"))
+AI_BATCH_MIN_CONTEXT_CHARS = int(os.getenv("AI_BATCH_MIN_CONTEXT_CHARS", "1000"))
+# LLM result cache: in-process LRU (entry and byte caps) in front of Redis (REDIS_URL), with a TTL
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() in {"1","true","yes"}
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "4096"))
+AI_CACHE_MAX_BYTES = int(os.getenv("AI_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
 
 
@@ -1,289 +1,159 @@
-from datetime import datetime, timezone
+import asyncio
+import json
 from typing import List
-import os
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from fastapi_limiter.depends import RateLimiter
 
 from app.core.security import verify_bearer_token
-from app.core.config import (
-    SCRAPER_TIMEOUT_SECONDS,
-    SCRAPER_MAX_REDIRECTS,
-    SCRAPER_USER_AGENT,
-    PLAYWRIGHT_ENABLED,
-    PLAYWRIGHT_TIMEOUT_SECONDS,
-    AI_PROVIDER,
-    OPENAI_API_KEY,
-    OPENAI_MODEL,
-)
-from app.services.scraper.guard import validate_url_and_resolve
-from app.services.scraper.robots import can_fetch
-from app.services.scraper.fetcher import fetch_url
-from app.services.scraper.parser import extract_title_and_meta
-from app.services.scraper.browser import render_page
-from app.services.scraper.extract_contact import (
-    extract_emails,
-    extract_phone_numbers,
-    extract_social_links,
-)
-from app.services.scraper.parser import extract_main_text
-from app.services.ai.openai_provider import OpenAIProvider
-from app.services.ai.gemini_provider import GeminiProvider
-from .schemas import AnalyzeRequest, AnalyzeResponse, CompanyInfoSchema, AnalysisSummary, ContactInfoSchema, SocialMedia, QAItem
-from db.db import get_db
-from app.features.analysis.models import AnalysisSession as AnalysisSessionModel, PageSnapshot as PageSnapshotModel
-from app.features.company.models import CompanyInfo as CompanyInfoModel
-from app.features.contact.models import ContactInfo as ContactInfoModel
-from app.features.qa.models import ExtractedAnswer as ExtractedAnswerModel
+from app.core.config import BATCH_MAX_ITEMS, BATCH_FETCH_CONCURRENCY, BATCH_LLM_CONCURRENCY
+from app.services.ai.registry import ProviderRegistry, get_ai_registry, select_ai_provider
+from app.services.jobs.queue import get_job_queue
+from app.services.scraper.guard import validate_url_and_resolve_async
+from .schemas import AnalyzeRequest, AnalyzeResponse, AnalysisSummary, BatchAnalyzeRequest, AnalyzeJobAccepted, AnalysisStatus
+from .service import AnalysisLimits, load_session_response, run_analysis
+from .jobs import ANALYSIS_JOB
+from db.db import get_db, SessionLocal
+from app.features.analysis.models import AnalysisSession as AnalysisSessionModel
 import uuid
 
 
 router = APIRouter(prefix="/analyze", tags=["analyze"]) 
 
 
-@router.post("", response_model=AnalyzeResponse, dependencies=[Depends(verify_bearer_token)])
-async def analyze_endpoint(
-    payload: AnalyzeRequest,
-    rate_limited: None = Depends(RateLimiter(times=10, seconds=60)),
-    db: Session = Depends(get_db),
-):
-    # 1) SSRF guard + resolve
-    normalized_url, _ = validate_url_and_resolve(str(payload.url))
-
-    # 2) Fetch HTML (we will parse minimal info)
-    try:
-        final_url, status_code, html = await fetch_url(
-            normalized_url,
-            user_agent=SCRAPER_USER_AGENT,
-            timeout_seconds=SCRAPER_TIMEOUT_SECONDS,
-            max_redirects=SCRAPER_MAX_REDIRECTS,
-        )
-    except Exception:
-        final_url = normalized_url
-        status_code = 0
-        html = None
-
-    # Fallback to Playwright if no HTML or very short content and enabled
-    if (not html or len(html) < 200) and PLAYWRIGHT_ENABLED:
-        try:
-            final_url, status_code, html = await render_page(
-                normalized_url,
-                user_agent=SCRAPER_USER_AGENT,
-                timeout_seconds=PLAYWRIGHT_TIMEOUT_SECONDS,
-            )
-        except Exception:
-            pass
-
-    # 4) Minimal parse for title/meta and contact info
-    company = CompanyInfoSchema()
-    answers = []
-    if html:
-        title, meta = extract_title_and_meta(html)
-        if title:
-            company.unique_selling_proposition = title
-        if meta:
-            company.core_products_services = [meta]
-
-        # Contact and socials (best-effort)
-        emails = extract_emails(html)
-        phones = extract_phone_numbers(html)
-        socials = extract_social_links(html)
-        # Deterministic DOM-based location extraction before LLM
-        dom_location: str | None = None
-        try:
-            from app.services.scraper.extract_contact import extract_dom_location
-
-            dom_location = extract_dom_location(html)
-        except Exception:
-            dom_location = None
-        if emails or phones or any(socials.values()) or dom_location:
-            company.contact_info = {
-                "email": emails[0] if emails else None,
-                "phone": phones[0] if phones else None,
-                "social_media": socials,
-            }
-            if dom_location and not getattr(company, "location", None):
-                company.location = dom_location
-
-        # 5) Main text extraction and AI inference (if key provided)
-        main_text = extract_main_text(html)
-        # Build fallback context from title/meta if main_text is empty
-        fallback_context = None
-        if not main_text:
-            parts = []
-            if title:
-                parts.append(title)
-            if meta:
-                parts.append(meta)
-            fallback_context = "\n\n".join(parts) if parts else None
-        print(f"[Analyze] main_text length: {len(main_text) if main_text else 0} | fallback_context length: {len(fallback_context) if fallback_context else 0}")
-        if main_text or fallback_context:
-            try:
-                print(
-                    f"[Analyze] AI_PROVIDER={AI_PROVIDER} has_openai={bool(OPENAI_API_KEY)} has_gemini={bool(os.getenv('GEMINI_API_KEY'))}"
-                )
-                if AI_PROVIDER == "openai" and OPENAI_API_KEY:
-                    ai = OpenAIProvider(model=OPENAI_MODEL)
-                    print("[Analyze] Using OpenAI provider")
-                elif AI_PROVIDER == "gemini" and os.getenv("GEMINI_API_KEY"):
-                    ai = GeminiProvider(os.getenv("GEMINI_MODEL", "gemini-1.5-pro"))
-                    print("[Analyze] Using Gemini provider")
-                else:
-                    ai = None
-
-                if ai:
-                    context_for_ai = main_text or fallback_context or ""
-                    inferred = await ai.infer_company_attributes(context_for_ai)
-                    print(f"[Analyze] Inferred attributes: {inferred}")
-                    ind = inferred.get("industry")
-                    if ind:
-                        company.industry = ind
-                    size = inferred.get("company_size")
-                    if size:
-                        company.company_size = size
-                    loc = inferred.get("location")
-                    if loc:
-                        company.location = loc
-                    ta = inferred.get("target_audience")
-                    if ta:
-                        company.target_audience = ta
-
-                    if payload.questions and main_text:
-                        answers = await ai.answer_questions(main_text, payload.questions)
-                        print(f"[Analyze] Answered {len(answers)} questions")
-            except Exception as e:
-                print(f"[Analyze] AI inference error: {e}")
-
-        # 5b) Heuristic location extraction if LLM did not provide it
-        if (not getattr(company, "location", None)) and main_text:
-            try:
-                from app.services.scraper.extract_contact import extract_location
+async def _enqueue_analysis(db: Session, payload: AnalyzeRequest) -> JSONResponse:
+    queue = get_job_queue()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Background analysis queue not available")
 
-                guessed = extract_location(main_text)
-                if guessed and not company.location:
-                    company.location = guessed
-            except Exception as _:
-                pass
+    # Reject bad targets (and unknown provider names) now rather than failing the job later
+    select_ai_provider(payload.ai_provider)
+    normalized_url, _ = await validate_url_and_resolve_async(str(payload.url))
 
-    # Persist to DB
     try:
-        # Upsert session row for this URL (avoid duplicates in list)
-        existing_session = (
+        session_row = (
             db.query(AnalysisSessionModel)
             .filter(AnalysisSessionModel.url == normalized_url)
             .order_by(AnalysisSessionModel.created_at.desc())
             .first()
         )
-
-        if existing_session:
-            session_row = existing_session
-            session_row.status = "completed"
-            session_row.ai_provider = AI_PROVIDER
-            session_row.model = (
-                os.getenv("OPENAI_MODEL")
-                if AI_PROVIDER == "openai"
-                else os.getenv("GEMINI_MODEL", "gemini-1.5-pro") if AI_PROVIDER == "gemini" else None
-            )
+        if session_row:
+            session_row.status = "planned"
         else:
-            session_row = AnalysisSessionModel(
-                url=normalized_url,
-                status="completed",
-                ai_provider=AI_PROVIDER,
-                model=os.getenv("OPENAI_MODEL") if AI_PROVIDER == "openai" else os.getenv("GEMINI_MODEL", "gemini-1.5-pro") if AI_PROVIDER == "gemini" else None,
-            )
+            session_row = AnalysisSessionModel(url=normalized_url, status="planned")
             db.add(session_row)
-            db.flush()  # get session_row.id
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[Analyze] Could not create planned session: {e}")
+        raise HTTPException(status_code=500, detail="Could not create analysis session")
+
+    await queue.enqueue(
+        {
+            "kind": ANALYSIS_JOB,
+            "session_id": str(session_row.id),
+            "url": normalized_url,
+            "questions": payload.questions,
+            "crawl": payload.crawl,
+            "max_pages": payload.max_pages,
+            "ai_provider": payload.ai_provider,
+        }
+    )
+    accepted = AnalyzeJobAccepted(id=str(session_row.id), url=normalized_url, status="planned")
+    return JSONResponse(status_code=202, content=accepted.model_dump(mode="json"))
 
-        # Snapshot: record latest fetch as a new row (history)
-        snapshot_row = PageSnapshotModel(
-            analysis_session_id=session_row.id,
-            final_url=final_url,
-            http_status=status_code,
-            title=company.unique_selling_proposition,
-            meta_description=(company.core_products_services[0] if company.core_products_services else None),
-            raw_html=None,
-            main_text=main_text if 'main_text' in locals() else None,
-        )
-        db.add(snapshot_row)
 
-        # Company info: update existing or create
-        existing_company = (
-            db.query(CompanyInfoModel)
-            .filter(CompanyInfoModel.analysis_session_id == session_row.id)
-            .first()
-        )
-        if existing_company:
-            existing_company.industry = company.industry
-            existing_company.company_size = company.company_size
-            existing_company.location = company.location
-            existing_company.core_products_services = company.core_products_services
-            existing_company.unique_selling_proposition = company.unique_selling_proposition
-            existing_company.target_audience = company.target_audience
-        else:
-            company_row = CompanyInfoModel(
-                analysis_session_id=session_row.id,
-                industry=company.industry,
-                company_size=company.company_size,
-                location=company.location,
-                core_products_services=company.core_products_services,
-                unique_selling_proposition=company.unique_selling_proposition,
-                target_audience=company.target_audience,
-            )
-            db.add(company_row)
+@router.post(
+    "",
+    response_model=AnalyzeResponse,
+    responses={202: {"model": AnalyzeJobAccepted}},
+    dependencies=[Depends(verify_bearer_token)],
+)
+async def analyze_endpoint(
+    payload: AnalyzeRequest,
+    run_async: bool = Query(False, alias="async"),
+    rate_limited: None = Depends(RateLimiter(times=10, seconds=60)),
+    db: Session = Depends(get_db),
+    registry: ProviderRegistry = Depends(get_ai_registry),
+):
+    # ?async=true: queue the work and return the session id for polling
+    if run_async:
+        return await _enqueue_analysis(db, payload)
+    return await run_analysis(
+        db,
+        str(payload.url),
+        payload.questions,
+        crawl=payload.crawl,
+        max_pages=payload.max_pages,
+        ai_provider=payload.ai_provider,
+        registry=registry,
+    )
 
-        # Contact info: update if we parsed anything
-        if 'emails' in locals() or 'phones' in locals() or 'socials' in locals():
-            existing_contact = (
-                db.query(ContactInfoModel)
-                .filter(ContactInfoModel.analysis_session_id == session_row.id)
-                .first()
+
+async def _run_batch_item(
+    index: int,
+    item: AnalyzeRequest,
+    limits: AnalysisLimits,
+    in_flight: asyncio.Semaphore,
+    registry: ProviderRegistry,
+) -> dict:
+    # Each item gets its own DB session; a Session must not be shared across tasks
+    async with in_flight:
+        db = SessionLocal()
+        try:
+            result = await run_analysis(
+                db,
+                str(item.url),
+                item.questions,
+                limits=limits,
+                crawl=item.crawl,
+                max_pages=item.max_pages,
+                ai_provider=item.ai_provider,
+                registry=registry,
+                paced=True,
             )
-            if existing_contact:
-                if 'emails' in locals():
-                    existing_contact.emails = emails
-                if 'phones' in locals():
-                    existing_contact.phones = phones
-                if 'socials' in locals():
-                    existing_contact.social = socials
-            else:
-                contact_row = ContactInfoModel(
-                    analysis_session_id=session_row.id,
-                    emails=emails if 'emails' in locals() else None,
-                    phones=phones if 'phones' in locals() else None,
-                    social=socials if 'socials' in locals() else None,
-                )
-                db.add(contact_row)
+            return {"index": index, "url": str(item.url), "status": "ok", "result": result.model_dump(mode="json")}
+        except HTTPException as e:
+            return {"index": index, "url": str(item.url), "status": "error", "error": e.detail}
+        except Exception as e:
+            print(f"[Analyze] Batch item {index} failed: {e}")
+            return {"index": index, "url": str(item.url), "status": "error", "error": str(e)}
+        finally:
+            db.close()
+
+
+@router.post("/batch", dependencies=[Depends(verify_bearer_token)])
+async def analyze_batch_endpoint(
+    payload: BatchAnalyzeRequest,
+    rate_limited: None = Depends(RateLimiter(times=2, seconds=60)),
+    registry: ProviderRegistry = Depends(get_ai_registry),
+):
+    """Analyze many URLs concurrently; streams one NDJSON line per URL as it finishes.
 
-        # Extracted answers: replace with latest
-        if answers:
-            db.query(ExtractedAnswerModel).filter(
-                ExtractedAnswerModel.analysis_session_id == session_row.id
-            ).delete(synchronize_session=False)
-            for a in answers:
-                db.add(
-                    ExtractedAnswerModel(
-                        analysis_session_id=session_row.id,
-                        question=a.get("question"),
-                        answer=a.get("answer"),
-                    )
-                )
+    Lines arrive in completion order and carry the item's index in the request.
+    """
+    if len(payload.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
 
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        print(f"[Analyze] DB persistence error: {e}")
+    limits = AnalysisLimits(BATCH_FETCH_CONCURRENCY, BATCH_LLM_CONCURRENCY)
+    in_flight = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY + BATCH_LLM_CONCURRENCY)
 
-    now = datetime.now(timezone.utc)
-    print(f"Analysis completed for {final_url} at {now}")
-    print(f"Company info: {company}")
-    return AnalyzeResponse(
-        id=str(session_row.id),
-        url=final_url,
-        analysis_timestamp=now,
-        company_info=company,
-        extracted_answers=answers,
-    )
+    async def stream_results():
+        tasks = [
+            asyncio.create_task(_run_batch_item(i, item, limits, in_flight, registry))
+            for i, item in enumerate(payload.items)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client went away or we're done: don't leave work running
+            for t in tasks:
+                t.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 
 @router.get("/sessions", response_model=List[AnalysisSummary], dependencies=[Depends(verify_bearer_token)])
@@ -307,6 +177,19 @@ async def list_sessions(db: Session = Depends(get_db)):
     ]
 
 
+@router.get("/sessions/{id}/status", response_model=AnalysisStatus, dependencies=[Depends(verify_bearer_token)])
+async def get_session_status(id: str, db: Session = Depends(get_db)):
+    try:
+        session_uuid = uuid.UUID(str(id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid session id")
+
+    session_row = db.query(AnalysisSessionModel).filter(AnalysisSessionModel.id == session_uuid).first()
+    if not session_row:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return AnalysisStatus(id=str(session_row.id), url=session_row.url, status=session_row.status)
+
+
 @router.get("/sessions/{id}", response_model=AnalyzeResponse, dependencies=[Depends(verify_bearer_token)])
 async def get_session(id: str, db: Session = Depends(get_db)):
     # Validate id
@@ -320,52 +203,4 @@ async def get_session(id: str, db: Session = Depends(get_db)):
     if not session_row:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Load company info
-    company_row = db.query(CompanyInfoModel).filter(CompanyInfoModel.analysis_session_id == session_row.id).first()
-
-    company = CompanyInfoSchema()
-    if company_row:
-        company.industry = company_row.industry
-        company.company_size = company_row.company_size
-        company.location = company_row.location
-        company.core_products_services = company_row.core_products_services
-        company.unique_selling_proposition = company_row.unique_selling_proposition
-        company.target_audience = company_row.target_audience
-
-    # Load contact info, map to schema (best-effort)
-    contact_row = db.query(ContactInfoModel).filter(ContactInfoModel.analysis_session_id == session_row.id).first()
-    if contact_row:
-        social = None
-        if contact_row.social:
-            social = SocialMedia(
-                linkedin=contact_row.social.get("linkedin"),
-                twitter=contact_row.social.get("twitter"),
-                facebook=contact_row.social.get("facebook"),
-                youtube=contact_row.social.get("youtube"),
-                instagram=contact_row.social.get("instagram"),
-                tiktok=contact_row.social.get("tiktok"),
-            )
-        company.contact_info = ContactInfoSchema(
-            email=(contact_row.emails[0] if contact_row.emails else None),
-            phone=(contact_row.phones[0] if contact_row.phones else None),
-            social_media=social,
-        )
-
-    # Load extracted answers
-    answers_rows = (
-        db.query(ExtractedAnswerModel)
-        .filter(ExtractedAnswerModel.analysis_session_id == session_row.id)
-        .all()
-    )
-    extracted_answers: list[QAItem] = []
-    for a in answers_rows:
-        if getattr(a, "question", None) and getattr(a, "answer", None):
-            extracted_answers.append(QAItem(question=a.question, answer=a.answer))
-
-    return AnalyzeResponse(
-        id=str(session_row.id),
-        url=session_row.url,
-        analysis_timestamp=session_row.created_at,
-        company_info=company,
-        extracted_answers=extracted_answers,
-    )
\ No newline at end of file
+    return load_session_response(db, session_row)
@@ -0,0 +1,75 @@
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.services.jobs.queue import Job, JobFailed
+from db.db import SessionLocal
+from app.features.analysis.models import AnalysisSession as AnalysisSessionModel
+from .service import run_analysis
+
+
+ANALYSIS_JOB = "analysis"
+# Client errors worth another attempt later
+RETRYABLE_STATUS = {408, 429}
+
+
+def _set_status(db: Session, session_id: str, status: str) -> None:
+    try:
+        db.query(AnalysisSessionModel).filter(AnalysisSessionModel.id == uuid.UUID(session_id)).update(
+            {AnalysisSessionModel.status: status}, synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[Jobs] Could not set session {session_id} to {status}: {e}")
+
+
+def _retry_pending(db: Session, session_id: str, job: Job) -> None:
+    # The worker puts the job back unless this was its last attempt (then on_dead marks it failed)
+    if not job.is_last_attempt:
+        _set_status(db, session_id, "retrying")
+
+
+async def process_job(job: Job) -> None:
+    """Worker entry point: run the analysis pipeline for an enqueued session."""
+    if job.payload.get("kind") != ANALYSIS_JOB:
+        raise JobFailed(f"Unknown job kind: {job.payload.get('kind')}")
+    session_id = job.payload["session_id"]
+    db = SessionLocal()
+    try:
+        _set_status(db, session_id, "running")
+        try:
+            await run_analysis(
+                db,
+                job.payload["url"],
+                job.payload.get("questions"),
+                crawl=bool(job.payload.get("crawl")),
+                max_pages=job.payload.get("max_pages"),
+                ai_provider=job.payload.get("ai_provider"),
+                # A result that was never saved must fail the job (retried, then marked failed)
+                require_persisted=True,
+                paced=True,
+            )
+        except Exception as e:
+            if isinstance(e, HTTPException) and e.status_code not in RETRYABLE_STATUS and 400 <= e.status_code < 500:
+                # Rejected URL, blocked by robots.txt, site answered 4xx: the same again next time
+                raise JobFailed(f"{e.status_code}: {e.detail}") from e
+            _retry_pending(db, session_id, job)
+            raise
+        # run_analysis marks the row completed when it persists, but a
+        # revalidated (unchanged) page returns early without touching it
+        _set_status(db, session_id, "completed")
+    finally:
+        db.close()
+
+
+async def mark_job_failed(job: Job) -> None:
+    session_id = job.payload.get("session_id")
+    if not session_id:
+        return
+    db = SessionLocal()
+    try:
+        _set_status(db, session_id, "failed")
+    finally:
+        db.close()
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey
+from sqlalchemy import Boolean, Column, String, DateTime, Integer, Text, ForeignKey, false
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -13,7 +13,7 @@ class AnalysisSession(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     url = Column(String(1024), index=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    status = Column(String(32), nullable=False, default="completed")  # planned|running|completed|failed
+    status = Column(String(32), nullable=False, default="completed")  # planned|running|retrying|completed|failed
     ai_provider = Column(String(64), nullable=True)
     model = Column(String(128), nullable=True)
     sentiment = Column(String(64), nullable=True)
@@ -35,6 +35,12 @@ class PageSnapshot(Base):
     meta_description = Column(String(1024), nullable=True)
     raw_html = Column(Text, nullable=True)
     main_text = Column(Text, nullable=True)
+    # HTTP validators + body hash, used to revalidate instead of reprocessing
+    etag = Column(String(512), nullable=True)
+    last_modified = Column(String(128), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    # Whether related pages were crawled into this analysis (a crawl request can't reuse one without)
+    crawled = Column(Boolean, nullable=False, server_default=false())
     fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from datetime import datetime
 
@@ -7,6 +7,15 @@ from datetime import datetime
 class AnalyzeRequest(BaseModel):
     url: HttpUrl
     questions: Optional[List[str]] = None
+    # Also fetch likely contact/about pages on the same site
+    crawl: bool = False
+    max_pages: Optional[int] = Field(default=None, ge=1)
+    # Named provider from AI_PROVIDERS; the default provider when omitted
+    ai_provider: Optional[str] = None
+
+
+class BatchAnalyzeRequest(BaseModel):
+    items: List[AnalyzeRequest] = Field(min_length=1)
 
 
 class SocialMedia(BaseModel):
@@ -24,6 +33,12 @@ class ContactInfoSchema(BaseModel):
     social_media: Optional[SocialMedia] = None
 
 
+class FieldSource(BaseModel):
+    # "json-ld" | "microdata" | "opengraph" | "dom" | "llm" | "text"
+    source: str
+    confidence: Optional[float] = None
+
+
 class CompanyInfoSchema(BaseModel):
     industry: Optional[str] = None
     company_size: Optional[str] = None
@@ -32,6 +47,8 @@ class CompanyInfoSchema(BaseModel):
     unique_selling_proposition: Optional[str] = None
     target_audience: Optional[str] = None
     contact_info: Optional[ContactInfoSchema] = None
+    # Where each filled field came from, keyed by field name ("location", "contact_info.email")
+    provenance: Optional[Dict[str, FieldSource]] = None
 
 
 class QAItem(BaseModel):
@@ -57,3 +74,15 @@ class AnalysisSummary(BaseModel):
     industry: Optional[str] = None
 
 
+
+
+class AnalyzeJobAccepted(BaseModel):
+    id: str
+    url: HttpUrl
+    status: str
+
+
+class AnalysisStatus(BaseModel):
+    id: str
+    url: HttpUrl
+    status: str
@@ -0,0 +1,565 @@
+import asyncio
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    SCRAPER_TIMEOUT_SECONDS,
+    SCRAPER_MAX_REDIRECTS,
+    SCRAPER_USER_AGENT,
+    CRAWL_MAX_PAGES,
+    CRAWL_TIME_BUDGET_SECONDS,
+    CRAWL_CONCURRENCY,
+    AI_PROVIDER,
+    STRUCTURED_DATA_MIN_FIELDS,
+    STRUCTURED_DATA_MIN_CONFIDENCE,
+)
+from app.services.scraper.guard import validate_url_and_resolve_async
+from app.services.scraper.page_loader import load_page
+from app.services.scraper.crawler import crawl_related_pages
+from app.services.scraper.extraction import extract_page
+from app.services.scraper.structured_data import StructuredData
+from app.services.ai.provider import AIProvider
+from app.services.ai.registry import ProviderRegistry, select_ai_provider
+from .schemas import AnalyzeResponse, CompanyInfoSchema, ContactInfoSchema, FieldSource, SocialMedia, QAItem
+from app.features.analysis.models import AnalysisSession as AnalysisSessionModel, PageSnapshot as PageSnapshotModel
+from app.features.company.models import CompanyInfo as CompanyInfoModel
+from app.features.contact.models import ContactInfo as ContactInfoModel
+from app.features.qa.models import ExtractedAnswer as ExtractedAnswerModel
+
+
+class AnalysisPersistError(Exception):
+    pass
+
+
+class AnalysisLimits:
+    """Concurrency caps shared by every analysis in a batch.
+
+    Network fetches (static fetch and headless render) and LLM calls are
+    bounded independently, so slow model calls don't hold fetch slots.
+    """
+
+    def __init__(self, fetch_concurrency: int, llm_concurrency: int):
+        self.fetch = asyncio.Semaphore(fetch_concurrency)
+        self.llm = asyncio.Semaphore(llm_concurrency)
+
+
+# Company attributes the LLM infers; structured data can fill them first
+INFERRED_FIELDS = ("industry", "company_size", "location", "target_audience")
+# Only values the site publishes as schema.org data can stand in for inference
+STRUCTURED_SOURCES = ("json-ld", "microdata")
+
+
+def load_session_response(db: Session, session_row: AnalysisSessionModel, url: str | None = None) -> AnalyzeResponse:
+    """Rebuild the stored analysis result for a session from the DB."""
+    # Load company info
+    company_row = db.query(CompanyInfoModel).filter(CompanyInfoModel.analysis_session_id == session_row.id).first()
+
+    company = CompanyInfoSchema()
+    if company_row:
+        company.industry = company_row.industry
+        company.company_size = company_row.company_size
+        company.location = company_row.location
+        company.core_products_services = company_row.core_products_services
+        company.unique_selling_proposition = company_row.unique_selling_proposition
+        company.target_audience = company_row.target_audience
+
+    # Load contact info, map to schema (best-effort)
+    contact_row = db.query(ContactInfoModel).filter(ContactInfoModel.analysis_session_id == session_row.id).first()
+    if contact_row:
+        social = None
+        if contact_row.social:
+            social = SocialMedia(
+                linkedin=contact_row.social.get("linkedin"),
+                twitter=contact_row.social.get("twitter"),
+                facebook=contact_row.social.get("facebook"),
+                youtube=contact_row.social.get("youtube"),
+                instagram=contact_row.social.get("instagram"),
+                tiktok=contact_row.social.get("tiktok"),
+            )
+        company.contact_info = ContactInfoSchema(
+            email=(contact_row.emails[0] if contact_row.emails else None),
+            phone=(contact_row.phones[0] if contact_row.phones else None),
+            social_media=social,
+        )
+
+    # Load extracted answers
+    answers_rows = (
+        db.query(ExtractedAnswerModel)
+        .filter(ExtractedAnswerModel.analysis_session_id == session_row.id)
+        .all()
+    )
+    extracted_answers: list[QAItem] = []
+    for a in answers_rows:
+        if getattr(a, "question", None) and getattr(a, "answer", None):
+            extracted_answers.append(QAItem(question=a.question, answer=a.answer))
+
+    return AnalyzeResponse(
+        id=str(session_row.id),
+        url=url or session_row.url,
+        analysis_timestamp=session_row.created_at,
+        company_info=company,
+        extracted_answers=extracted_answers,
+    )
+
+
+async def _revalidated_response(
+    db: Session,
+    session_row: AnalysisSessionModel,
+    snapshot: PageSnapshotModel,
+    questions: List[str] | None,
+    ai: Optional[AIProvider],
+) -> AnalyzeResponse:
+    """Serve an unchanged page from the stored analysis.
+
+    Parsing, contact extraction and attribute inference are skipped; only
+    questions that were never answered for this session go to the LLM, using
+    the stored main text.
+    """
+    response = load_session_response(db, session_row, url=snapshot.final_url)
+    if not questions:
+        return response
+
+    known = {a.question: a for a in response.extracted_answers}
+    missing = [q for q in questions if q not in known]
+    if missing and snapshot.main_text:
+        try:
+            if ai:
+                new_answers = await ai.answer_questions(snapshot.main_text, missing)
+                for a in new_answers:
+                    if a.get("question") and a.get("answer"):
+                        known[a["question"]] = QAItem(question=a["question"], answer=a["answer"])
+                        db.add(
+                            ExtractedAnswerModel(
+                                analysis_session_id=session_row.id,
+                                question=a["question"],
+                                answer=a["answer"],
+                            )
+                        )
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[Analyze] AI answer error on revalidated page: {e}")
+
+    response.extracted_answers = [known[q] for q in questions if q in known]
+    return response
+
+
+def _merge_unique(first: List[str], second: List[str]) -> List[str]:
+    merged = list(first)
+    for item in second:
+        if item not in merged:
+            merged.append(item)
+    return merged
+
+
+def _apply_structured_data(
+    company: CompanyInfoSchema, structured: StructuredData, provenance: Dict[str, FieldSource]
+) -> None:
+    """Fill company attributes from structured data where it beats what is already there."""
+    for name in INFERRED_FIELDS:
+        f = structured.fields.get(name)
+        current = provenance.get(name)
+        if f and (current is None or (current.confidence or 0.0) < f.confidence):
+            setattr(company, name, f.value)
+            provenance[name] = FieldSource(source=f.source, confidence=f.confidence)
+    description = structured.fields.get("description")
+    if description and not company.core_products_services:
+        company.core_products_services = [description.value]
+        provenance["core_products_services"] = FieldSource(source=description.source, confidence=description.confidence)
+
+
+def _confident_fields(provenance: Dict[str, FieldSource]) -> List[str]:
+    """Inferred fields already known from JSON-LD/microdata with enough confidence.
+
+    Heuristic values (DOM address guesses, OpenGraph) never count, however
+    confident, so they can't make the LLM call be skipped.
+    """
+    return [
+        name for name in INFERRED_FIELDS
+        if name in provenance
+        and provenance[name].source in STRUCTURED_SOURCES
+        and (provenance[name].confidence or 0.0) >= STRUCTURED_DATA_MIN_CONFIDENCE
+    ]
+
+
+async def run_analysis(
+    db: Session,
+    url: str,
+    questions: Optional[List[str]] = None,
+    limits: Optional[AnalysisLimits] = None,
+    crawl: bool = False,
+    max_pages: Optional[int] = None,
+    ai_provider: Optional[str] = None,
+    registry: Optional[ProviderRegistry] = None,
+    require_persisted: bool = False,
+    paced: bool = False,
+) -> AnalyzeResponse:
+    """Fetch -> parse -> AI -> persist pipeline for a single URL.
+
+    With crawl=True, up to max_pages (capped by CRAWL_MAX_PAGES) same-site
+    contact/about pages are fetched concurrently and their contact details
+    merged into the result. ai_provider names one of the registry's
+    providers; the default provider is used when it is empty.
+
+    Raises HTTPException when the URL is rejected by the SSRF guard or the
+    provider name is unknown. A failure to save the result is only logged
+    unless require_persisted is set (background jobs); then it raises
+    AnalysisPersistError. paced=True (batch items, background jobs) honours
+    the origin's robots.txt Crawl-delay before the landing page fetch.
+    """
+    fetch_slot = limits.fetch if limits else nullcontext()
+    llm_slot = limits.llm if limits else nullcontext()
+    # Shared, long-lived provider from the registry (None when no API key is configured)
+    ai = select_ai_provider(ai_provider, registry)
+
+    # 1) SSRF guard + resolve
+    normalized_url, resolved_ip = await validate_url_and_resolve_async(url)
+
+    # Previous analysis of this URL (if any) provides validators for a conditional fetch
+    existing_session = None
+    previous_snapshot = None
+    try:
+        existing_session = (
+            db.query(AnalysisSessionModel)
+            .filter(AnalysisSessionModel.url == normalized_url)
+            .order_by(AnalysisSessionModel.created_at.desc())
+            .first()
+        )
+        if existing_session:
+            previous_snapshot = (
+                db.query(PageSnapshotModel)
+                .filter(PageSnapshotModel.analysis_session_id == existing_session.id)
+                .order_by(PageSnapshotModel.fetched_at.desc())
+                .first()
+            )
+    except Exception as e:
+        db.rollback()
+        print(f"[Analyze] Previous snapshot lookup failed: {e}")
+    # The stored result only stands in for this request if it was produced the same way:
+    # by the same provider/model, and with a crawl when one is asked for
+    if previous_snapshot and (
+        (crawl and not previous_snapshot.crawled)
+        or existing_session.ai_provider != (ai.kind if ai else AI_PROVIDER)
+        or existing_session.model != (ai.model_name if ai else None)
+    ):
+        previous_snapshot = None
+
+    # 2) Fetch HTML; hedged with a headless render for slow or JS-only pages
+    async with fetch_slot:
+        loaded = await load_page(
+            normalized_url,
+            resolved_ip=resolved_ip,
+            # (no validators when the stored result can't be reused: a 304 has no body to analyze)
+            etag=previous_snapshot.etag if previous_snapshot else None,
+            last_modified=previous_snapshot.last_modified if previous_snapshot else None,
+            include_links=crawl,
+            paced=paced,
+        )
+    fetched = loaded.fetched
+    final_url, status_code, html = loaded.final_url or normalized_url, loaded.status_code, loaded.html
+    if fetched and fetched.skipped_reason:
+        print(f"[Analyze] Skipped body of {final_url}: {fetched.skipped_reason} ({fetched.content_type})")
+    if loaded.rendered:
+        rendered = loaded.rendered
+        print(
+            f"[Analyze] Using {loaded.source} HTML for {final_url}; render took {rendered.elapsed_ms}ms "
+            f"(ready: {rendered.readiness}, blocked {rendered.blocked_requests} requests)"
+        )
+
+    # 3) Unchanged since last analysis (304, or identical body): serve the stored result
+    #    (a rendered page can change behind an identical static shell, so only static HTML counts)
+    if fetched and previous_snapshot and loaded.source == "static" and (
+        fetched.not_modified
+        or (fetched.content_hash and fetched.content_hash == previous_snapshot.content_hash)
+    ):
+        print(f"[Analyze] {final_url} unchanged since {previous_snapshot.fetched_at}; reusing stored analysis")
+        async with llm_slot:
+            return await _revalidated_response(db, existing_session, previous_snapshot, questions, ai)
+
+    # 4) Minimal parse for title/meta and contact info
+    company = CompanyInfoSchema()
+    answers = []
+    crawled = False
+    if html:
+        # Parse + extract in the extraction pool so heavy pages don't stall the event loop
+        # (the loader already did it for static HTML it scored as a possible SPA shell)
+        extraction = loaded.extraction or await extract_page(html, final_url, include_links=crawl)
+        if extraction.error:
+            print(f"[Analyze] Extraction of {final_url} failed: {extraction.error}")
+        if extraction.minimized_bytes:
+            breakdown = ", ".join(f"{k} {v // 1024} KB" for k, v in sorted(extraction.minimized_bytes.items()))
+            print(
+                f"[Analyze] Minimizer stripped {sum(extraction.minimized_bytes.values()) // 1024} KB "
+                f"from {final_url} ({breakdown})"
+            )
+        title, meta = extraction.title, extraction.meta_description
+        if title:
+            company.unique_selling_proposition = title
+        if meta:
+            company.core_products_services = [meta]
+
+        # Contact and socials (best-effort)
+        emails = extraction.emails
+        phones = extraction.phones
+        socials = dict(extraction.socials)
+        # Deterministic DOM-based location extraction before LLM
+        dom_location: str | None = extraction.dom_location
+        dom_location_confidence = extraction.dom_location_confidence
+        dom_location_source = extraction.dom_location_source
+        structured = extraction.structured
+
+        # 4b) Optional crawl of contact/about pages; merge what the landing page lacked
+        if crawl:
+            try:
+                async with fetch_slot:
+                    extra_pages = await crawl_related_pages(
+                        final_url,
+                        html,
+                        user_agent=SCRAPER_USER_AGENT,
+                        timeout_seconds=SCRAPER_TIMEOUT_SECONDS,
+                        max_redirects=SCRAPER_MAX_REDIRECTS,
+                        max_pages=min(max_pages or CRAWL_MAX_PAGES, CRAWL_MAX_PAGES),
+                        time_budget_seconds=CRAWL_TIME_BUDGET_SECONDS,
+                        concurrency=CRAWL_CONCURRENCY,
+                        resolved_ip=resolved_ip,
+                        seen={normalized_url},
+                        links=extraction.links,
+                    )
+                seen_final = {final_url}
+                unique_pages = []
+                for extra in extra_pages:
+                    if extra.final_url not in seen_final:
+                        seen_final.add(extra.final_url)
+                        unique_pages.append(extra)
+                extras = await asyncio.gather(
+                    *(extract_page(p.text, p.final_url, include_main_text=False) for p in unique_pages)
+                )
+                for extra in extras:
+                    emails = _merge_unique(emails, extra.emails)
+                    phones = _merge_unique(phones, extra.phones)
+                    for platform, link in extra.socials.items():
+                        if link and not socials.get(platform):
+                            socials[platform] = link
+                    # A contact page usually states the address more clearly than the homepage footer
+                    if extra.dom_location and extra.dom_location_confidence > dom_location_confidence:
+                        dom_location = extra.dom_location
+                        dom_location_confidence = extra.dom_location_confidence
+                        dom_location_source = extra.dom_location_source
+                    structured.merge(extra.structured)
+                crawled = True
+            except Exception as e:
+                print(f"[Analyze] Crawl error: {e}")
+
+        # Contact details the site publishes as structured data are its own; they go first
+        provenance: Dict[str, FieldSource] = {}
+        structured_email = structured.fields.get("email")
+        if structured_email:
+            emails = _merge_unique([structured_email.value], emails)
+            provenance["contact_info.email"] = FieldSource(
+                source=structured_email.source, confidence=structured_email.confidence
+            )
+        structured_phone = structured.fields.get("phone")
+        if structured_phone:
+            phones = _merge_unique([structured_phone.value], phones)
+            provenance["contact_info.phone"] = FieldSource(
+                source=structured_phone.source, confidence=structured_phone.confidence
+            )
+        for platform, f in structured.socials.items():
+            socials[platform] = f.value
+            provenance[f"contact_info.social_media.{platform}"] = FieldSource(source=f.source, confidence=f.confidence)
+
+        if emails or phones or any(socials.values()) or dom_location:
+            company.contact_info = {
+                "email": emails[0] if emails else None,
+                "phone": phones[0] if phones else None,
+                "social_media": socials,
+            }
+            if dom_location and not getattr(company, "location", None):
+                company.location = dom_location
+                # A JSON-LD PostalAddress found by the address locator keeps its label
+                provenance["location"] = FieldSource(
+                    source="json-ld" if dom_location_source == "json-ld" else "dom",
+                    confidence=dom_location_confidence,
+                )
+        _apply_structured_data(company, structured, provenance)
+        confident = _confident_fields(provenance)
+        skip_inference = len(confident) >= STRUCTURED_DATA_MIN_FIELDS
+
+        # 5) Main text extraction and AI inference (if key provided)
+        main_text = extraction.main_text
+        # Build fallback context from title/meta if main_text is empty
+        fallback_context = None
+        if not main_text:
+            parts = []
+            if title:
+                parts.append(title)
+            if meta:
+                parts.append(meta)
+            fallback_context = "\n\n".join(parts) if parts else None
+        print(f"[Analyze] main_text length: {len(main_text) if main_text else 0} | fallback_context length: {len(fallback_context) if fallback_context else 0}")
+        if main_text or fallback_context:
+            try:
+                if ai:
+                    print(f"[Analyze] Using {ai.kind} ({ai.model_name})")
+                else:
+                    print("[Analyze] No AI provider configured")
+
+                if ai and skip_inference:
+                    print(f"[Analyze] Structured data gives {', '.join(confident)}; skipping attribute inference")
+                elif ai:
+                    context_for_ai = main_text or fallback_context or ""
+                    async with llm_slot:
+                        inferred = await ai.infer_company_attributes(context_for_ai)
+                    print(f"[Analyze] Inferred attributes: {inferred}")
+                    # Fields already known with high confidence are kept
+                    for name in INFERRED_FIELDS:
+                        value = inferred.get(name)
+                        if value and name not in confident:
+                            setattr(company, name, value)
+                            provenance[name] = FieldSource(source="llm")
+            except Exception as e:
+                print(f"[Analyze] AI inference error: {e}")
+
+        # 5a) Questions are answered whether or not attribute inference ran
+        if ai and questions and main_text:
+            try:
+                async with llm_slot:
+                    answers = await ai.answer_questions(main_text, questions)
+                print(f"[Analyze] Answered {len(answers)} questions")
+            except Exception as e:
+                print(f"[Analyze] AI answer error: {e}")
+
+        # 5b) Heuristic location extraction if LLM did not provide it
+        if (not getattr(company, "location", None)) and main_text:
+            try:
+                from app.services.scraper.extract_contact import extract_location
+
+                guessed = extract_location(main_text)
+                if guessed and not company.location:
+                    company.location = guessed
+                    provenance["location"] = FieldSource(source="text")
+            except Exception as _:
+                pass
+        company.provenance = provenance or None
+
+    # Persist to DB
+    try:
+        # Upsert session row for this URL (avoid duplicates in list)
+        if existing_session:
+            session_row = existing_session
+            session_row.status = "completed"
+            session_row.ai_provider = ai.kind if ai else AI_PROVIDER
+            session_row.model = ai.model_name if ai else None
+        else:
+            session_row = AnalysisSessionModel(
+                url=normalized_url,
+                status="completed",
+                ai_provider=ai.kind if ai else AI_PROVIDER,
+                model=ai.model_name if ai else None,
+            )
+            db.add(session_row)
+            db.flush()  # get session_row.id
+
+        # Snapshot: record latest fetch as a new row (history)
+        static_analyzed = bool(fetched) and html == fetched.text
+        snapshot_row = PageSnapshotModel(
+            analysis_session_id=session_row.id,
+            final_url=final_url,
+            http_status=status_code,
+            title=company.unique_selling_proposition,
+            meta_description=(company.core_products_services[0] if company.core_products_services else None),
+            raw_html=None,
+            main_text=main_text if 'main_text' in locals() else None,
+            # Validators and hash describe the static response; a 304 or identical body
+            # only proves the analysis current when that response is what was analyzed
+            etag=fetched.etag if static_analyzed else None,
+            last_modified=fetched.last_modified if static_analyzed else None,
+            content_hash=fetched.content_hash if static_analyzed else None,
+            crawled=crawled,
+        )
+        db.add(snapshot_row)
+
+        # Company info: update existing or create
+        existing_company = (
+            db.query(CompanyInfoModel)
+            .filter(CompanyInfoModel.analysis_session_id == session_row.id)
+            .first()
+        )
+        if existing_company:
+            existing_company.industry = company.industry
+            existing_company.company_size = company.company_size
+            existing_company.location = company.location
+            existing_company.core_products_services = company.core_products_services
+            existing_company.unique_selling_proposition = company.unique_selling_proposition
+            existing_company.target_audience = company.target_audience
+        else:
+            company_row = CompanyInfoModel(
+                analysis_session_id=session_row.id,
+                industry=company.industry,
+                company_size=company.company_size,
+                location=company.location,
+                core_products_services=company.core_products_services,
+                unique_selling_proposition=company.unique_selling_proposition,
+                target_audience=company.target_audience,
+            )
+            db.add(company_row)
+
+        # Contact info: update if we parsed anything
+        if 'emails' in locals() or 'phones' in locals() or 'socials' in locals():
+            existing_contact = (
+                db.query(ContactInfoModel)
+                .filter(ContactInfoModel.analysis_session_id == session_row.id)
+                .first()
+            )
+            if existing_contact:
+                if 'emails' in locals():
+                    existing_contact.emails = emails
+                if 'phones' in locals():
+                    existing_contact.phones = phones
+                if 'socials' in locals():
+                    existing_contact.social = socials
+            else:
+                contact_row = ContactInfoModel(
+                    analysis_session_id=session_row.id,
+                    emails=emails if 'emails' in locals() else None,
+                    phones=phones if 'phones' in locals() else None,
+                    social=socials if 'socials' in locals() else None,
+                )
+                db.add(contact_row)
+
+        # Extracted answers: replace with latest
+        if answers:
+            db.query(ExtractedAnswerModel).filter(
+                ExtractedAnswerModel.analysis_session_id == session_row.id
+            ).delete(synchronize_session=False)
+            for a in answers:
+                db.add(
+                    ExtractedAnswerModel(
+                        analysis_session_id=session_row.id,
+                        question=a.get("question"),
+                        answer=a.get("answer"),
+                    )
+                )
+
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[Analyze] DB persistence error: {e}")
+        if require_persisted:
+            raise AnalysisPersistError(f"Analysis of {final_url} was not saved: {e}") from e
+
+    now = datetime.now(timezone.utc)
+    print(f"Analysis completed for {final_url} at {now}")
+    print(f"Company info: {company}")
+    return AnalyzeResponse(
+        id=str(session_row.id),
+        url=final_url,
+        analysis_timestamp=now,
+        company_info=company,
+        extracted_answers=answers,
+    )
+
+
@@ -1,5 +1,4 @@
 from datetime import datetime, timezone
-import os
 import uuid
 from typing import List
 
@@ -8,14 +7,8 @@ from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.orm import Session
 
 from app.core.security import verify_bearer_token
-from app.core.config import (
-    AI_PROVIDER,
-    OPENAI_API_KEY,
-    OPENAI_MODEL,
-)
-from app.services.ai.openai_provider import OpenAIProvider
-from app.services.ai.gemini_provider import GeminiProvider
-from app.services.scraper.guard import validate_url_and_resolve
+from app.services.ai.registry import ProviderRegistry, get_ai_registry, select_ai_provider
+from app.services.scraper.guard import validate_url_and_resolve_async
 from db.db import get_db
 from app.features.analysis.models import AnalysisSession as AnalysisSessionModel, PageSnapshot as PageSnapshotModel
 from app.features.company.models import CompanyInfo as CompanyInfoModel
@@ -72,6 +65,7 @@ async def converse_endpoint(
     payload: ConverseRequest,
     rate_limited: None = Depends(RateLimiter(times=30, seconds=60)),
     db: Session = Depends(get_db),
+    registry: ProviderRegistry = Depends(get_ai_registry),
 ):
     if not payload.url and not payload.session_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide either url or session_id")
@@ -90,7 +84,7 @@ async def converse_endpoint(
         resolved_url = session_row.url
     else:
         # Normalize URL similar to analyze
-        normalized_url, _ = validate_url_and_resolve(str(payload.url))
+        normalized_url, _ = await validate_url_and_resolve_async(str(payload.url))
         resolved_url = normalized_url
         session_row = (
             db.query(AnalysisSessionModel)
@@ -113,12 +107,8 @@ async def converse_endpoint(
 
     context = _build_context(snapshot, company, contact)
 
-    # Choose AI provider
-    ai = None
-    if AI_PROVIDER == "openai" and OPENAI_API_KEY:
-        ai = OpenAIProvider(model=OPENAI_MODEL)
-    elif AI_PROVIDER == "gemini" and os.getenv("GEMINI_API_KEY"):
-        ai = GeminiProvider(os.getenv("GEMINI_MODEL", "gemini-1.5-pro"))
+    # Shared provider from the registry (created once at startup)
+    ai = select_ai_provider(payload.ai_provider, registry)
 
     if not ai:
         raise HTTPException(status_code=503, detail="AI provider not configured")
@@ -19,6 +19,8 @@ class ConverseRequest(BaseModel):
     session_id: Optional[str] = None
     query: str
     conversation_history: Optional[List[QAExchangeLite]] = None
+    # Named provider from AI_PROVIDERS; the default provider when omitted
+    ai_provider: Optional[str] = None
 
 
 class ConverseResponse(BaseModel):
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.asyncio import Redis
+
+from app.core.config import (
+    AI_CACHE_ENABLED,
+    AI_CACHE_TTL_SECONDS,
+    AI_CACHE_MAX_ENTRIES,
+    AI_CACHE_MAX_BYTES,
+)
+from .provider import AIProvider, CONTEXT_CHARS, PROMPT_VERSION
+
+
+REDIS_KEY_PREFIX = "websage:llm:"
+
+
+def cache_key(provider: AIProvider, operation: str, context_text: str, question: Optional[str] = None) -> str:
+    """Content address of one LLM result.
+
+    Covers everything that shapes the reply: provider kind and model, the
+    prompt template version, the operation and the context as the prompt
+    sees it (first CONTEXT_CHARS characters, whitespace-normalized), plus
+    the question.
+    """
+    context = " ".join(context_text[:CONTEXT_CHARS].split())
+    question = " ".join((question or "").split()).lower()
+    material = json.dumps(
+        [PROMPT_VERSION, provider.kind, provider.model_name, operation, context, question],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """LLM results: an in-process LRU in front of Redis, both with a TTL.
+
+    The local LRU holds at most max_entries results and max_bytes of JSON.
+    Redis (when given) shares results across workers and restarts; its
+    errors are counted and otherwise ignored, so a Redis outage only costs
+    cache hits.
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        ttl_seconds: int = AI_CACHE_TTL_SECONDS,
+        max_entries: int = AI_CACHE_MAX_ENTRIES,
+        max_bytes: int = AI_CACHE_MAX_BYTES,
+    ):
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, JSON payload), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._counters = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+        }
+
+    def _drop(self, key: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def _put_local(self, key: str, payload: str) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+        self._bytes += len(payload)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._counters["local_hits"] += 1
+                return json.loads(entry[1])
+            self._drop(key)
+        if self.redis is not None:
+            try:
+                payload = await self.redis.get(REDIS_KEY_PREFIX + key)
+            except Exception as e:
+                self._counters["redis_errors"] += 1
+                print(f"[LLMCache] Redis read failed: {e}")
+                payload = None
+            if payload is not None:
+                self._put_local(key, payload)
+                self._counters["redis_hits"] += 1
+                return json.loads(payload)
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        self._put_local(key, payload)
+        self._counters["stores"] += 1
+        if self.redis is not None:
+            try:
+                await self.redis.set(REDIS_KEY_PREFIX + key, payload, ex=self.ttl_seconds)
+            except Exception as e:
+                self._counters["redis_errors"] += 1
+                print(f"[LLMCache] Redis write failed: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        hits = self._counters["local_hits"] + self._counters["redis_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "redis": self.redis is not None,
+        }
+
+
+class CachedProvider(AIProvider):
+    """Wraps a provider so repeated prompts are answered from the LLM cache.
+
+    Answers are cached per question, so a question set that overlaps an
+    earlier one only sends the new questions to the model. Empty results
+    (failed or unparseable replies) are not cached.
+    """
+
+    def __init__(self, inner: AIProvider):
+        self.inner = inner
+        self.kind = inner.kind
+        self.model_name = inner.model_name
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    async def infer_company_attributes(self, context_text: str) -> Dict[str, Optional[str]]:
+        cache = get_llm_cache()
+        if cache is None:
+            return await self.inner.infer_company_attributes(context_text)
+        key = cache_key(self.inner, "attributes", context_text)
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+        result = await self.inner.infer_company_attributes(context_text)
+        if any(result.values()):
+            await cache.set(key, result)
+        return result
+
+    async def answer_questions(self, context_text: str, questions: List[str]) -> List[Dict[str, str]]:
+        cache = get_llm_cache()
+        if cache is None or not questions:
+            return await self.inner.answer_questions(context_text, questions)
+        keys = [cache_key(self.inner, "answer", context_text, q) for q in questions]
+        answers: Dict[int, str] = {}
+        for i, key in enumerate(keys):
+            cached = await cache.get(key)
+            if cached is not None:
+                answers[i] = cached
+        missing = [i for i in range(len(questions)) if i not in answers]
+        if missing:
+            fresh = await self.inner.answer_questions(context_text, [questions[i] for i in missing])
+            for i, item in zip(missing, fresh):
+                answer = item.get("answer") or ""
+                answers[i] = answer
+                if answer:
+                    await cache.set(keys[i], answer)
+        return [{"question": q, "answer": answers.get(i, "")} for i, q in enumerate(questions)]
+
+
+_cache: Optional[LLMCache] = None
+
+
+def init_llm_cache(redis: Optional[Redis] = None) -> Optional[LLMCache]:
+    """Create the shared cache; redis is the app's client (None = in-process only)."""
+    global _cache
+    _cache = LLMCache(redis) if AI_CACHE_ENABLED else None
+    return _cache
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """The shared cache, created in-process only on first use outside the app."""
+    global _cache
+    if _cache is None and AI_CACHE_ENABLED:
+        _cache = LLMCache()
+    return _cache
+
+
+def shutdown_llm_cache() -> None:
+    # The Redis client belongs to the app (rate limiter); it is closed there
+    global _cache
+    _cache = None
+
+
+def llm_cache_stats() -> Optional[Dict[str, object]]:
+    return _cache.stats() if _cache else None
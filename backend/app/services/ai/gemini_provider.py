@@ -3,7 +3,7 @@ from typing import Dict, Optional, List
 
 import google.generativeai as genai
 
-from .provider import AIProvider
+from .provider import AIProvider, BATCH_SYSTEM_PROMPT, batch_prompt, parse_batch_answers, question_prompt
 
 
 EXTRACTION_SYSTEM_PROMPT = (
@@ -14,10 +14,13 @@ EXTRACTION_SYSTEM_PROMPT = (
 
 
 class GeminiProvider(AIProvider):
+    kind = "gemini"
+
     def __init__(self, model: str = "gemini-1.5-pro"):
         api_key = os.getenv("GEMINI_API_KEY")
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model)
+        self.model_name = model
 
     async def infer_company_attributes(self, context_text: str) -> Dict[str, Optional[str]]:
         prompt = (
@@ -57,15 +60,15 @@ class GeminiProvider(AIProvider):
                 pass
             return {"industry": None, "company_size": None, "location": None, "target_audience": None}
 
-    async def answer_questions(self, context_text: str, questions: List[str]) -> List[Dict[str, str]]:
-        results: List[Dict[str, str]] = []
-        for q in questions:
-            prompt = (
-                "Context:\n" + context_text[:8000] + "\n\nQuestion: " + q + "\nAnswer briefly and factually. If unknown, say 'insufficient information'."
-            )
-            resp = await self.model.generate_content_async(prompt)
-            answer = (resp.text or "").strip()
-            results.append({"question": q, "answer": answer})
-        return results
+    async def answer_one(self, context_text: str, question: str) -> str:
+        resp = await self.model.generate_content_async(question_prompt(context_text, question))
+        return (resp.text or "").strip()
+
+    async def answer_batch(self, context_text: str, questions: List[str]) -> Dict[int, str]:
+        resp = await self.model.generate_content_async(
+            BATCH_SYSTEM_PROMPT + "\n\n" + batch_prompt(context_text, questions),
+            generation_config={"response_mime_type": "application/json"},
+        )
+        return parse_batch_answers(resp.text or "{}", len(questions))
 
 
@@ -3,7 +3,7 @@ from typing import Dict, Optional, List
 
 from openai import AsyncOpenAI
 
-from .provider import AIProvider
+from .provider import AIProvider, BATCH_SYSTEM_PROMPT, batch_prompt, parse_batch_answers, question_prompt
 
 
 EXTRACTION_SYSTEM_PROMPT = (
@@ -14,10 +14,17 @@ EXTRACTION_SYSTEM_PROMPT = (
 
 
 class OpenAIProvider(AIProvider):
+    kind = "openai"
+
     def __init__(self, model: str = "gpt-4o-mini"):
         api_key = os.getenv("OPENAI_API_KEY")
+        # One client per provider: its connection pool keeps TLS sessions to the API alive
         self.client = AsyncOpenAI(api_key=api_key)
         self.model = model
+        self.model_name = model
+
+    async def close(self) -> None:
+        await self.client.close()
 
     async def infer_company_attributes(self, context_text: str) -> Dict[str, Optional[str]]:
         prompt = (
@@ -47,19 +54,27 @@ class OpenAIProvider(AIProvider):
         except Exception:
             return {"industry": None, "company_size": None, "location": None, "target_audience": None}
 
-    async def answer_questions(self, context_text: str, questions: List[str]) -> List[Dict[str, str]]:
-        results: List[Dict[str, str]] = []
-        for q in questions:
-            prompt = (
-                "Context:\n" + context_text[:8000] + "\n\nQuestion: " + q + "\nAnswer briefly and factually. If unknown, say 'insufficient information'."
-            )
-            resp = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "system", "content": "You are WebSage."}, {"role": "user", "content": prompt}],
-                temperature=0.2,
-            )
-            answer = resp.choices[0].message.content or ""
-            results.append({"question": q, "answer": answer.strip()})
-        return results
+    async def answer_one(self, context_text: str, question: str) -> str:
+        resp = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are WebSage."},
+                {"role": "user", "content": question_prompt(context_text, question)},
+            ],
+            temperature=0.2,
+        )
+        return (resp.choices[0].message.content or "").strip()
+
+    async def answer_batch(self, context_text: str, questions: List[str]) -> Dict[int, str]:
+        resp = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": batch_prompt(context_text, questions)},
+            ],
+            temperature=0.2,
+            response_format={"type": "json_object"},
+        )
+        return parse_batch_answers(resp.choices[0].message.content or "{}", len(questions))
 
 
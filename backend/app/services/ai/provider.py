@@ -1,11 +1,128 @@
-from typing import Dict, Optional
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from app.core.config import (
+    AI_ANSWER_MODE,
+    AI_ANSWER_CONCURRENCY,
+    AI_BATCH_MAX_QUESTIONS,
+    AI_BATCH_MIN_CONTEXT_CHARS,
+)
+
+
+# Characters of page context sent with each prompt
+CONTEXT_CHARS = 8000
+# Part of every LLM cache key; bump when a prompt changes so cached replies to the old one are ignored
+PROMPT_VERSION = 1
+ANSWER_INSTRUCTION = "Answer briefly and factually. If unknown, say 'insufficient information'."
+BATCH_SYSTEM_PROMPT = (
+    "You are WebSage. Answer every question from the given context only. "
+    'Return a JSON object {"answers": [{"id": <question number>, "answer": "<answer>"}]} '
+    "with one entry per question. " + ANSWER_INSTRUCTION
+)
+
+
+def question_prompt(context_text: str, question: str) -> str:
+    return "Context:\n" + context_text[:CONTEXT_CHARS] + "\n\nQuestion: " + question + "\n" + ANSWER_INSTRUCTION
+
+
+def batch_prompt(context_text: str, questions: List[str]) -> str:
+    numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(questions, start=1))
+    return "Context:\n" + context_text[:CONTEXT_CHARS] + "\n\nQuestions:\n" + numbered + "\n\nJSON only."
+
+
+def parse_json_object(content: str) -> Dict[str, Any]:
+    """A JSON object from model output, salvaging the outermost {...} around stray text."""
+    try:
+        data = json.loads(content)
+    except Exception:
+        start, end = content.find("{"), content.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            data = json.loads(content[start : end + 1])
+        except Exception:
+            return {}
+    return data if isinstance(data, dict) else {}
+
+
+def parse_batch_answers(content: str, count: int) -> Dict[int, str]:
+    """{question index: answer} from a batched reply; entries without a usable answer are left out."""
+    answers: Dict[int, str] = {}
+    items = parse_json_object(content).get("answers")
+    if not isinstance(items, list):
+        return answers
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        answer = item.get("answer")
+        try:
+            index = int(item.get("id")) - 1
+        except (TypeError, ValueError):
+            # No usable id: fall back to the entry's position
+            index = position
+        if 0 <= index < count and isinstance(answer, str) and answer.strip():
+            answers.setdefault(index, answer.strip())
+    return answers
 
 
 class AIProvider:
+    # "openai" | "gemini"; model_name is the model the provider was created for
+    kind: str = ""
+    model_name: str = ""
+
+    async def close(self) -> None:
+        """Release the provider's HTTP connections (called once at shutdown)."""
+
     async def infer_company_attributes(self, context_text: str) -> Dict[str, Optional[str]]:
         raise NotImplementedError
 
-    async def answer_questions(self, context_text: str, questions: list[str]) -> list[Dict[str, str]]:
+    async def answer_one(self, context_text: str, question: str) -> str:
+        """One question, one round trip."""
+        raise NotImplementedError
+
+    async def answer_batch(self, context_text: str, questions: List[str]) -> Dict[int, str]:
+        """All questions in one structured-output call: {question index: answer}."""
         raise NotImplementedError
 
+    def answer_mode(self, context_text: str, questions: List[str]) -> str:
+        """"batch" or "concurrent" for this context and question set (AI_ANSWER_MODE=auto)."""
+        if AI_ANSWER_MODE in ("batch", "concurrent"):
+            return AI_ANSWER_MODE if len(questions) > 1 else "concurrent"
+        if 2 <= len(questions) <= AI_BATCH_MAX_QUESTIONS and len(context_text) >= AI_BATCH_MIN_CONTEXT_CHARS:
+            return "batch"
+        return "concurrent"
+
+    async def _answer_concurrently(self, context_text: str, questions: List[str]) -> List[str]:
+        semaphore = asyncio.Semaphore(max(1, AI_ANSWER_CONCURRENCY))
+
+        async def answer(question: str) -> str:
+            async with semaphore:
+                return await self.answer_one(context_text, question)
+
+        return list(await asyncio.gather(*(answer(q) for q in questions)))
+
+    async def answer_questions(self, context_text: str, questions: List[str]) -> List[Dict[str, str]]:
+        """Answer every question about the context, in order.
 
+        Batched mode sends the context once for all questions; questions the
+        batched reply leaves unanswered (or all, if the call fails) are then
+        answered one per call, concurrently.
+        """
+        if not questions:
+            return []
+        answers: Dict[int, str] = {}
+        batched = self.answer_mode(context_text, questions) == "batch"
+        if batched:
+            try:
+                answers = await self.answer_batch(context_text, questions)
+            except Exception as e:
+                print(f"[AI] Batched answering failed, answering one by one: {e}")
+                batched = False
+        missing = [i for i in range(len(questions)) if i not in answers]
+        if missing:
+            if batched:
+                print(f"[AI] Batched reply missed {len(missing)} of {len(questions)} questions")
+            replies = await self._answer_concurrently(context_text, [questions[i] for i in missing])
+            answers.update(zip(missing, replies))
+        return [{"question": q, "answer": answers[i]} for i, q in enumerate(questions)]
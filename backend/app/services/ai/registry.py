@@ -0,0 +1,163 @@
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import (
+    AI_PROVIDER,
+    AI_PROVIDERS,
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+)
+from .cache import CachedProvider
+from .provider import AIProvider
+from .openai_provider import OpenAIProvider
+from .gemini_provider import GeminiProvider
+
+
+def parse_provider_specs(spec: str) -> List[Tuple[str, str, str]]:
+    """"fast=openai:gpt-4o-mini,deep=gemini:gemini-1.5-pro" -> [(name, kind, model), ...].
+
+    "name=kind" uses the kind's configured model; a bare "kind" is named after itself.
+    """
+    specs: List[Tuple[str, str, str]] = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, target = entry.partition("=")
+        if not target:
+            name, target = "", name
+        kind, _, model = target.strip().partition(":")
+        kind = kind.strip().lower()
+        model = model.strip() or (OPENAI_MODEL if kind == "openai" else GEMINI_MODEL)
+        specs.append((name.strip() or kind, kind, model))
+    return specs
+
+
+def _default_specs() -> List[Tuple[str, str, str]]:
+    # One provider per configured API key (the previous AI_PROVIDER-only behaviour)
+    specs: List[Tuple[str, str, str]] = []
+    if OPENAI_API_KEY:
+        specs.append(("openai", "openai", OPENAI_MODEL))
+    if GEMINI_API_KEY:
+        specs.append(("gemini", "gemini", GEMINI_MODEL))
+    return specs
+
+
+def create_provider(kind: str, model: str) -> AIProvider:
+    if kind == "openai":
+        if not OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY is not set")
+        return OpenAIProvider(model=model)
+    if kind == "gemini":
+        if not GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY is not set")
+        return GeminiProvider(model)
+    raise ValueError(f"Unknown AI provider kind '{kind}'")
+
+
+class ProviderRegistry:
+    """Configured AI providers by name, created once and shared by every request.
+
+    Each provider keeps its own API client, so connections (and TLS
+    sessions) to the LLM APIs are reused across analyses instead of being
+    set up per request. Registered providers answer repeated prompts from
+    the LLM cache.
+    """
+
+    def __init__(self, default: Optional[str] = None):
+        self.default = default
+        self._providers: Dict[str, AIProvider] = {}
+
+    def register(self, name: str, provider: AIProvider) -> None:
+        self._providers[name] = provider
+
+    def names(self) -> List[str]:
+        return list(self._providers)
+
+    def get(self, name: Optional[str] = None) -> Optional[AIProvider]:
+        """The named provider, or the default one when name is empty.
+
+        Raises KeyError for an unknown name; returns None when no default
+        provider is configured.
+        """
+        if name:
+            if name not in self._providers:
+                raise KeyError(name)
+            return self._providers[name]
+        return self._providers.get(self.default) if self.default else None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "default": self.default if self.default in self._providers else None,
+            "providers": {
+                name: {"kind": p.kind, "model": p.model_name} for name, p in self._providers.items()
+            },
+        }
+
+    async def close(self) -> None:
+        providers, self._providers = list(self._providers.values()), {}
+        for provider in providers:
+            try:
+                await provider.close()
+            except Exception as e:
+                print(f"[AI] Closing {provider.kind} provider failed: {e}")
+
+
+def build_registry(spec: str = AI_PROVIDERS, default: str = AI_PROVIDER) -> ProviderRegistry:
+    """Create every configured provider; ones that can't be created are skipped with a log line."""
+    specs = parse_provider_specs(spec) if spec.strip() else _default_specs()
+    registry = ProviderRegistry()
+    for name, kind, model in specs:
+        try:
+            registry.register(name, CachedProvider(create_provider(kind, model)))
+        except Exception as e:
+            print(f"[AI] Provider '{name}' ({kind}:{model}) disabled: {e}")
+    if default in registry.names():
+        registry.default = default
+    elif spec.strip() and registry.names():
+        # Explicit named providers: the first one listed is the default
+        registry.default = registry.names()[0]
+    return registry
+
+
+_registry: Optional[ProviderRegistry] = None
+
+
+async def init_ai_providers() -> ProviderRegistry:
+    global _registry
+    _registry = build_registry()
+    return _registry
+
+
+def get_ai_registry() -> ProviderRegistry:
+    """The shared registry (FastAPI dependency); built on first use outside the app."""
+    global _registry
+    if _registry is None:
+        _registry = build_registry()
+    return _registry
+
+
+def select_ai_provider(name: Optional[str] = None, registry: Optional[ProviderRegistry] = None) -> Optional[AIProvider]:
+    """Provider for a request's optional "ai_provider" name; HTTP 400 for unknown names."""
+    registry = registry or get_ai_registry()
+    try:
+        return registry.get(name)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown AI provider '{name}'; configured: {', '.join(registry.names()) or 'none'}",
+        )
+
+
+async def shutdown_ai_providers() -> None:
+    global _registry
+    registry, _registry = _registry, None
+    if registry is not None:
+        await registry.close()
+
+
+def ai_provider_stats() -> Optional[Dict[str, object]]:
+    return _registry.stats() if _registry else None
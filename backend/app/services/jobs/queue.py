@@ -0,0 +1,269 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from redis.asyncio import from_url as redis_from_url, Redis
+
+from app.core.config import JOB_MAX_ATTEMPTS, JOB_LEASE_SECONDS
+
+
+@dataclass
+class Job:
+    id: str
+    payload: Dict[str, Any]
+    attempts: int = 0
+    max_attempts: int = JOB_MAX_ATTEMPTS
+    last_error: Optional[str] = None
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+class JobFailed(Exception):
+    """Raised by a job handler for a failure that retrying cannot fix."""
+
+
+class JobQueue(ABC):
+    """At-least-once job queue with leases.
+
+    reserve() hands a job to one worker under a lease; the worker must ack()
+    it, release() it on failure, or keep extending the lease while it runs.
+    Jobs whose lease lapses (crashed worker/node) are put back by
+    requeue_expired(). A job is retried up to max_attempts times in total.
+    """
+
+    # Whether jobs outlive this process (and can be picked up by another node)
+    persistent = False
+
+    @abstractmethod
+    async def enqueue(self, payload: Dict[str, Any], job_id: Optional[str] = None) -> Job:
+        ...
+
+    @abstractmethod
+    async def reserve(self, worker_id: str, timeout: float = 1.0) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def extend_lease(self, job: Job, worker_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def ack(self, job: Job) -> None:
+        ...
+
+    @abstractmethod
+    async def release(self, job: Job, error: str) -> bool:
+        """Return the job to the queue after a failure. False if it was dead-lettered."""
+
+    async def requeue_expired(self) -> List[Job]:
+        """Requeue jobs with lapsed leases; returns those that ran out of attempts."""
+        return []
+
+    async def stats(self) -> Dict[str, int]:
+        return {}
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryJobQueue(JobQueue):
+    """Single-process queue for local runs and tests; leases are not needed here."""
+
+    def __init__(self, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self._pending: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._running: Dict[str, Job] = {}
+        self._dead = 0
+
+    async def enqueue(self, payload: Dict[str, Any], job_id: Optional[str] = None) -> Job:
+        job = Job(id=job_id or str(uuid.uuid4()), payload=payload, max_attempts=self.max_attempts)
+        await self._pending.put(job)
+        return job
+
+    async def reserve(self, worker_id: str, timeout: float = 1.0) -> Optional[Job]:
+        try:
+            job = await asyncio.wait_for(self._pending.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        job.attempts += 1
+        self._running[job.id] = job
+        return job
+
+    async def extend_lease(self, job: Job, worker_id: str) -> None:
+        pass
+
+    async def ack(self, job: Job) -> None:
+        self._running.pop(job.id, None)
+
+    async def release(self, job: Job, error: str) -> bool:
+        self._running.pop(job.id, None)
+        job.last_error = error
+        if job.is_last_attempt:
+            self._dead += 1
+            return False
+        await self._pending.put(job)
+        return True
+
+    async def stats(self) -> Dict[str, int]:
+        return {"pending": self._pending.qsize(), "running": len(self._running), "dead": self._dead}
+
+
+class RedisJobQueue(JobQueue):
+    """Redis queue shared by workers on every node.
+
+    Layout (all under key_prefix):
+      pending      list of job ids waiting to run
+      processing   list of job ids reserved by some worker
+      job:<id>     hash with payload, attempts, last_error
+      lease:<id>   worker id, expires after lease_seconds unless extended
+      dead         list of job ids that exhausted their attempts
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_prefix: str = "websage:jobs",
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.redis = redis
+        self.prefix = key_prefix
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Jobs seen without a lease on the previous reaper pass. A job is only
+        # requeued if its lease is still missing one pass later, which covers
+        # the short gap between BLMOVE and SET lease in reserve().
+        self._lease_missing: Set[str] = set()
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    async def enqueue(self, payload: Dict[str, Any], job_id: Optional[str] = None) -> Job:
+        job = Job(id=job_id or str(uuid.uuid4()), payload=payload, max_attempts=self.max_attempts)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(
+            self._key("job", job.id),
+            mapping={"payload": json.dumps(payload), "attempts": 0, "enqueued_at": time.time()},
+        )
+        pipe.lpush(self._key("pending"), job.id)
+        await pipe.execute()
+        return job
+
+    async def _load(self, job_id: str) -> Optional[Job]:
+        data = await self.redis.hgetall(self._key("job", job_id))
+        if not data:
+            return None
+        return Job(
+            id=job_id,
+            payload=json.loads(data.get("payload") or "{}"),
+            attempts=int(data.get("attempts") or 0),
+            max_attempts=self.max_attempts,
+            last_error=data.get("last_error"),
+        )
+
+    async def reserve(self, worker_id: str, timeout: float = 1.0) -> Optional[Job]:
+        job_id = await self.redis.blmove(
+            self._key("pending"), self._key("processing"), timeout, src="RIGHT", dest="LEFT"
+        )
+        if not job_id:
+            return None
+        await self.redis.set(self._key("lease", job_id), worker_id, ex=self.lease_seconds)
+        await self.redis.hincrby(self._key("job", job_id), "attempts", 1)
+        job = await self._load(job_id)
+        if job is None:
+            # Hash vanished (manual cleanup); drop the orphan id
+            await self.redis.lrem(self._key("processing"), 1, job_id)
+            await self.redis.delete(self._key("lease", job_id))
+            return None
+        return job
+
+    async def extend_lease(self, job: Job, worker_id: str) -> None:
+        await self.redis.set(self._key("lease", job.id), worker_id, ex=self.lease_seconds)
+
+    async def ack(self, job: Job) -> None:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrem(self._key("processing"), 1, job.id)
+        pipe.delete(self._key("lease", job.id), self._key("job", job.id))
+        await pipe.execute()
+
+    async def _bury_or_retry(self, job: Job, error: Optional[str]) -> bool:
+        if error:
+            job.last_error = error
+            await self.redis.hset(self._key("job", job.id), "last_error", error[:2000])
+        if job.is_last_attempt:
+            await self.redis.lpush(self._key("dead"), job.id)
+            return False
+        await self.redis.lpush(self._key("pending"), job.id)
+        return True
+
+    async def release(self, job: Job, error: str) -> bool:
+        # Only the holder that removes the id from processing may requeue it
+        removed = await self.redis.lrem(self._key("processing"), 1, job.id)
+        await self.redis.delete(self._key("lease", job.id))
+        if not removed:
+            return True
+        return await self._bury_or_retry(job, error)
+
+    async def requeue_expired(self) -> List[Job]:
+        dead: List[Job] = []
+        job_ids = await self.redis.lrange(self._key("processing"), 0, -1)
+        missing_now: Set[str] = set()
+        for job_id in job_ids:
+            if await self.redis.exists(self._key("lease", job_id)):
+                continue
+            if job_id not in self._lease_missing:
+                missing_now.add(job_id)
+                continue
+            # LREM is atomic, so only one reaper across all nodes wins the job
+            if not await self.redis.lrem(self._key("processing"), 1, job_id):
+                continue
+            job = await self._load(job_id)
+            if job is None:
+                continue
+            if not await self._bury_or_retry(job, job.last_error or "lease expired"):
+                dead.append(job)
+        self._lease_missing = missing_now
+        return dead
+
+    async def stats(self) -> Dict[str, int]:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.llen(self._key("pending"))
+        pipe.llen(self._key("processing"))
+        pipe.llen(self._key("dead"))
+        pending, running, dead = await pipe.execute()
+        return {"pending": pending, "running": running, "dead": dead}
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+_queue: Optional[JobQueue] = None
+
+
+async def init_job_queue(backend: str, redis_url: str) -> JobQueue:
+    global _queue
+    if backend == "redis":
+        redis = redis_from_url(redis_url, encoding="utf-8", decode_responses=True)
+        await redis.ping()
+        _queue = RedisJobQueue(redis)
+    else:
+        _queue = InMemoryJobQueue()
+    return _queue
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    return _queue
+
+
+async def shutdown_job_queue() -> None:
+    global _queue
+    if _queue is not None:
+        await _queue.close()
+    _queue = None
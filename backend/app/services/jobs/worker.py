@@ -0,0 +1,138 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from .queue import Job, JobFailed, JobQueue
+
+
+JobHandler = Callable[[Job], Awaitable[None]]
+DeadJobHandler = Callable[[Job], Awaitable[None]]
+
+
+class WorkerPool:
+    """N concurrent workers pulling jobs from a JobQueue in this process.
+
+    Each worker renews its lease while the handler runs, acks on success and
+    releases on failure. A reaper task puts back jobs whose lease lapsed on
+    any node; on_dead is called for jobs that have exhausted their attempts
+    or whose handler raised JobFailed.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: JobHandler,
+        concurrency: int,
+        lease_seconds: int,
+        on_dead: Optional[DeadJobHandler] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.on_dead = on_dead
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks: List[asyncio.Task] = []
+        # Jobs whose handler was cancelled by stop()
+        self._interrupted: List[Job] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        self._stopping = False
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._work(f"{self.node_id}/{i}")))
+        self._tasks.append(asyncio.create_task(self._reap()))
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        interrupted, self._interrupted = self._interrupted, []
+        for job in interrupted:
+            await self._interrupt(job)
+
+    async def _interrupt(self, job: Job) -> None:
+        """Settle a job cut off by shutdown instead of leaving it reserved."""
+        if not self.queue.persistent:
+            # An in-process queue dies with us; nobody else will ever run it
+            await self._bury(job, "worker shut down")
+            return
+        # Hand it straight back rather than waiting for the lease to lapse
+        await self._release(job, "worker shut down")
+
+    async def _release(self, job: Job, error: str) -> None:
+        try:
+            if not await self.queue.release(job, error):
+                await self._dead(job)
+        except Exception as e:
+            print(f"[Jobs] Release failed for {job.id}: {e}")
+
+    async def _bury(self, job: Job, error: str) -> None:
+        # Make this attempt the last so release() dead-letters the job
+        job.max_attempts = job.attempts
+        await self._release(job, error)
+
+    async def _keep_lease(self, job: Job, worker_id: str) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.lease_seconds / 3))
+            try:
+                await self.queue.extend_lease(job, worker_id)
+            except Exception as e:
+                print(f"[Jobs] Lease renewal failed for {job.id}: {e}")
+
+    async def _dead(self, job: Job) -> None:
+        print(f"[Jobs] Job {job.id} failed after {job.attempts} attempts: {job.last_error}")
+        if self.on_dead:
+            try:
+                await self.on_dead(job)
+            except Exception as e:
+                print(f"[Jobs] on_dead handler error for {job.id}: {e}")
+
+    async def _work(self, worker_id: str) -> None:
+        while not self._stopping:
+            try:
+                job = await self.queue.reserve(worker_id, timeout=1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Jobs] Reserve failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if job is None:
+                continue
+
+            lease = asyncio.create_task(self._keep_lease(job, worker_id))
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                # Shutting down: stop() requeues or fails the job
+                self._interrupted.append(job)
+                raise
+            except JobFailed as e:
+                print(f"[Jobs] Job {job.id} attempt {job.attempts} failed permanently: {e}")
+                await self._bury(job, str(e))
+            except Exception as e:
+                print(f"[Jobs] Job {job.id} attempt {job.attempts} failed: {e}")
+                await self._release(job, str(e))
+            else:
+                try:
+                    await self.queue.ack(job)
+                except Exception as e:
+                    print(f"[Jobs] Ack failed for {job.id}: {e}")
+            finally:
+                lease.cancel()
+
+    async def _reap(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(self.lease_seconds)
+            try:
+                for job in await self.queue.requeue_expired():
+                    await self._dead(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Jobs] Reaper error: {e}")
@@ -0,0 +1,284 @@
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from selectolax.parser import HTMLParser
+
+
+# Context flags inherited down the tree
+IN_FOOTER = 1
+IN_CONTAINER = 2
+IN_ADDRESS_TAG = 4
+
+# Inline elements continue the current line; anything else starts a new one
+INLINE_TAGS = {
+    "a", "abbr", "b", "bdi", "bdo", "cite", "code", "em", "font", "i", "label", "mark", "q", "s",
+    "small", "span", "strong", "sub", "sup", "time", "u", "wbr",
+}
+SKIP_TAGS = {"nav", "form", "button", "select", "svg", "iframe", "noscript"}
+
+# class/id substrings marking a container that holds the company address.
+# Matched by one CSS query in lexbor (case-insensitive) instead of reading
+# every element's attributes in Python.
+CONTAINER_HINTS = ("address", "location", "contact", "office", "hq", "headquarter", "impressum", "imprint")
+CONTAINER_SELECTOR = ", ".join(f"[class*={h}], [id*={h}]" for h in CONTAINER_HINTS + ("footer",))
+# Short labels announcing an address: "Address:", "Headquarters", "Anschrift", "所在地"
+LABEL_REGEX = re.compile(
+    r"^(?:our\s+)?(?:address|head\s*quarters|hq|office|offices|registered office|visit us|find us|location|"
+    r"adresse|anschrift|sitz|dirección|direccion|indirizzo|endereço|所在地|住所|本社)\s*[:：]?\s*",
+    re.I,
+)
+# Separators between items on one footer line ("Acme Inc. · 1 Main St · (555) 123-4567")
+SEGMENT_SPLIT_REGEX = re.compile(r"\s+[·•|｜]\s+")
+SEPARATOR_CHARS = ("·", "•", "|", "｜")
+# Lines after a <br> that are contact or imprint details, not part of the address
+CONTACT_LABEL_REGEX = re.compile(
+    r"^(?:tel|telefon|telephone|phone|fax|e-?mail|mail|web|www|mobile|mob|ceo|managing director|"
+    r"geschäftsführer|geschäftsführung|vorstand|registergericht|amtsgericht|handelsregister|hrb|ust|vat)\b",
+    re.I,
+)
+DIGIT_REGEX = re.compile(r"\d")
+
+# One alternation per signal, matched without re.I (the street/house-number
+# patterns run on the lowercased line; re.I alternations are several times slower)
+POSTAL_REGEX = re.compile(
+    r"\b[A-Z]{2}\s+\d{5}(?:-\d{4})?\b"  # US: CA 94105
+    r"|\b[A-Z]{1,2}\d[A-Z\d]?\s*\d[A-Z]{2}\b"  # UK: EC1M 5PQ
+    r"|\b[A-Z]\d[A-Z]\s?\d[A-Z]\d\b"  # Canada: M5V 2T6
+    r"|〒\s?\d{3}-?\d{4}"  # Japan
+    r"|\b\d{4,5}\s+[A-ZÄÖÜÉ][a-zäöüßéèàç\-]+"  # Continental Europe: 70173 Stuttgart
+    r"|[,\-–]\s*\d{3}\s?\d{3}\b|\b\d{6}\s*,?\s*[Ii]ndia"  # India PIN: Noida - 201301
+)
+STREET_REGEX = re.compile(
+    r"\b(?:street|st\.|road|rd\.|avenue|ave\.|boulevard|blvd|lane|drive|parkway|plaza|suite|floor|sector|"
+    r"block|phase|tower|building|str\.|platz|allee|gasse|rue|via|viale|calle|avenida|rua)\b"
+    r"|(?:straße|strasse|weg)\b|丁目|番地"
+)
+HOUSE_NUMBER_REGEX = re.compile(
+    r"\b\d{1,5}[a-z]?\s+(?:[\w.'-]+\s+){0,3}(?:street|st\.?|road|rd\.?|avenue|ave\.?|boulevard|blvd|lane|"
+    r"drive|parkway|way)\b|(?:straße|strasse|str\.|weg|platz|gasse)\s*\d{1,4}"
+)
+NOISE_REGEX = re.compile(r"©|copyright|all rights reserved|@|https?://|cookie", re.I)
+
+MIN_CHARS = 8
+MAX_CHARS = 250
+# Below this score a line is not offered as a candidate
+MIN_SCORE = 4
+# Score at which a DOM candidate reaches full DOM confidence
+FULL_SCORE = 10
+DOM_MAX_CONFIDENCE = 0.9
+JSON_LD_CONFIDENCE = 0.95
+
+
+@dataclass
+class AddressCandidate:
+    text: str
+    confidence: float
+    source: str  # "json-ld" | "address" | "container" | "footer" | "text"
+
+
+def format_postal_address(item: object) -> Optional[str]:
+    """A schema.org PostalAddress (or plain address string) as one line."""
+    if isinstance(item, str):
+        return item.strip() or None
+    if not isinstance(item, dict):
+        return None
+    country = item.get("addressCountry")
+    if isinstance(country, dict):
+        country = country.get("name")
+    parts = [
+        item.get("streetAddress"),
+        item.get("addressLocality"),
+        item.get("addressRegion"),
+        item.get("postalCode"),
+        country,
+    ]
+    return ", ".join(str(p).strip() for p in parts if p and isinstance(p, (str, int))) or None
+
+
+def _json_ld_addresses(blocks: List[object]) -> List[str]:
+    """PostalAddress objects (or address strings) anywhere in the JSON-LD, formatted as one line."""
+    found: List[str] = []
+    stack = list(blocks)
+    while stack:
+        obj = stack.pop(0)
+        if isinstance(obj, list):
+            stack.extend(obj)
+            continue
+        if not isinstance(obj, dict):
+            continue
+        addr = obj.get("address")
+        for item in addr if isinstance(addr, list) else [addr]:
+            line = format_postal_address(item)
+            if line:
+                found.append(line)
+        stack.extend(v for k, v in obj.items() if k != "address" and isinstance(v, (dict, list)))
+    return found
+
+
+def _flush(buffer: List[str]) -> str:
+    text = "".join(buffer)
+    if "\n" not in text:
+        return " ".join(text.split())
+    # <br>-separated pieces become one comma-separated line, minus phone/email/copyright pieces
+    pieces = (" ".join(piece.split()) for piece in text.split("\n"))
+    return ", ".join(p for p in pieces if p and not CONTACT_LABEL_REGEX.match(p) and not NOISE_REGEX.search(p))
+
+
+def _lines(tree: HTMLParser) -> Iterator[Tuple[str, int]]:
+    """(text, context flags) for every visual line, in document order.
+
+    One traversal: each text node is visited once and appended to the line
+    of its nearest non-inline ancestor; <br> continues the line.
+    """
+    root = tree.body or tree.root
+    if root is None:
+        return
+    containers = set()
+    footers = set()
+    for node in tree.css(CONTAINER_SELECTOR):
+        containers.add(node.mem_id)
+        attrs = node.attributes
+        if "footer" in f"{attrs.get('class') or ''} {attrs.get('id') or ''}".lower():
+            footers.add(node.mem_id)
+    buffer: List[str] = []
+    buffer_owner = None
+    buffer_flags = 0
+    stack = [(root, root.mem_id, 0)]
+    while stack:
+        node, owner, flags = stack.pop()
+        tag = node.tag
+        if tag == "-text":
+            value = node.text_content
+            if not value or value.isspace():
+                continue
+            if owner != buffer_owner:
+                if buffer:
+                    yield _flush(buffer), buffer_flags
+                buffer, buffer_owner, buffer_flags = [], owner, flags
+            buffer.append(value)
+            buffer.append(" ")
+            continue
+        if tag in SKIP_TAGS or tag == "_comment":
+            continue
+        if tag == "br":
+            if owner == buffer_owner and buffer:
+                buffer.append("\n")
+            continue
+        node_id = node.mem_id
+        if tag == "footer" or node_id in footers:
+            flags |= IN_FOOTER
+        if node_id in containers:
+            flags |= IN_CONTAINER
+        if tag == "address":
+            flags |= IN_ADDRESS_TAG
+        if tag not in INLINE_TAGS:
+            owner = node_id
+        # Children pushed last-first so they pop in document order
+        child = node.last_child
+        while child is not None:
+            stack.append((child, owner, flags))
+            child = child.prev
+    if buffer:
+        yield _flush(buffer), buffer_flags
+
+
+def _score(text: str, flags: int, after_label: bool) -> int:
+    lower = text.lower()
+    postal = POSTAL_REGEX.search(text) is not None
+    street = STREET_REGEX.search(lower) is not None
+    if not (postal or street or flags & IN_ADDRESS_TAG):
+        # Context alone doesn't make a line an address
+        return 0
+    score = 0
+    if postal:
+        score += 3
+    if street:
+        score += 2
+        if HOUSE_NUMBER_REGEX.search(lower):
+            score += 2
+    if text.count(",") >= 2:
+        score += 1
+    if flags & IN_ADDRESS_TAG:
+        score += 4
+    if flags & IN_CONTAINER:
+        score += 2
+    if flags & IN_FOOTER:
+        score += 1
+    if after_label:
+        score += 2
+    if NOISE_REGEX.search(text):
+        score -= 3
+    if len(text) > 160:
+        score -= 1
+    return score
+
+
+def _source(flags: int) -> str:
+    if flags & IN_ADDRESS_TAG:
+        return "address"
+    if flags & IN_CONTAINER:
+        return "container"
+    if flags & IN_FOOTER:
+        return "footer"
+    return "text"
+
+
+def locate_addresses(
+    tree: HTMLParser,
+    json_ld: Optional[List[object]] = None,
+    limit: int = 3,
+    stop_at: Optional[float] = DOM_MAX_CONFIDENCE,
+) -> List[AddressCandidate]:
+    """Ranked postal-address candidates for a page, best first.
+
+    A JSON-LD address wins outright (confidence 0.95) and skips the DOM.
+    Otherwise every visual line of the script-free tree is scored once in
+    a single traversal: postal code, street keyword and house-number
+    patterns, plus context (inside <address>, an address/contact/office/
+    footer class or id, a <footer>, or right after an "Address:" label).
+    Footer lines are split on separators ("·", "|") and each piece scored
+    on its own. Scanning stops early at the first candidate reaching
+    stop_at confidence.
+    """
+    if json_ld:
+        found = _json_ld_addresses(json_ld)
+        if found:
+            return [AddressCandidate(text=found[0][:200], confidence=JSON_LD_CONFIDENCE, source="json-ld")]
+
+    candidates: List[Tuple[int, int, AddressCandidate]] = []
+    seen = set()
+    best = 0.0
+    after_label = False
+    for order, (line, flags) in enumerate(_lines(tree)):
+        label = LABEL_REGEX.match(line)
+        if label and label.end() == len(line):
+            # A label on its own ("所在地", "Address:") vouches for the next line
+            after_label = True
+            continue
+        # Inline labels need a colon: "Address: 1 Main St", not "Offices in 12 countries"
+        if label and ":" not in label.group(0) and "：" not in label.group(0):
+            label = None
+        labelled = after_label or bool(label)
+        after_label = False
+        if label:
+            line = line[label.end():]
+        # Addresses carry a house number or postal code; only context can vouch for one without
+        if not (flags or labelled or DIGIT_REGEX.search(line)):
+            continue
+        segments = SEGMENT_SPLIT_REGEX.split(line) if any(c in line for c in SEPARATOR_CHARS) else (line,)
+        for segment in segments:
+            segment = segment.strip(" ,;")
+            if not (MIN_CHARS <= len(segment) <= MAX_CHARS) or segment in seen:
+                continue
+            score = _score(segment, flags, labelled)
+            if score < MIN_SCORE:
+                continue
+            seen.add(segment)
+            confidence = round(min(DOM_MAX_CONFIDENCE, DOM_MAX_CONFIDENCE * score / FULL_SCORE), 2)
+            candidates.append((-score, order, AddressCandidate(segment[:200], confidence, _source(flags))))
+            best = max(best, confidence)
+        if stop_at is not None and best >= stop_at:
+            break
+    candidates.sort(key=lambda c: (c[0], c[1]))
+    return [c for _, _, c in candidates[:limit]]
@@ -1,6 +1,341 @@
-from typing import Optional, Tuple
+import asyncio
+import time
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, Browser, Page, Playwright, Request
+
+from app.core.config import (
+    PLAYWRIGHT_POOL_SIZE,
+    PLAYWRIGHT_MAX_CONCURRENT_PAGES,
+    PLAYWRIGHT_RECYCLE_AFTER_PAGES,
+    PLAYWRIGHT_RENDER_MODE,
+    PLAYWRIGHT_DOM_QUIET_MS,
+    PLAYWRIGHT_READY_CAP_MS,
+)
+from .http_client import get_http_client, pin_host
+
+
+# Fast mode: resource types that never carry text content
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet", "texttrack", "manifest"}
+
+# Fast mode: analytics/ads/tag-manager hosts (matched on the host or any parent domain)
+BLOCKED_HOSTS = {
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "connect.facebook.net", "facebook.net", "analytics.tiktok.com", "snap.licdn.com",
+    "static.ads-twitter.com", "ads-twitter.com", "ct.pinterest.com", "bat.bing.com",
+    "clarity.ms", "hotjar.com", "hotjar.io", "fullstory.com", "mouseflow.com",
+    "segment.com", "segment.io", "mixpanel.com", "amplitude.com", "heap.io", "heapanalytics.com",
+    "js-agent.newrelic.com", "nr-data.net", "optimizely.com", "hs-analytics.net", "hs-ads.net",
+    "adnxs.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "adroll.com",
+    "scorecardresearch.com", "quantserve.com", "mc.yandex.ru", "cdn.mxpnl.com",
+}
+
+# Chromium never resolves a host itself: every request is served by the
+# guarded HTTP client (see _make_route_handler), and anything that escapes
+# routing (websockets, prefetches) fails to resolve instead of reaching the network
+NO_DIRECT_DNS_ARG = "--host-resolver-rules=MAP * ~NOTFOUND"
+# Request headers httpx sets itself; pseudo-headers (":authority") are dropped too
+DROPPED_REQUEST_HEADERS = {"host", "content-length", "connection", "keep-alive", "transfer-encoding", "accept-encoding"}
+# Response headers describing the wire encoding httpx already undid
+DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+# Resolves once the DOM has seen no mutations for quietMs, or capMs has passed
+_DOM_QUIET_JS = """
+([quietMs, capMs]) => new Promise((resolve) => {
+  const start = performance.now();
+  let last = start;
+  const obs = new MutationObserver(() => { last = performance.now(); });
+  obs.observe(document.documentElement || document, {
+    childList: true, subtree: true, attributes: true, characterData: true,
+  });
+  const tick = () => {
+    const now = performance.now();
+    if (now - last >= quietMs) { obs.disconnect(); resolve("dom-quiet"); }
+    else if (now - start >= capMs) { obs.disconnect(); resolve("hard-cap"); }
+    else { setTimeout(tick, 50); }
+  };
+  setTimeout(tick, 50);
+})
+"""
+
+
+@dataclass
+class RenderResult:
+    final_url: str
+    status_code: int
+    html: Optional[str]
+    # Which rule ended the wait: networkidle | dom-quiet | hard-cap | navigated
+    readiness: str
+    blocked_requests: int = 0
+    elapsed_ms: int = 0
+
+
+def _is_blocked_host(host: str) -> bool:
+    parts = host.lower().split(".")
+    return any(".".join(parts[i:]) in BLOCKED_HOSTS for i in range(len(parts) - 1))
+
+
+async def _guarded_fetch(
+    request: Request, user_agent: str, pins: Dict[str, str], max_bytes: int
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Make the browser's request with the scraper's HTTP client.
+
+    Connections go to the IP the SSRF guard vetted (the page's own host is
+    pinned to resolved_ip), so there is no second, unchecked DNS lookup.
+    Redirects are handed back to the browser, which routes the next hop
+    through here again.
+    """
+    headers = {
+        k: v for k, v in (await request.all_headers()).items()
+        if not k.startswith(":") and k.lower() not in DROPPED_REQUEST_HEADERS
+    }
+    hostname = (urlparse(request.url).hostname or "").lower()
+    pinned = pin_host(hostname, pins[hostname]) if hostname in pins else nullcontext()
+    client = get_http_client(user_agent)
+    with pinned:
+        async with client.stream(
+            request.method, request.url, headers=headers, content=request.post_data_buffer, follow_redirects=False
+        ) as resp:
+            body = bytearray()
+            async for chunk in resp.aiter_bytes():
+                body += chunk[: max_bytes - len(body)]
+                if len(body) >= max_bytes:
+                    break
+            response_headers: Dict[str, str] = {}
+            for key, value in resp.headers.multi_items():
+                key = key.lower()
+                if key in DROPPED_RESPONSE_HEADERS:
+                    continue
+                if key in response_headers:
+                    value = response_headers[key] + ("\n" if key == "set-cookie" else ", ") + value
+                response_headers[key] = value
+            return resp.status_code, response_headers, bytes(body)
+
+
+def _make_route_handler(fast: bool, counters: Dict[str, int], user_agent: str, pins: Dict[str, str], max_bytes: int):
+    async def handle(route) -> None:
+        """Serve every request through the guarded HTTP client; in fast mode drop non-content ones first.
+
+        The client refuses private/reserved addresses (also for hosts reached
+        later), so requests it can't make are aborted.
+        """
+        request = route.request
+        parsed = urlparse(request.url)
+        host = parsed.hostname
+        # Documents are never fast-blocked, so analyzing e.g. hotjar.com itself still works
+        if fast and request.resource_type != "document" and (
+            request.resource_type in BLOCKED_RESOURCE_TYPES or (host and _is_blocked_host(host))
+        ):
+            counters["blocked"] += 1
+            await route.abort("blockedbyclient")
+            return
+        if parsed.scheme not in ("http", "https"):
+            # data:, blob: and friends never touch the network
+            await route.continue_()
+            return
+        try:
+            status_code, headers, body = await _guarded_fetch(request, user_agent, pins, max_bytes)
+        except Exception:
+            counters["failed"] += 1
+            try:
+                await route.abort("failed")
+            except Exception:
+                pass  # the page is already gone
+            return
+        try:
+            await route.fulfill(status=status_code, headers=headers, body=body)
+        except Exception:
+            pass
+
+    return handle
+
+
+class _PooledBrowser:
+    __slots__ = ("browser", "active", "pages_served", "retired")
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.active = 0
+        self.pages_served = 0
+        self.retired = False
+
+
+class BrowserPool:
+    """App-lifetime pool of warm Chromium processes.
+
+    Each render gets a fresh, isolated BrowserContext on the least busy
+    browser. Concurrent pages are capped across the pool. A browser is
+    retired after recycle_after_pages renders (it finishes its in-flight
+    pages, then closes) and crashed browsers are relaunched on next use.
+    Browsers are launched with DNS disabled; pages get their network
+    through the guarded HTTP client only.
+    """
+
+    def __init__(
+        self,
+        size: int = PLAYWRIGHT_POOL_SIZE,
+        max_concurrent_pages: int = PLAYWRIGHT_MAX_CONCURRENT_PAGES,
+        recycle_after_pages: int = PLAYWRIGHT_RECYCLE_AFTER_PAGES,
+    ):
+        self.size = max(1, size)
+        self.max_concurrent_pages = max_concurrent_pages
+        self.recycle_after_pages = recycle_after_pages
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._pages = asyncio.Semaphore(max_concurrent_pages)
+        self._lock = asyncio.Lock()
+        self._launched = 0
+        self._crashes = 0
+
+    async def start(self) -> None:
+        self._playwright = await async_playwright().start()
+        for _ in range(self.size):
+            self._browsers.append(await self._launch())
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(headless=True, args=[NO_DIRECT_DNS_ARG])
+        self._launched += 1
+        return _PooledBrowser(browser)
+
+    async def _close_browser(self, pooled: _PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+    async def _checkout(self) -> _PooledBrowser:
+        async with self._lock:
+            for i, pooled in enumerate(self._browsers):
+                if not pooled.browser.is_connected():
+                    print("[Browser] Chromium process died; relaunching")
+                    self._crashes += 1
+                    pooled.retired = True
+                    self._browsers[i] = await self._launch()
+            pooled = min(self._browsers, key=lambda b: b.active)
+            pooled.active += 1
+            pooled.pages_served += 1
+            if pooled.pages_served >= self.recycle_after_pages:
+                # New work goes to a fresh browser; this one closes once drained
+                pooled.retired = True
+                self._browsers[self._browsers.index(pooled)] = await self._launch()
+            return pooled
+
+    async def _checkin(self, pooled: _PooledBrowser) -> None:
+        pooled.active -= 1
+        if pooled.retired and pooled.active == 0:
+            await self._close_browser(pooled)
+
+    @asynccontextmanager
+    async def page(self, user_agent: str) -> AsyncIterator[Page]:
+        async with self._pages:
+            pooled = await self._checkout()
+            context = None
+            try:
+                # Service workers fetch outside page routing; they are not allowed
+                context = await pooled.browser.new_context(user_agent=user_agent, service_workers="block")
+                yield await context.new_page()
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                await self._checkin(pooled)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "browsers": len(self._browsers),
+            "max_concurrent_pages": self.max_concurrent_pages,
+            "active_pages": sum(b.active for b in self._browsers),
+            "pages_served": [b.pages_served for b in self._browsers],
+            "launched_total": self._launched,
+            "crashes": self._crashes,
+        }
+
+    async def close(self) -> None:
+        browsers, self._browsers = self._browsers, []
+        for pooled in browsers:
+            await self._close_browser(pooled)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_pool: Optional[BrowserPool] = None
+
+
+async def init_browser_pool() -> BrowserPool:
+    global _pool
+    pool = BrowserPool()
+    await pool.start()
+    _pool = pool
+    return pool
+
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    return _pool
+
+
+async def shutdown_browser_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+def browser_pool_stats() -> Optional[Dict[str, object]]:
+    return _pool.stats() if _pool else None
+
+
+async def _wait_dom_quiet(page: Page, cap_ms: int) -> str:
+    try:
+        return await page.evaluate(_DOM_QUIET_JS, [PLAYWRIGHT_DOM_QUIET_MS, cap_ms])
+    except Exception:
+        # Client-side redirect destroyed the execution context; settle on the new document
+        await page.wait_for_load_state("domcontentloaded", timeout=max(cap_ms, 1))
+        return "navigated"
+
+
+async def _render(
+    page: Page,
+    url: str,
+    user_agent: str,
+    timeout_seconds: int,
+    max_bytes: int,
+    mode: str,
+    resolved_ip: Optional[str],
+) -> RenderResult:
+    started = time.monotonic()
+    fast = mode == "fast"
+    counters = {"blocked": 0, "failed": 0}
+    hostname = (urlparse(url).hostname or "").lower()
+    pins = {hostname: resolved_ip} if resolved_ip and hostname else {}
+    await page.route("**/*", _make_route_handler(fast, counters, user_agent, pins, max_bytes))
+    if fast:
+        # Ready when the DOM stops changing rather than when the network goes idle
+        resp = await page.goto(url, wait_until="domcontentloaded", timeout=timeout_seconds * 1000)
+        remaining_ms = int(timeout_seconds * 1000 - (time.monotonic() - started) * 1000)
+        readiness = await _wait_dom_quiet(page, max(0, min(PLAYWRIGHT_READY_CAP_MS, remaining_ms)))
+    else:
+        resp = await page.goto(url, wait_until="networkidle", timeout=timeout_seconds * 1000)
+        readiness = "networkidle"
+    final_url = page.url
+    status_code = resp.status if resp else 0
+    html = await page.content()
+    if html and len(html.encode("utf-8")) > max_bytes:
+        html = html.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+    return RenderResult(
+        final_url=final_url,
+        status_code=status_code,
+        html=html,
+        readiness=readiness,
+        blocked_requests=counters["blocked"],
+        elapsed_ms=int((time.monotonic() - started) * 1000),
+    )
 
 
 async def render_page(
@@ -8,21 +343,33 @@ async def render_page(
     user_agent: str,
     timeout_seconds: int = 15,
     max_bytes: int = 10 * 1024 * 1024,
-) -> Tuple[str, int, Optional[str]]:
+    resolved_ip: Optional[str] = None,
+    mode: str = PLAYWRIGHT_RENDER_MODE,
+) -> RenderResult:
+    """Render url in headless Chromium.
+
+    mode="fast" blocks images, fonts, media, stylesheets and known
+    ad/analytics hosts, and treats the page as ready once the DOM has been
+    quiet for PLAYWRIGHT_DOM_QUIET_MS (capped at PLAYWRIGHT_READY_CAP_MS).
+    mode="full" loads everything and waits for networkidle. The rule that
+    ended the wait is reported in RenderResult.readiness.
+
+    Uses the warm browser pool when it is running, else a one-off browser.
+    Either way Chromium does no DNS of its own: every request the page
+    makes is fetched by the guarded HTTP client, with url's host pinned to
+    resolved_ip and every other host checked by the SSRF guard.
+    """
+    pool = get_browser_pool()
+    if pool is not None:
+        async with pool.page(user_agent) as page:
+            return await _render(page, url, user_agent, timeout_seconds, max_bytes, mode, resolved_ip)
+
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent=user_agent)
+        browser = await p.chromium.launch(headless=True, args=[NO_DIRECT_DNS_ARG])
+        context = await browser.new_context(user_agent=user_agent, service_workers="block")
         page = await context.new_page()
         try:
-            resp = await page.goto(url, wait_until="networkidle", timeout=timeout_seconds * 1000)
-            final_url = page.url
-            status_code = resp.status if resp else 0
-            html = await page.content()
-            if html and len(html.encode("utf-8")) > max_bytes:
-                html = html.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
-            return final_url, status_code, html
+            return await _render(page, url, user_agent, timeout_seconds, max_bytes, mode, resolved_ip)
         finally:
             await context.close()
             await browser.close()
-
-
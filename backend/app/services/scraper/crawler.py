@@ -0,0 +1,175 @@
+import asyncio
+import re
+import time
+from typing import Iterable, List, Optional, Set, Tuple, Union
+from urllib.parse import urlparse
+
+from app.core.config import SITEMAP_ENABLED, SITEMAP_TIME_BUDGET_SECONDS
+from .fetcher import FetchResult, fetch_url
+from .link_index import canonicalize_url, site_host
+from .parser import ParsedPage, as_page
+from .robots import is_allowed, wait_for_crawl_slot
+
+
+# Path/anchor keywords that usually lead to contact details, with weights
+LINK_KEYWORDS = (
+    (re.compile(r"contact|kontakt|contacto|contatti|get-in-touch|reach-us", re.I), 10),
+    (re.compile(r"impressum|imprint|legal-notice|mentions-legales", re.I), 9),
+    (re.compile(r"about|ueber-uns|uber-uns|a-propos|quienes-somos|who-we-are", re.I), 7),
+    (re.compile(r"locations?|offices?|find-us|visit-us|address", re.I), 6),
+    (re.compile(r"team|company|leadership|people", re.I), 4),
+    (re.compile(r"pricing|prices|plans", re.I), 3),
+    (re.compile(r"support|help|customer-service", re.I), 2),
+)
+
+SKIP_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".zip", ".gz",
+    ".mp4", ".mp3", ".avi", ".mov", ".css", ".js", ".json", ".xml", ".doc", ".docx",
+    ".xls", ".xlsx", ".ppt", ".pptx",
+)
+
+
+def extract_links(html: Union[str, ParsedPage], base_url: str) -> List[Tuple[str, str]]:
+    """Absolute (url, anchor text) pairs for every <a href> on the page."""
+    page = as_page(html, base_url)
+    if not page.html:
+        return []
+    return page.links
+
+
+def score_link(url: str, anchor_text: str) -> int:
+    path = urlparse(url).path.lower()
+    score = 0
+    for pattern, weight in LINK_KEYWORDS:
+        if pattern.search(path):
+            score = max(score, weight + 1)  # path matches beat anchor-only matches
+        elif anchor_text and pattern.search(anchor_text):
+            score = max(score, weight)
+    # Prefer shallow pages (/contact over /blog/2021/contact-form-tips)
+    depth = len([p for p in path.split("/") if p])
+    return score - max(0, depth - 1)
+
+
+def rank_links(
+    landing_url: str,
+    links: Iterable[Tuple[str, str]],
+    seen: Optional[Set[str]] = None,
+) -> List[str]:
+    """Same-site links ordered by how likely they hold contact/company info.
+
+    Links to other hosts, non-HTML files and anything in seen are skipped;
+    links with no keyword signal are dropped.
+    """
+    seen = set(seen or ())
+    seen.add(canonicalize_url(landing_url))
+    site = site_host(landing_url)
+    scored: List[Tuple[int, int, str]] = []
+    for order, (url, text) in enumerate(links):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or site_host(url) != site:
+            continue
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            continue
+        canonical = canonicalize_url(url)
+        if canonical in seen:
+            continue
+        seen.add(canonical)
+        score = score_link(url, text)
+        if score > 0:
+            scored.append((-score, order, canonical))
+    scored.sort()
+    return [url for _, _, url in scored]
+
+
+async def crawl_related_pages(
+    landing_url: str,
+    landing_html: Union[str, ParsedPage],
+    user_agent: str,
+    timeout_seconds: int,
+    max_redirects: int,
+    max_pages: int,
+    time_budget_seconds: float,
+    concurrency: int,
+    resolved_ip: Optional[str] = None,
+    seen: Optional[Set[str]] = None,
+    links: Optional[List[Tuple[str, str]]] = None,
+) -> List[FetchResult]:
+    """Fetch the top max_pages same-site pages linked from the landing page.
+
+    When the landing page links to fewer than max_pages candidates, the
+    site's sitemaps fill the remaining slots. Pass links when the landing
+    page's (url, anchor text) pairs were already extracted elsewhere.
+
+    Pages are fetched concurrently (at most `concurrency` at once). Whatever
+    has not finished when time_budget_seconds runs out is cancelled, so the
+    crawl never extends an analysis by more than the budget. Pages
+    disallowed by robots.txt are never requested, and fetches to one origin
+    are spaced by its Crawl-delay. Failed or non-HTML pages are left out of
+    the result.
+    """
+    if max_pages <= 0 or not landing_html:
+        return []
+    started = time.monotonic()
+    if links is None:
+        links = extract_links(as_page(landing_html, landing_url), landing_url)
+    candidates = rank_links(landing_url, links, seen)[:max_pages]
+    if len(candidates) < max_pages and SITEMAP_ENABLED:
+        # Imported here: sitemap ranks with this module's link scoring
+        from .sitemap import discover_sitemap_urls
+
+        listed = await discover_sitemap_urls(
+            landing_url,
+            limit=max_pages - len(candidates),
+            time_budget_seconds=min(SITEMAP_TIME_BUDGET_SECONDS, time_budget_seconds / 2),
+            seen=set(seen or ()) | set(candidates),
+        )
+        candidates += listed
+    if not candidates:
+        return []
+
+    landing_host = (urlparse(landing_url).hostname or "").lower()
+    gate = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(url: str) -> Optional[FetchResult]:
+        async with gate:
+            try:
+                if not await is_allowed(url, user_agent):
+                    print(f"[Crawl] {url} disallowed by robots.txt")
+                    return None
+                await wait_for_crawl_slot(url, user_agent)
+            except Exception as e:
+                print(f"[Crawl] robots.txt check for {url} failed: {e}")
+                return None
+            # Same host as the landing page: reuse the IP the guard validated
+            same_host = (urlparse(url).hostname or "").lower() == landing_host
+            try:
+                result = await fetch_url(
+                    url,
+                    user_agent=user_agent,
+                    timeout_seconds=timeout_seconds,
+                    max_redirects=max_redirects,
+                    resolved_ip=resolved_ip if same_host else None,
+                )
+            except Exception as e:
+                print(f"[Crawl] {url} failed: {e}")
+                return None
+            if result.status_code >= 400 or not result.text:
+                return None
+            return result
+
+    tasks = [asyncio.create_task(fetch_one(u)) for u in candidates]
+    remaining = max(0.0, time_budget_seconds - (time.monotonic() - started))
+    done, pending = await asyncio.wait(tasks, timeout=remaining)
+    for t in pending:
+        t.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    # Keep the ranking order in the output
+    pages = [t.result() for t in tasks if t in done and not t.cancelled() and t.exception() is None]
+    pages = [p for p in pages if p]
+    print(
+        f"[Crawl] {landing_url}: {len(pages)}/{len(candidates)} pages in "
+        f"{time.monotonic() - started:.2f}s ({len(pending)} over budget)"
+    )
+    return pages
@@ -1,12 +1,22 @@
 import re
-from typing import Dict, List, Optional
-from selectolax.parser import HTMLParser
-import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 import phonenumbers
 
+from app.core.config import PHONE_DEFAULT_REGION, PHONE_MAX_CANDIDATES
+from .address import AddressCandidate, locate_addresses
+from .parser import ParsedPage, as_page
 
-EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+
+# Domain labels separated by single dots and ending in an alphabetic TLD, so a
+# sentence-final "sales@acme.io." doesn't keep its trailing dot
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+(?:\.[a-zA-Z0-9-]+)*\.[a-zA-Z]{2,}")
+# Addresses that are never a real contact
+EMAIL_PLACEHOLDERS = ("example.com", "test@", "no-reply@")
+# Asset names that look like addresses ("logo@2x.png")
+EMAIL_ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg")
 
 SOCIAL_DOMAINS = {
     "linkedin": ["linkedin.com"],
@@ -17,26 +27,159 @@ SOCIAL_DOMAINS = {
     "tiktok": ["tiktok.com"],
 }
 
+# A digit run that could hold a phone number: optional +/(, digits and separators
+PHONE_CANDIDATE_REGEX = re.compile(r"(?<!\w)(?:\+\s?)?\(?\d[\d\s().\-/]{5,28}\d(?!\w)")
+MIN_PHONE_DIGITS = 7
+# Room for two numbers written back to back ("+1 415 555 0100 / 0101")
+MAX_PHONE_DIGITS = 24
+PHONE_CACHE_SIZE = 4096
+
+# ccTLDs sold as generic domains; they say nothing about the company's country
+GENERIC_CCTLDS = {"io", "co", "ai", "me", "tv", "fm", "ly", "gg", "to", "cc", "ws", "sh", "ac", "vc", "so", "eu"}
+COUNTRY_ALIASES = {"UK": "GB", "EL": "GR"}
+# Languages spoken mainly in one country; others ("en", "es", "fr") don't imply a region
+LANGUAGE_REGIONS = {
+    "ja": "JP", "ko": "KR", "de": "DE", "it": "IT", "nl": "NL", "pl": "PL", "cs": "CZ", "sk": "SK",
+    "hu": "HU", "ro": "RO", "bg": "BG", "el": "GR", "tr": "TR", "he": "IL", "da": "DK", "sv": "SE",
+    "fi": "FI", "nb": "NO", "no": "NO", "is": "IS", "et": "EE", "lv": "LV", "lt": "LT", "sl": "SI",
+    "hr": "HR", "uk": "UA", "th": "TH", "vi": "VN", "id": "ID", "hi": "IN",
+}
 
-def extract_emails(text: str) -> List[str]:
-    candidates = set(m.group(0).lower() for m in EMAIL_REGEX.finditer(text or ""))
-    # Filter obvious placeholders
-    filtered = [e for e in candidates if not any(x in e for x in ("example.com", "test@", "no-reply@"))]
+# Paths of share/intent endpoints rather than profiles
+SOCIAL_SHARE_REGEX = re.compile(r"^https?://[^/]+/(?:intent/|share|sharing/|dialog/|home\?status)", re.I)
+
+# Generic address-looking line: contains commas or keywords like sector/road/street/avenue, etc.
+ADDRESS_LINE_REGEX = re.compile(r"((?:sector|road|street|st\.|ave\.|avenue|block|phase|park|plaza|tower|suite|floor|#)\s*[^\n,]{0,50}(?:,\s*[^\n]+)+)", re.IGNORECASE)
+
+
+def _json_ld_values(page: ParsedPage, key: str) -> List[str]:
+    """String values (or the name of object values) of `key` in the page's JSON-LD, at any depth."""
+    values: List[str] = []
+    stack = list(page.json_ld)
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            value = obj.get(key)
+            if isinstance(value, str):
+                values.append(value)
+            elif isinstance(value, dict) and isinstance(value.get("name"), str):
+                # {"@type": "Country", "name": "GB"}
+                values.append(value["name"])
+            elif isinstance(value, list):
+                values.extend(v for v in value if isinstance(v, str))
+            stack.extend(v for v in obj.values() if isinstance(v, (dict, list)))
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return values
+
+
+def extract_emails(page: Union[str, ParsedPage]) -> List[str]:
+    """Addresses from mailto: links, email attributes, JSON-LD and visible text.
+
+    Scripts, styles and other markup are never scanned, so addresses in
+    minified JS or data URIs don't turn up.
+    """
+    page = as_page(page)
+    if not page.html:
+        return []
+    scan = page.scan
+    sources = page.link_index.emails + scan.emails + _json_ld_values(page, "email") + scan.text
+    candidates = set()
+    for source in sources:
+        # Most text nodes have no "@"; skip them before the regex does any work
+        if "@" not in source:
+            continue
+        for m in EMAIL_REGEX.finditer(source):
+            candidates.add(m.group(0).lower())
+    filtered = [
+        e for e in candidates
+        if not any(x in e for x in EMAIL_PLACEHOLDERS) and not e.endswith(EMAIL_ASSET_SUFFIXES)
+    ]
     return sorted(filtered)
 
 
-def extract_phone_numbers(text: str, default_region: str = "US") -> List[str]:
-    if not text:
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _numbers_in(candidate: str, region: str) -> Tuple[str, ...]:
+    """Valid E.164 numbers in one small candidate string (memoized: footers repeat across pages)."""
+    try:
+        num = phonenumbers.parse(candidate, region)
+        if phonenumbers.is_valid_number(num):
+            return (phonenumbers.format_number(num, phonenumbers.PhoneNumberFormat.E164),)
+    except Exception:
+        pass
+    # Not one number as a whole: two numbers in a row, or one with trailing digits
+    return tuple(
+        phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164)
+        for match in phonenumbers.PhoneNumberMatcher(candidate, region)
+    )
+
+
+def format_phone_number(raw: str, region: str) -> Optional[str]:
+    """First valid number in raw as E.164, or None."""
+    numbers = _numbers_in(raw.strip(), region)
+    return numbers[0] if numbers else None
+
+
+def _region_code(value: Optional[str]) -> Optional[str]:
+    code = (value or "").strip().upper()
+    code = COUNTRY_ALIASES.get(code, code)
+    return code if code in phonenumbers.SUPPORTED_REGIONS else None
+
+
+def infer_phone_region(page: Union[str, ParsedPage]) -> str:
+    """Region for numbers written without a country code.
+
+    Taken from the JSON-LD address country, else the URL's ccTLD (skipping
+    ccTLDs used as generic ones, like .io), else the page language's region
+    ("en-GB") or a language spoken mainly in one country ("ja"), else
+    PHONE_DEFAULT_REGION.
+    """
+    page = as_page(page)
+    for country in _json_ld_values(page, "addressCountry"):
+        region = _region_code(country)
+        if region:
+            return region
+    host = (urlparse(page.url or "").hostname or "").lower()
+    tld = host.rsplit(".", 1)[-1] if "." in host else ""
+    if len(tld) == 2 and tld not in GENERIC_CCTLDS:
+        region = _region_code(tld)
+        if region:
+            return region
+    lang = page.lang or ""
+    if "-" in lang:
+        region = _region_code(lang.split("-")[-1])
+        if region:
+            return region
+    region = LANGUAGE_REGIONS.get(lang.split("-")[0])
+    return region or PHONE_DEFAULT_REGION
+
+
+def extract_phone_numbers(page: Union[str, ParsedPage], default_region: Optional[str] = None) -> List[str]:
+    """E.164 numbers from tel: links, phone attributes, JSON-LD and visible text.
+
+    Text is prefiltered to digit runs that could be a number (7+ digits);
+    only those windows go to libphonenumber, at most PHONE_MAX_CANDIDATES
+    per page. default_region overrides the inferred region.
+    """
+    page = as_page(page)
+    if not page.html:
         return []
+    region = default_region or infer_phone_region(page)
     found: List[str] = []
-    for match in phonenumbers.PhoneNumberMatcher(text, default_region):
-        try:
-            num = phonenumbers.parse(phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164))
-            if phonenumbers.is_valid_number(num):
-                formatted = phonenumbers.format_number(num, phonenumbers.PhoneNumberFormat.E164)
-                found.append(formatted)
-        except Exception:
-            continue
+    # tel: links and marked-up numbers first; they are the numbers the site itself marks as callable
+    for raw in page.link_index.phones + page.scan.phones + _json_ld_values(page, "telephone"):
+        found.extend(_numbers_in(raw.strip(), region))
+    # Visible text only: scanning markup and scripts is slow and yields IDs that look like numbers
+    candidates: Dict[str, None] = {}
+    for chunk in page.scan.text:
+        for m in PHONE_CANDIDATE_REGEX.finditer(chunk):
+            window = " ".join(m.group(0).split())
+            if MIN_PHONE_DIGITS <= sum(c.isdigit() for c in window) <= MAX_PHONE_DIGITS:
+                candidates[window] = None
+        if len(candidates) >= PHONE_MAX_CANDIDATES:
+            break
+    for window in list(candidates)[:PHONE_MAX_CANDIDATES]:
+        found.extend(_numbers_in(window, region))
     # Dedupe while preserving order
     seen = set()
     deduped: List[str] = []
@@ -47,26 +190,22 @@ def extract_phone_numbers(text: str, default_region: str = "US") -> List[str]:
     return deduped
 
 
-def extract_social_links(html: str) -> Dict[str, Optional[str]]:
-    # Simple href scan to avoid full DOM parsing for now
+def extract_social_links(page: Union[str, ParsedPage]) -> Dict[str, Optional[str]]:
+    """First profile link to each platform, looked up in the page's link index.
+
+    Share/intent buttons ("tweet this", "share on LinkedIn") point at the
+    platform but not at the company, so they are skipped.
+    """
     result: Dict[str, Optional[str]] = {k: None for k in SOCIAL_DOMAINS.keys()}
-    if not html:
+    page = as_page(page)
+    if not page.html:
         return result
-    lower = html.lower()
+    index = page.link_index
     for platform, domains in SOCIAL_DOMAINS.items():
         for d in domains:
-            idx = lower.find(d)
-            if idx != -1:
-                # Find start of URL
-                start = lower.rfind("http", 0, idx)
-                if start == -1:
-                    continue
-                # Find end of URL (quote or whitespace)
-                end = idx
-                while end < len(lower) and lower[end] not in ('"', "'", ' ', '\\n', '\\r', '<'):  # crude
-                    end += 1
-                url = html[start:end]
-                result[platform] = url
+            link = next((l for l in index.for_domain(d) if not SOCIAL_SHARE_REGEX.search(l.url)), None)
+            if link:
+                result[platform] = link.url
                 break
     return result
 
@@ -80,9 +219,7 @@ def extract_location(text: str) -> Optional[str]:
     if not text:
         return None
     try:
-        # Generic address-looking line: contains commas or keywords like sector/road/street/avenue, etc.
-        line_regex = re.compile(r"((?:sector|road|street|st\.|ave\.|avenue|block|phase|park|plaza|tower|suite|floor|#)\s*[^\n,]{0,50}(?:,\s*[^\n]+)+)", re.IGNORECASE)
-        m = line_regex.search(text)
+        m = ADDRESS_LINE_REGEX.search(text)
         if m:
             return m.group(1).strip()[:200]
     except Exception:
@@ -90,107 +227,15 @@ def extract_location(text: str) -> Optional[str]:
     return None
 
 
-def extract_dom_location(html: str) -> Optional[str]:
-    """
-    Deterministic address extraction from DOM:
-    - Prefer <address> tags
-    - Search footer for address-like lines
-    - Search elements with class/id indicating address/location/contact/office/hq
-    Returns a concise single-line string if found.
-    """
-    if not html:
-        return None
-    try:
-        tree = HTMLParser(html)
-
-        def clean(text: str) -> str:
-            t = " ".join((text or "").split())
-            return t.strip()
-
-        # 1) JSON-LD schema.org
-        for node in tree.css('script[type="application/ld+json"]'):
-            try:
-                data = json.loads(node.text() or "{}")
-            except Exception:
-                continue
-            def pick_addr(obj) -> Optional[str]:
-                if not isinstance(obj, dict):
-                    return None
-                addr = obj.get("address")
-                if isinstance(addr, dict):
-                    parts = [
-                        addr.get("streetAddress"),
-                        addr.get("addressLocality"),
-                        addr.get("addressRegion"),
-                        addr.get("postalCode"),
-                        addr.get("addressCountry"),
-                    ]
-                    line = ", ".join([p for p in parts if p])
-                    return line or None
-                return None
-            candidate = None
-            if isinstance(data, list):
-                for item in data:
-                    candidate = pick_addr(item) or candidate
-            else:
-                candidate = pick_addr(data)
-            if candidate:
-                return candidate[:200]
-
-        # 2) <address>
-        for node in tree.css("address"):
-            t = clean(node.text())
-            if len(t) >= 6:
-                return t[:200]
-
-        # Helper: check if a node looks like an address by regex
-        def find_address_like(root) -> Optional[str]:
-            # Generic address-looking lines: look for separators/keywords commonly used in addresses
-            line_regex = re.compile(r"((?:sector|road|street|st\.|ave\.|avenue|block|phase|park|plaza|tower|suite|floor|#)\s*[^\n,]{0,50}(?:,\s*[^\n]+)+)", re.IGNORECASE)
-            # Scan text chunks of candidate nodes
-            for node in root.css("p, li, span, div"):
-                t = clean(node.text())
-                if not t:
-                    continue
-                m = line_regex.search(t)
-                if m:
-                    cand = m.group(1).strip()
-                    if 6 <= len(cand) <= 200:
-                        return cand
-            return None
-
-        # 3) Footer section
-        for footer in tree.css("footer"):
-            t = find_address_like(footer)
-            if t:
-                return t
-
-        # 4) Elements with address-like class/id or labels
-        selectors = [
-            "[class*='address']",
-            "[id*='address']",
-            "[class*='location']",
-            "[id*='location']",
-            "[class*='contact']",
-            "[id*='contact']",
-            "[class*='office']",
-            "[id*='office']",
-            "[class*='hq']",
-            "[id*='hq']",
-            "[class*='footer']",
-            "[id*='footer']",
-        ]
-        for sel in selectors:
-            for node in tree.css(sel):
-                t = find_address_like(node)
-                if t:
-                    return t
-                # Fallback to raw text if moderately long and not just links
-                raw = clean(node.text())
-                if raw and 6 <= len(raw) <= 200:
-                    return raw
-    except Exception:
-        return None
-    return None
+def extract_address_candidates(page: Union[str, ParsedPage], limit: int = 3) -> List[AddressCandidate]:
+    """Ranked address candidates with confidence (see address.locate_addresses)."""
+    page = as_page(page)
+    if not page.html:
+        return []
+    return locate_addresses(page.dom, page.json_ld, limit=limit)
 
 
+def extract_dom_location(page: Union[str, ParsedPage]) -> Optional[str]:
+    """Best address found in the page's JSON-LD or DOM, as one line."""
+    candidates = extract_address_candidates(page, limit=1)
+    return candidates[0].text if candidates else None
@@ -0,0 +1,266 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.core.config import (
+    EXTRACTION_POOL,
+    EXTRACTION_WORKERS,
+    EXTRACTION_TIMEOUT_SECONDS,
+)
+from .extract_contact import (
+    extract_address_candidates,
+    extract_emails,
+    extract_phone_numbers,
+    extract_social_links,
+)
+from .parser import ParsedPage, as_page
+from .spa import SpaScore, score_spa_shell
+from .structured_data import StructuredData, extract_structured_data
+
+
+@dataclass
+class PageExtraction:
+    """Everything the analysis needs from one page's HTML; small and picklable."""
+
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+    socials: Dict[str, Optional[str]] = field(default_factory=dict)
+    dom_location: Optional[str] = None
+    # 0-1; JSON-LD addresses are 0.95, DOM candidates at most 0.9
+    dom_location_confidence: float = 0.0
+    # Where the address candidate came from: "json-ld" | "address" | "container" | "footer" | "text"
+    dom_location_source: Optional[str] = None
+    # Company/contact fields published as JSON-LD, microdata or OpenGraph
+    structured: StructuredData = field(default_factory=StructuredData)
+    main_text: Optional[str] = None
+    # Bytes the pre-minimizer stripped before parsing, per category (script, style, svg, ...)
+    minimized_bytes: Dict[str, int] = field(default_factory=dict)
+    # Same-site (url, anchor text) pairs; only filled when asked for (crawl)
+    links: List[Tuple[str, str]] = field(default_factory=list)
+    # How strongly the HTML looks like a client-rendered shell; only filled when asked for
+    spa: Optional[SpaScore] = None
+    elapsed_ms: int = 0
+    error: Optional[str] = None
+
+
+def extract_page_data(
+    page: ParsedPage, include_main_text: bool = True, include_links: bool = False, include_spa: bool = False
+) -> PageExtraction:
+    """Run every extractor over one ParsedPage (CPU-bound; no I/O)."""
+    started = time.perf_counter()
+    result = PageExtraction()
+    if include_spa:
+        result.spa = score_spa_shell(page)
+    if not page.html:
+        return result
+    result.minimized_bytes = dict(page.minimized.removed)
+    result.title, result.meta_description = page.title_and_meta
+    result.emails = extract_emails(page)
+    result.phones = extract_phone_numbers(page)
+    result.socials = extract_social_links(page)
+    try:
+        candidates = extract_address_candidates(page, limit=1)
+    except Exception:
+        candidates = []
+    if candidates:
+        result.dom_location = candidates[0].text
+        result.dom_location_confidence = candidates[0].confidence
+        result.dom_location_source = candidates[0].source
+    try:
+        result.structured = extract_structured_data(page)
+    except Exception as e:
+        print(f"[Extract] Structured data error: {e}")
+    if include_main_text:
+        result.main_text = page.main_text
+    if include_links:
+        index = page.link_index
+        # Only navigation is needed for the crawl; keep the payload from the worker small
+        result.links = [(l.url, l.text) for l in (index.same_site if index.site_domain else index.links)]
+    result.elapsed_ms = int((time.perf_counter() - started) * 1000)
+    return result
+
+
+def _extract_bytes(
+    html: bytes, url: Optional[str], include_main_text: bool, include_links: bool, include_spa: bool = False
+) -> PageExtraction:
+    # Worker entry point: UTF-8 bytes in, PageExtraction out
+    page = ParsedPage(html.decode("utf-8", errors="replace"), url)
+    return extract_page_data(page, include_main_text, include_links, include_spa)
+
+
+_WARM_UP_HTML = (
+    b"<html><head><title>Warm up</title><meta name='description' content='x'></head>"
+    b"<body><article><p>Call +1 415 555 0132 or mail hello@example.org. 1 Main Street, Suite 2, Springfield.</p>"
+    b"</article><footer><a href='https://www.linkedin.com/company/x'>in</a></footer></body></html>"
+)
+
+
+def _warm_up() -> int:
+    # Import and exercise every extractor once so the first real page doesn't pay
+    # for readability/lxml/phonenumbers metadata loading
+    _extract_bytes(_WARM_UP_HTML, "https://example.org/", True, True)
+    return os.getpid()
+
+
+class ExtractionPool:
+    """Runs page extraction off the event loop.
+
+    kind="process" uses a spawn-based ProcessPoolExecutor so extraction uses
+    every core; kind="thread" uses a ThreadPoolExecutor (no pickling, but
+    shares the GIL); kind="inline" runs on the event loop as before. Each
+    task is bounded by timeout_seconds. A process pool is rebuilt after a
+    timeout, since a stuck worker can't be cancelled any other way.
+    """
+
+    def __init__(
+        self,
+        kind: str = EXTRACTION_POOL,
+        workers: int = EXTRACTION_WORKERS,
+        timeout_seconds: float = EXTRACTION_TIMEOUT_SECONDS,
+    ):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.timeout_seconds = timeout_seconds
+        self._executor: Optional[Executor] = None
+        self._tasks = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._restarts = 0
+
+    def _create_executor(self) -> Optional[Executor]:
+        if self.kind == "process":
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        if self.kind == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract")
+        return None
+
+    async def start(self, warm_up: bool = True) -> None:
+        self._executor = self._create_executor()
+        if warm_up and self._executor is not None:
+            await self.warm_up()
+
+    async def warm_up(self) -> None:
+        """Start every worker and load the extraction libraries in it."""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _warm_up) for _ in range(self.workers)))
+        print(f"[Extract] {self.workers} {self.kind} workers warm in {time.monotonic() - started:.2f}s")
+
+    def _restart(self) -> None:
+        executor, self._executor = self._executor, self._create_executor()
+        self._restarts += 1
+        if isinstance(executor, ProcessPoolExecutor):
+            # terminate() is the only way to stop a worker stuck inside a C extension
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def extract(
+        self,
+        html: Union[str, ParsedPage],
+        url: Optional[str] = None,
+        include_main_text: bool = True,
+        include_links: bool = False,
+        include_spa: bool = False,
+    ) -> PageExtraction:
+        self._tasks += 1
+        if self._executor is None:
+            return extract_page_data(as_page(html, url), include_main_text, include_links, include_spa)
+        # A parsed page ships already minimized; its stripped-bytes report stays with it
+        source = html.html if isinstance(html, ParsedPage) else (html or "")
+        payload = source.encode("utf-8")
+        loop = asyncio.get_running_loop()
+        for attempt in (1, 2):
+            executor = self._executor
+            future = loop.run_in_executor(
+                executor, _extract_bytes, payload, url, include_main_text, include_links, include_spa
+            )
+            try:
+                result = await asyncio.wait_for(future, timeout=self.timeout_seconds)
+                if isinstance(html, ParsedPage):
+                    result.minimized_bytes = dict(html.minimized.removed)
+                return result
+            except asyncio.TimeoutError:
+                self._timeouts += 1
+                print(f"[Extract] {url} exceeded {self.timeout_seconds}s")
+                if self.kind == "process" and executor is self._executor:
+                    self._restart()
+                return PageExtraction(error="timeout")
+            except BrokenProcessPool:
+                # Another task's timeout restarted the pool under us; try once more
+                if executor is self._executor:
+                    self._restart()
+                if attempt == 2:
+                    self._failures += 1
+                    return PageExtraction(error="worker pool failed")
+            except Exception as e:
+                self._failures += 1
+                print(f"[Extract] {url} failed: {e}")
+                return PageExtraction(error=str(e))
+        return PageExtraction(error="worker pool failed")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "kind": self.kind if self._executor is not None else "inline",
+            "workers": self.workers if self._executor is not None else 0,
+            "tasks": self._tasks,
+            "timeouts": self._timeouts,
+            "failures": self._failures,
+            "restarts": self._restarts,
+        }
+
+    async def close(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+
+_pool: Optional[ExtractionPool] = None
+
+
+async def init_extraction_pool() -> ExtractionPool:
+    global _pool
+    pool = ExtractionPool()
+    await pool.start()
+    _pool = pool
+    return pool
+
+
+def get_extraction_pool() -> Optional[ExtractionPool]:
+    return _pool
+
+
+async def shutdown_extraction_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+def extraction_pool_stats() -> Optional[Dict[str, object]]:
+    return _pool.stats() if _pool else None
+
+
+async def extract_page(
+    html: Union[str, ParsedPage],
+    url: Optional[str] = None,
+    include_main_text: bool = True,
+    include_links: bool = False,
+    include_spa: bool = False,
+) -> PageExtraction:
+    """Extract title/meta, contacts, location, main text (and links, SPA score) from a page.
+
+    Runs in the extraction pool when one is started, otherwise inline.
+    """
+    pool = get_extraction_pool()
+    if pool is None:
+        return extract_page_data(as_page(html, url), include_main_text, include_links, include_spa)
+    return await pool.extract(html, url, include_main_text, include_links, include_spa)
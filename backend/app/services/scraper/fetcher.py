@@ -1,6 +1,86 @@
-from typing import Optional, Tuple
+import codecs
+import hashlib
+import re
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
 
-import httpx
+from .http_client import get_http_client, pin_host
+
+
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+# How many leading bytes to inspect for a <meta charset> declaration (HTML spec uses 1024)
+CHARSET_SNIFF_BYTES = 1024
+
+_META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-:.]+)""", re.IGNORECASE
+)
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass
+class FetchResult:
+    final_url: str
+    status_code: int
+    text: Optional[str]
+    content_type: Optional[str] = None
+    encoding: Optional[str] = None
+    bytes_read: int = 0
+    truncated: bool = False
+    # Set when the body was deliberately not downloaded (e.g. "content-type")
+    skipped_reason: Optional[str] = None
+    # Cache validators for conditional re-fetches
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+def _media_type(content_type: Optional[str]) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def _charset_from_header(content_type: Optional[str]) -> Optional[str]:
+    for param in (content_type or "").split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip("\"'")
+    return None
+
+
+def _known_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_encoding(head: bytes, content_type: Optional[str]) -> str:
+    """Pick a decoder: BOM, then HTTP header charset, then <meta charset>, else UTF-8."""
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    enc = _known_codec(_charset_from_header(content_type))
+    if enc:
+        return enc
+    m = _META_CHARSET_RE.search(head[:CHARSET_SNIFF_BYTES])
+    if m:
+        enc = _known_codec(m.group(1).decode("ascii", errors="ignore"))
+        if enc:
+            return enc
+    return "utf-8"
 
 
 async def fetch_url(
@@ -9,37 +89,81 @@ async def fetch_url(
     timeout_seconds: int,
     max_redirects: int,
     max_bytes: int = 10 * 1024 * 1024,
-) -> Tuple[str, int, Optional[str]]:
-    """Fetch URL with sane defaults. Returns (final_url, status_code, text or None).
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    resolved_ip: Optional[str] = None,
+) -> FetchResult:
+    """Fetch URL with sane defaults using the process-wide pooled client.
+
+    The body is streamed and reading stops once max_bytes (after content
+    decoding) have been consumed. Non-HTML responses are abandoned as soon as
+    the headers arrive. The text is decoded incrementally in a single pass
+    using the BOM, header charset or <meta charset>, whichever is found first.
+
+    When etag/last_modified from a previous fetch are given, the request is
+    made conditional; a 304 comes back with text=None and not_modified=True.
+    content_hash is the SHA-256 of the decoded body bytes that were read.
 
-    Caps response body to max_bytes to avoid huge downloads.
+    resolved_ip (from validate_url_and_resolve_async) pins the connection to
+    the address the SSRF guard already checked.
     """
-    headers = {
-        "User-Agent": user_agent,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Accept-Encoding": "gzip, br",
-        "Connection": "keep-alive",
-    }
-
-    limits = httpx.Limits(max_redirects=max_redirects)
-    timeout = httpx.Timeout(timeout_seconds)
-
-    async with httpx.AsyncClient(
-        headers=headers,
-        http2=True,
-        follow_redirects=True,
-        limits=limits,
-        timeout=timeout,
-    ) as client:
-        resp = await client.get(url)
-        final_url = str(resp.url)
-        status_code = resp.status_code
-        content = resp.content[:max_bytes]
-        try:
-            text = content.decode(resp.encoding or "utf-8", errors="replace")
-        except Exception:
-            text = None
-        return final_url, status_code, text
+    client = get_http_client(user_agent, timeout_seconds, max_redirects)
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    hostname = urlparse(url).hostname
+    pinned = pin_host(hostname, resolved_ip) if resolved_ip and hostname else nullcontext()
+    with pinned:
+        return await _stream_body(client, url, headers, max_bytes)
+
+
+async def _stream_body(client, url: str, headers: dict, max_bytes: int) -> FetchResult:
+    async with client.stream("GET", url, headers=headers or None) as resp:
+        result = FetchResult(
+            final_url=str(resp.url),
+            status_code=resp.status_code,
+            text=None,
+            content_type=resp.headers.get("content-type"),
+            etag=resp.headers.get("etag"),
+            last_modified=resp.headers.get("last-modified"),
+        )
+        if result.not_modified:
+            return result
+        media_type = _media_type(result.content_type)
+        if media_type and media_type not in HTML_CONTENT_TYPES:
+            result.skipped_reason = "content-type"
+            return result
 
+        digest = hashlib.sha256()
+        head = b""
+        decoder = None
+        parts = []
+        async for chunk in resp.aiter_bytes():
+            remaining = max_bytes - result.bytes_read
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+                result.truncated = True
+            result.bytes_read += len(chunk)
+            digest.update(chunk)
+            if decoder is None:
+                head += chunk
+                if len(head) < CHARSET_SNIFF_BYTES and not result.truncated:
+                    continue
+                result.encoding = sniff_encoding(head, result.content_type)
+                decoder = codecs.getincrementaldecoder(result.encoding)(errors="replace")
+                chunk, head = head, b""
+            parts.append(decoder.decode(chunk))
+            if result.truncated:
+                break
 
+        if decoder is None:
+            # Short body: everything is still in the sniff buffer
+            result.encoding = sniff_encoding(head, result.content_type)
+            decoder = codecs.getincrementaldecoder(result.encoding)(errors="replace")
+            parts.append(decoder.decode(head))
+        parts.append(decoder.decode(b"", final=True))
+        result.text = "".join(parts)
+        result.content_hash = digest.hexdigest()
+        return result
@@ -1,10 +1,19 @@
+import asyncio
 import ipaddress
 import socket
+import time
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from fastapi import HTTPException, status
 
-from app.core.config import ALLOWED_SCHEMES, DISALLOW_PRIVATE_IPS
+from app.core.config import (
+    ALLOWED_SCHEMES,
+    DISALLOW_PRIVATE_IPS,
+    DNS_CACHE_TTL_SECONDS,
+    DNS_NEGATIVE_TTL_SECONDS,
+    DNS_CACHE_MAX_ENTRIES,
+)
 
 
 def _is_private_or_reserved_ip(ip_str: str) -> bool:
@@ -22,12 +31,106 @@ def _is_private_or_reserved_ip(ip_str: str) -> bool:
         return True
 
 
-def validate_url_and_resolve(target_url: str) -> tuple[str, str]:
-    """Validate scheme and resolve hostname; optionally block private IPs.
+class HostResolutionError(Exception):
+    pass
 
-    Returns a tuple of (normalized_url, resolved_ip).
-    Raises HTTPException 400/403 on invalid or disallowed targets.
+
+# hostname -> (expires_at, ips); ips is None for a cached NXDOMAIN
+_dns_cache: Dict[str, Tuple[float, Optional[List[str]]]] = {}
+# Concurrent lookups of the same host share one getaddrinfo call
+_dns_inflight: Dict[str, "asyncio.Future[Optional[List[str]]]"] = {}
+
+
+def _cache_put(hostname: str, ips: Optional[List[str]], ttl: float) -> None:
+    if len(_dns_cache) >= DNS_CACHE_MAX_ENTRIES:
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in _dns_cache.items() if exp <= now]:
+            del _dns_cache[key]
+        # Still full: drop the oldest insertions
+        while len(_dns_cache) >= DNS_CACHE_MAX_ENTRIES:
+            del _dns_cache[next(iter(_dns_cache))]
+    _dns_cache[hostname] = (time.monotonic() + ttl, ips)
+
+
+async def _lookup(hostname: str) -> Optional[List[str]]:
+    loop = asyncio.get_running_loop()
+    try:
+        # loop.getaddrinfo runs in the default executor, so the event loop never blocks
+        addr_info = await loop.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        if e.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+            return None
+        raise HostResolutionError(str(e)) from e
+    ips: List[str] = []
+    for family, _, _, _, sockaddr in addr_info:
+        if family in (socket.AF_INET, socket.AF_INET6) and sockaddr[0] not in ips:
+            ips.append(sockaddr[0])
+    # Prefer IPv4; fall back to IPv6
+    ips.sort(key=lambda ip: ":" in ip)
+    return ips or None
+
+
+async def _lookup_and_cache(hostname: str) -> Optional[List[str]]:
+    ips = await _lookup(hostname)
+    _cache_put(hostname, ips, DNS_CACHE_TTL_SECONDS if ips else DNS_NEGATIVE_TTL_SECONDS)
+    return ips
+
+
+def _lookup_done(hostname: str, task: "asyncio.Future[Optional[List[str]]]") -> None:
+    if _dns_inflight.get(hostname) is task:
+        del _dns_inflight[hostname]
+    if not task.cancelled():
+        # Mark retrieved so a lookup whose callers all gave up doesn't log a warning
+        task.exception()
+
+
+async def resolve_host(hostname: str) -> List[str]:
+    """Resolve hostname without blocking the event loop, with a TTL cache.
+
+    NXDOMAIN answers are cached for DNS_NEGATIVE_TTL_SECONDS. The system
+    resolver does not expose record TTLs, so positive answers are kept for
+    DNS_CACHE_TTL_SECONDS. Raises HostResolutionError if nothing resolves.
+    """
+    hostname = (hostname or "").lower().rstrip(".")
+    if not hostname:
+        raise HostResolutionError("Empty hostname")
+    try:
+        ipaddress.ip_address(hostname)
+        return [hostname]
+    except ValueError:
+        pass
+
+    cached = _dns_cache.get(hostname)
+    if cached and cached[0] > time.monotonic():
+        ips = cached[1]
+    else:
+        pending = _dns_inflight.get(hostname)
+        if pending is None:
+            # The lookup runs as its own task: a caller that is cancelled (a timeout,
+            # a cancelled hedge) stops waiting without failing the others
+            pending = asyncio.ensure_future(_lookup_and_cache(hostname))
+            _dns_inflight[hostname] = pending
+            pending.add_done_callback(lambda task: _lookup_done(hostname, task))
+        ips = await asyncio.shield(pending)
+    if not ips:
+        raise HostResolutionError(f"Could not resolve {hostname}")
+    return ips
+
+
+async def resolve_public_ip(hostname: str) -> str:
+    """Resolve hostname and return the IP to connect to.
+
+    With DISALLOW_PRIVATE_IPS every returned address must be public, so a
+    record set mixing public and internal addresses is rejected as a whole.
+    Raises HostResolutionError on failure and PermissionError when blocked.
     """
+    ips = await resolve_host(hostname)
+    if DISALLOW_PRIVATE_IPS and any(_is_private_or_reserved_ip(ip) for ip in ips):
+        raise PermissionError(f"{hostname} resolves to a private/reserved IP")
+    return ips[0]
+
+
+def _validate_scheme_and_host(target_url: str):
     parsed = urlparse(target_url)
     if parsed.scheme.lower() not in ALLOWED_SCHEMES:
         raise HTTPException(
@@ -36,6 +139,38 @@ def validate_url_and_resolve(target_url: str) -> tuple[str, str]:
         )
     if not parsed.netloc:
         raise HTTPException(status_code=400, detail="URL must include hostname")
+    return parsed
+
+
+async def validate_url_and_resolve_async(target_url: str) -> tuple[str, str]:
+    """Async variant of validate_url_and_resolve backed by the DNS cache.
+
+    Returns a tuple of (normalized_url, resolved_ip). Pass resolved_ip on to
+    fetch_url / render_page so the connection goes to the address that was
+    validated here (no second lookup, no DNS rebinding window).
+    Raises HTTPException 400/403 on invalid or disallowed targets.
+    """
+    parsed = _validate_scheme_and_host(target_url)
+    try:
+        ip = await resolve_public_ip(parsed.hostname)
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Access to private/reserved IPs is disallowed")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not resolve target host")
+
+    # Normalize URL (strip fragments)
+    normalized = parsed._replace(fragment="").geturl()
+    return normalized, ip
+
+
+def validate_url_and_resolve(target_url: str) -> tuple[str, str]:
+    """Validate scheme and resolve hostname; optionally block private IPs.
+
+    Blocking; async code should use validate_url_and_resolve_async.
+    Returns a tuple of (normalized_url, resolved_ip).
+    Raises HTTPException 400/403 on invalid or disallowed targets.
+    """
+    parsed = _validate_scheme_and_host(target_url)
 
     hostname = parsed.hostname
     try:
@@ -53,5 +188,3 @@ def validate_url_and_resolve(target_url: str) -> tuple[str, str]:
     # Normalize URL (strip fragments)
     normalized = parsed._replace(fragment="").geturl()
     return normalized, ip
-
-
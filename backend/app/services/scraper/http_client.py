@@ -0,0 +1,221 @@
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpcore
+import httpx
+
+from app.core.config import (
+    SCRAPER_TIMEOUT_SECONDS,
+    SCRAPER_MAX_REDIRECTS,
+    SCRAPER_USER_AGENT,
+    SCRAPER_MAX_CONNECTIONS,
+    SCRAPER_MAX_CONNECTIONS_PER_HOST,
+    SCRAPER_KEEPALIVE_EXPIRY_SECONDS,
+)
+from .guard import resolve_public_ip
+
+
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, br",
+    "Connection": "keep-alive",
+}
+
+
+# hostname -> IP already validated by the SSRF guard for the current request
+_pinned_hosts: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("pinned_hosts", default={})
+
+
+@contextmanager
+def pin_host(hostname: str, ip: str) -> Iterator[None]:
+    """Make new connections to hostname (in this task) go to ip without re-resolving."""
+    pins = dict(_pinned_hosts.get())
+    pins[hostname.lower()] = ip
+    token = _pinned_hosts.set(pins)
+    try:
+        yield
+    finally:
+        _pinned_hosts.reset(token)
+
+
+class _GuardedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """Resolve hosts through the guard's DNS cache and connect to the vetted IP.
+
+    TLS SNI and the Host header still use the hostname; only the TCP connect
+    target is replaced. Hosts reached via redirects go through the same
+    private-IP check as the initial URL.
+    """
+
+    def __init__(self, inner: httpcore.AsyncNetworkBackend):
+        self._inner = inner
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        ip = _pinned_hosts.get().get(host.lower())
+        if ip is None:
+            try:
+                ip = await asyncio.wait_for(resolve_public_ip(host), timeout)
+            except PermissionError as e:
+                raise httpcore.ConnectError(str(e))
+            except asyncio.TimeoutError:
+                raise httpcore.ConnectTimeout(f"Timed out resolving {host}")
+            except Exception as e:
+                raise httpcore.ConnectError(f"Could not resolve {host}: {e}")
+        return await self._inner.connect_tcp(
+            ip, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._inner.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self._inner.sleep(seconds)
+
+
+class _HostSlot:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class ScraperHttpClient:
+    """Long-lived httpx client shared by all scraper fetches.
+
+    Keeps TLS sessions and HTTP/2 connections alive between analyses and caps
+    concurrent requests both in total (pool size) and per host.
+    """
+
+    def __init__(
+        self,
+        user_agent: str,
+        timeout_seconds: int,
+        max_redirects: int,
+        max_connections: int = SCRAPER_MAX_CONNECTIONS,
+        max_connections_per_host: int = SCRAPER_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry: float = SCRAPER_KEEPALIVE_EXPIRY_SECONDS,
+    ):
+        self.user_agent = user_agent
+        self.timeout_seconds = timeout_seconds
+        self.max_redirects = max_redirects
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._transport = httpx.AsyncHTTPTransport(http2=True, limits=limits)
+        # httpx has no public hook for the network backend; wrap the pool's own
+        pool = self._transport._pool
+        pool._network_backend = _GuardedNetworkBackend(pool._network_backend)
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": user_agent, **DEFAULT_HEADERS},
+            follow_redirects=True,
+            max_redirects=max_redirects,
+            timeout=httpx.Timeout(timeout_seconds),
+            transport=self._transport,
+        )
+        self._hosts: Dict[str, _HostSlot] = {}
+        self._requests_total = 0
+        self._in_flight = 0
+
+    @asynccontextmanager
+    async def host_slot(self, url: str) -> AsyncIterator[None]:
+        """Hold one of the per-host request slots for the duration of the block."""
+        host = (urlparse(url).hostname or "").lower()
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = _HostSlot(self.max_connections_per_host)
+            self._hosts[host] = slot
+        slot.users += 1
+        try:
+            async with slot.semaphore:
+                self._in_flight += 1
+                self._requests_total += 1
+                try:
+                    yield
+                finally:
+                    self._in_flight -= 1
+        finally:
+            slot.users -= 1
+            # Drop idle slots so the map doesn't grow with every host ever seen
+            if slot.users == 0 and self._hosts.get(host) is slot:
+                del self._hosts[host]
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        follow_redirects: bool = True,
+    ) -> AsyncIterator[httpx.Response]:
+        async with self.host_slot(url):
+            async with self.client.stream(
+                method, url, headers=headers, content=content, follow_redirects=follow_redirects
+            ) as resp:
+                yield resp
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        async with self.host_slot(url):
+            return await self.client.get(url, headers=headers)
+
+    def stats(self) -> Dict[str, object]:
+        connections = list(self._transport._pool.connections)
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "user_agent": self.user_agent,
+            "timeout_seconds": self.timeout_seconds,
+            "max_connections": self.max_connections,
+            "max_connections_per_host": self.max_connections_per_host,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "in_flight_requests": self._in_flight,
+            "requests_total": self._requests_total,
+            "busy_hosts": {h: s.users for h, s in self._hosts.items()},
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# One client per distinct settings tuple; in practice a single default client
+_clients: Dict[Tuple[str, int, int], ScraperHttpClient] = {}
+
+
+def get_http_client(
+    user_agent: str = SCRAPER_USER_AGENT,
+    timeout_seconds: int = SCRAPER_TIMEOUT_SECONDS,
+    max_redirects: int = SCRAPER_MAX_REDIRECTS,
+) -> ScraperHttpClient:
+    key = (user_agent, timeout_seconds, max_redirects)
+    client = _clients.get(key)
+    if client is None:
+        client = ScraperHttpClient(user_agent, timeout_seconds, max_redirects)
+        _clients[key] = client
+    return client
+
+
+async def init_http_clients() -> ScraperHttpClient:
+    return get_http_client()
+
+
+async def shutdown_http_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+def http_pool_stats() -> List[Dict[str, object]]:
+    return [c.stats() for c in _clients.values()]
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import ParseResult, parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+
+# Query parameters that only identify a campaign/click, never the page
+TRACKING_PARAMS = {
+    "gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "twclid", "ttclid", "li_fat_id",
+    "igshid", "igsh", "si", "mc_cid", "mc_eid", "mkt_tok", "_ga", "_gl", "_hsenc", "_hsmi",
+    "hsctatracking", "ref_src", "ref_url", "trk", "trkinfo", "spm",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_", "vero_")
+
+# Second-level labels under which registrations happen (co.uk, com.au, ...).
+# A short list instead of the full Public Suffix List: enough to group links
+# by site without shipping or fetching the PSL.
+_GENERIC_SLDS = {"co", "com", "net", "org", "gov", "edu", "ac", "or", "ne", "go", "gob", "nic", "ltd", "plc"}
+_SKIP_SCHEMES = ("#", "javascript:", "data:", "about:", "blob:")
+
+
+@dataclass
+class Link:
+    url: str  # canonical absolute URL
+    text: str  # anchor text, whitespace-normalized
+    domain: str  # registrable domain of the host
+
+
+@dataclass
+class LinkIndex:
+    """A page's outbound links, canonicalized once and indexed by registrable domain."""
+
+    site_domain: str = ""
+    links: List[Link] = field(default_factory=list)
+    by_domain: Dict[str, List[Link]] = field(default_factory=dict)
+    # mailto:/tel: targets, in document order
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+
+    def for_domain(self, domain: str) -> List[Link]:
+        return self.by_domain.get(domain, [])
+
+    @property
+    def same_site(self) -> List[Link]:
+        """Links to the page's own registrable domain (navigation)."""
+        return self.for_domain(self.site_domain) if self.site_domain else []
+
+
+def registrable_domain(host: Optional[str]) -> str:
+    """example.com for www.example.com / shop.example.com; example.co.uk for a.example.co.uk."""
+    host = (host or "").lower().rstrip(".")
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    if len(labels[-1]) == 2 and labels[-2] in _GENERIC_SLDS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _canonical_from_parsed(parsed: ParseResult) -> str:
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parsed.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    query = parsed.query
+    if query:
+        pairs = parse_qsl(query, keep_blank_values=True)
+        kept = [(k, v) for k, v in pairs if not _is_tracking(k)]
+        if len(kept) != len(pairs):
+            query = urlencode(kept)
+    return urlunparse((scheme, netloc, path, "", query, ""))
+
+
+def canonicalize_url(url: str) -> str:
+    """Lowercase scheme/host, drop default ports, fragments, tracking params and trailing slashes."""
+    return _canonical_from_parsed(urlparse(url))
+
+
+def site_host(url: str) -> str:
+    """Lowercased host without a leading "www.", so www.example.com and example.com match."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def build_link_index(anchors: Iterable[Tuple[str, str]], base_url: Optional[str]) -> LinkIndex:
+    """Resolve (href, anchor text) pairs against base_url and index them.
+
+    mailto:/tel: targets are kept separately; fragments, javascript: and
+    data: links are dropped. Each URL appears once, at its first position.
+    """
+    base = base_url or ""
+    base_parsed = urlparse(base)
+    index = LinkIndex(site_domain=registrable_domain(base_parsed.hostname))
+    origin = f"{base_parsed.scheme}://{base_parsed.netloc}" if base_parsed.scheme and base_parsed.netloc else ""
+    seen = set()
+    seen_hrefs = set()
+    for href, text in anchors:
+        # Listing pages repeat the same href (image + title + "more"); resolve each once
+        if href in seen_hrefs:
+            continue
+        seen_hrefs.add(href)
+        lowered = href[:11].lower()
+        if lowered.startswith("mailto:"):
+            target = href[7:].split("?", 1)[0]
+            index.emails.extend(a.strip() for a in target.split(",") if a.strip())
+            continue
+        if lowered.startswith("tel:"):
+            index.phones.append(href[4:])
+            continue
+        if lowered.startswith(_SKIP_SCHEMES):
+            continue
+        if origin and href[:1] == "/" and href[1:2] != "/" and "/." not in href:
+            # Root-relative path with no dot segments: nothing for urljoin to resolve
+            absolute = origin + href
+        else:
+            absolute = urljoin(base, href)
+        if not absolute.startswith(("http://", "https://")):
+            continue
+        parsed = urlparse(absolute)
+        url = _canonical_from_parsed(parsed)
+        if url in seen:
+            continue
+        seen.add(url)
+        link = Link(url=url, text=text, domain=registrable_domain(parsed.hostname))
+        index.links.append(link)
+        index.by_domain.setdefault(link.domain, []).append(link)
+    return index
@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Tuple
+
+from selectolax.parser import HTMLParser, Node
+
+
+# Leaf-level text blocks: taken whole, never descended into
+BLOCK_TAGS = {
+    "p", "pre", "blockquote", "li", "td", "th", "dd", "dt", "figcaption", "address",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# Subtrees that are chrome, not content
+SKIP_TAGS = {"nav", "aside", "form", "button", "select", "iframe", "svg", "menu", "dialog"}
+
+# A block needs this much text to count as content (headings are exempt)
+MIN_BLOCK_CHARS = 25
+# Blocks whose text is mostly link text are navigation
+MAX_LINK_DENSITY = 0.5
+# Siblings of the best container are kept when they score at least this share of it
+SIBLING_SCORE_RATIO = 0.2
+# Ancestors credited by each block, and the divider per level (as in readability.js)
+ANCESTOR_LEVELS = 5
+
+
+def _level_divider(level: int) -> int:
+    return 1 if level == 0 else 2 if level == 1 else level * 3
+
+
+def _link_density(node: Node, text_length: int) -> float:
+    if not text_length:
+        return 1.0
+    link_chars = sum(len(a.text() or "") for a in node.css("a"))
+    return min(1.0, link_chars / text_length)
+
+
+def _blocks(root: Node) -> List[Tuple[str, str, float, List[int]]]:
+    """(tag, text, link density, ancestor ids) for every text block, in document order.
+
+    A single iterative walk; block and skipped subtrees are not descended
+    into, so nested blocks are never counted twice.
+    """
+    blocks: List[Tuple[str, str, float, List[int]]] = []
+    path: List[int] = []
+    stack: List[Tuple[Node, int]] = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        tag = node.tag
+        if tag in SKIP_TAGS:
+            continue
+        del path[depth:]
+        is_block = tag in BLOCK_TAGS
+        if not is_block and tag in ("div", "section", "article", "main", "span", "font", "center"):
+            # Div soup: a container holding its own text is treated as one block
+            is_block = len((node.text(deep=False) or "").strip()) >= MIN_BLOCK_CHARS
+        if is_block:
+            text = " ".join((node.text(separator=" ") or "").split())
+            if text:
+                blocks.append((tag, text, _link_density(node, len(text)), list(path)))
+            continue
+        path.append(node.mem_id)
+        children = []
+        child = node.child
+        while child is not None:
+            if child.tag != "-text" and child.tag != "_comment":
+                children.append(child)
+            child = child.next
+        for child in reversed(children):
+            stack.append((child, depth + 1))
+    return blocks
+
+
+def extract_main_text_fast(tree: HTMLParser) -> Optional[str]:
+    """Boilerplate removal by text and link density over a selectolax tree.
+
+    Text blocks (paragraphs, list items, cells, headings, text-bearing divs)
+    are scored by length times (1 - link density). Each block credits its
+    parent in full and up to four further ancestors with decaying weight,
+    as readability does. The best container and its strong siblings win,
+    and their low-link-density blocks are returned in document order as one
+    whitespace-normalized string. Expects a tree without script/style
+    (ParsedPage.dom).
+    """
+    root = tree.body or tree.root
+    if root is None:
+        return None
+    blocks = _blocks(root)
+    if not blocks:
+        return None
+
+    scores: Dict[int, float] = {}
+    parent_of: Dict[int, Optional[int]] = {}
+    for tag, text, density, path in blocks:
+        if tag in HEADING_TAGS or len(text) < MIN_BLOCK_CHARS or density > MAX_LINK_DENSITY or not path:
+            continue
+        score = len(text) * (1.0 - density)
+        for level in range(min(ANCESTOR_LEVELS, len(path))):
+            node_id = path[-1 - level]
+            scores[node_id] = scores.get(node_id, 0.0) + score / _level_divider(level)
+            parent_of[node_id] = path[-2 - level] if len(path) > level + 1 else None
+    if not scores:
+        return None
+
+    best = max(scores, key=scores.get)
+    best_parent = parent_of.get(best)
+    chosen = {best}
+    if best_parent is not None:
+        threshold = scores[best] * SIBLING_SCORE_RATIO
+        chosen.update(c for c, s in scores.items() if parent_of.get(c) == best_parent and s >= threshold)
+
+    parts = [
+        text
+        for tag, text, density, path in blocks
+        if density <= MAX_LINK_DENSITY
+        and (tag in HEADING_TAGS or len(text) >= MIN_BLOCK_CHARS)
+        and any(node_id in chosen for node_id in path)
+    ]
+    text = " ".join(parts)
+    return text or None
@@ -0,0 +1,133 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+# Inline data: URIs shorter than this (tracking pixels, tiny icons) are left alone
+DATA_URI_MIN_CHARS = 256
+
+# Region openings, found with str.find on the lowercased document (far
+# faster than one regex alternation tried at every position)
+OPENINGS = ("<!--", "<script", "<style", "<svg", "data:")
+# A tag opening not written in lowercase ("<SCRIPT", "</sTyle"); the literal
+# "<" prefix keeps this search cheaper than lowercasing the document
+UPPERCASE_TAG_REGEX = re.compile(r"</?(?:S|s[A-Z])")
+UPPERCASE_DATA_URIS = ("DATA:", "Data:")
+# The only character whose lowercase is longer ("İ" -> "i̇"); swapped first so offsets stay aligned
+DOTTED_CAPITAL_I = "\u0130"
+TAG_NAME_END = " \t\r\n\f/>"
+DATA_URI_REGEX = re.compile(r"data:[^,\"'\s<>]{0,100},[^\"'\s<>)]{%d,}" % DATA_URI_MIN_CHARS, re.I)
+JSON_LD_TYPE_REGEX = re.compile(r"""type\s*=\s*["']?application/ld\+json""", re.I)
+JSON_TYPE_REGEX = re.compile(r"""type\s*=\s*["']?application/json""", re.I)
+# Framework state embedded in the page (Next, Nuxt, Apollo, Redux, ...)
+HYDRATION_ID_REGEX = re.compile(r"""id\s*=\s*["']?(?:__NEXT_DATA__|__NUXT_DATA__|__NUXT__|__APOLLO_STATE__)""", re.I)
+HYDRATION_PREFIXES = ("window.__", "self.__next_f", 'window["__', "window['__", "__NEXT_", "window.INITIAL_STATE")
+
+
+@dataclass
+class MinimizedHtml:
+    html: str
+    # Bytes (UTF-8) removed per category: script, hydration, style, svg, data_uri, comment
+    removed: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def removed_total(self) -> int:
+        return sum(self.removed.values())
+
+
+def _count(removed: Dict[str, int], category: str, text: str) -> None:
+    removed[category] = removed.get(category, 0) + len(text.encode("utf-8", errors="replace"))
+
+
+def _script_category(attrs: str, body: str) -> Optional[str]:
+    """"script" or "hydration"; None for JSON-LD, which the extractors read."""
+    if JSON_LD_TYPE_REGEX.search(attrs):
+        return None
+    if JSON_TYPE_REGEX.search(attrs) or HYDRATION_ID_REGEX.search(attrs) or body.lstrip().startswith(HYDRATION_PREFIXES):
+        return "hydration"
+    return "script"
+
+
+def minimize_html(html: str) -> MinimizedHtml:
+    """Stub out the regions no extractor reads, before any tree is built.
+
+    Inline script, style and svg bodies are emptied but their tags (and
+    attributes such as src and id) kept, so bundle and mount-point signals
+    survive. JSON-LD blocks, meta tags and text are left untouched. Long
+    data: URIs become "data:,". Comments are dropped.
+
+    One forward pass: each region is located with str.find and copied
+    around, so the cost is linear in the document size.
+    """
+    if not html:
+        return MinimizedHtml("")
+    size = len(html)
+    # Lowercasing copies the whole document; skip it when every opening is already lowercase.
+    # Offsets found in lower slice html, so both must have the same length.
+    lower = html
+    if UPPERCASE_TAG_REGEX.search(html) or any(d in html for d in UPPERCASE_DATA_URIS):
+        lower = html.lower()
+        if len(lower) != size:
+            lower = html.replace(DOTTED_CAPITAL_I, "i").lower()
+    removed: Dict[str, int] = {}
+    out: List[str] = []
+    copied = 0  # html[:copied] is already in out
+    # Next occurrence of each opening at or after the scan position (size = none left)
+    nxt = {token: lower.find(token) for token in OPENINGS}
+    for token, found in nxt.items():
+        if found < 0:
+            nxt[token] = size
+    while True:
+        token = min(nxt, key=nxt.__getitem__)
+        pos = nxt[token]
+        if pos >= size:
+            break
+        resume = pos + len(token)
+        if token == "<!--":
+            close = lower.find("-->", resume)
+            if close < 0:
+                nxt[token] = size
+                continue
+            resume = close + 3
+            out.append(html[copied:pos])
+            _count(removed, "comment", html[pos:resume])
+            copied = resume
+        elif token == "data:":
+            m = DATA_URI_REGEX.match(html, pos) if pos == 0 or not lower[pos - 1].isalnum() else None
+            if m:
+                resume = m.end()
+                out.append(html[copied:pos])
+                out.append("data:,")
+                _count(removed, "data_uri", m.group(0))
+                copied = resume
+        elif resume < size and lower[resume] in TAG_NAME_END:
+            tag = token[1:]
+            open_end = lower.find(">", resume)
+            close = lower.find("</" + tag, open_end) if open_end > 0 else -1
+            if close < 0:
+                # Unterminated: nothing of this kind left to stub
+                nxt[token] = size
+                continue
+            close_end = lower.find(">", close)
+            close_end = size if close_end < 0 else close_end + 1
+            resume = close_end
+            attrs = html[pos + len(token):open_end]
+            if not attrs.endswith("/"):
+                body = html[open_end + 1:close]
+                category = _script_category(attrs, body) if tag == "script" else tag
+                if category and body and not body.isspace():
+                    out.append(html[copied:open_end + 1])
+                    out.append(html[close:close_end])
+                    _count(removed, category, body)
+                    copied = close_end
+            else:
+                resume = open_end + 1
+        # Openings inside the region just handled belong to it
+        for t, found in nxt.items():
+            if found < resume:
+                found = lower.find(t, resume)
+                nxt[t] = size if found < 0 else found
+    if not removed:
+        return MinimizedHtml(html)
+    out.append(html[copied:])
+    return MinimizedHtml("".join(out), removed)
@@ -0,0 +1,190 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import (
+    SCRAPER_TIMEOUT_SECONDS,
+    SCRAPER_MAX_REDIRECTS,
+    SCRAPER_USER_AGENT,
+    PLAYWRIGHT_ENABLED,
+    PLAYWRIGHT_TIMEOUT_SECONDS,
+    SPA_SCORE_THRESHOLD,
+    RENDER_HEDGE_DELAY_SECONDS,
+)
+from .browser import RenderResult, render_page
+from .extraction import PageExtraction, extract_page
+from .fetcher import FetchResult, fetch_url
+from .robots import ensure_allowed, wait_for_crawl_slot
+from .spa import SpaScore
+
+
+# Below this many characters the static HTML is treated as unusable (previous fallback rule)
+MIN_HTML_LENGTH = 200
+
+
+@dataclass
+class LoadedPage:
+    final_url: str
+    status_code: int
+    html: Optional[str]
+    source: str  # "static" | "render"
+    fetched: Optional[FetchResult] = None
+    rendered: Optional[RenderResult] = None
+    spa: Optional[SpaScore] = None
+    # Extraction of the static HTML, made in the extraction pool while scoring
+    # it as an SPA shell; None for rendered pages and when nothing was scored
+    extraction: Optional[PageExtraction] = None
+
+
+def _task_result(task: Optional[asyncio.Task]):
+    if task is None or not task.done() or task.cancelled():
+        return None
+    if task.exception() is not None:
+        print(f"[Loader] {task.get_name()} failed: {task.exception()}")
+        return None
+    return task.result()
+
+
+def _from_static(
+    url: str,
+    fetched: Optional[FetchResult],
+    spa: Optional[SpaScore],
+    extraction: Optional[PageExtraction] = None,
+) -> LoadedPage:
+    if fetched is None:
+        return LoadedPage(final_url=url, status_code=0, html=None, source="static", spa=spa)
+    return LoadedPage(
+        final_url=fetched.final_url,
+        status_code=fetched.status_code,
+        html=fetched.text,
+        source="static",
+        fetched=fetched,
+        spa=spa,
+        extraction=extraction,
+    )
+
+
+def _from_render(rendered: RenderResult, fetched: Optional[FetchResult], spa: Optional[SpaScore]) -> LoadedPage:
+    return LoadedPage(
+        final_url=rendered.final_url,
+        status_code=rendered.status_code,
+        html=rendered.html,
+        source="render",
+        fetched=fetched,
+        rendered=rendered,
+        spa=spa,
+    )
+
+
+async def load_page(
+    url: str,
+    resolved_ip: Optional[str] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    include_links: bool = False,
+    paced: bool = False,
+) -> LoadedPage:
+    """Get page HTML via static fetch, hedged with a headless render.
+
+    The static fetch starts first. With Playwright enabled, a render starts
+    speculatively when the static fetch hasn't answered within
+    RENDER_HEDGE_DELAY_SECONDS, or when the static HTML scores as an SPA
+    shell (score >= SPA_SCORE_THRESHOLD) or is too short to use. The first
+    usable result wins and the other task is cancelled. 304 and non-HTML
+    responses are final and never trigger a render.
+
+    The SPA score comes from a full extraction of the static HTML in the
+    extraction pool (include_links as for extract_page); when the static
+    page is used, that extraction is returned with it so the page is
+    parsed once per analysis.
+
+    Raises HTTPException 403 when robots.txt disallows the URL. With
+    paced=True (batch and background work) the origin's Crawl-delay is
+    waited out before fetching; an interactive request fetches at once.
+    """
+    await ensure_allowed(url)
+    if paced:
+        await wait_for_crawl_slot(url)
+    static_task = asyncio.create_task(
+        fetch_url(
+            url,
+            user_agent=SCRAPER_USER_AGENT,
+            timeout_seconds=SCRAPER_TIMEOUT_SECONDS,
+            max_redirects=SCRAPER_MAX_REDIRECTS,
+            etag=etag,
+            last_modified=last_modified,
+            resolved_ip=resolved_ip,
+        ),
+        name="static-fetch",
+    )
+    render_task: Optional[asyncio.Task] = None
+
+    def start_render() -> Optional[asyncio.Task]:
+        nonlocal render_task
+        if render_task is None and PLAYWRIGHT_ENABLED:
+            render_task = asyncio.create_task(
+                render_page(
+                    url,
+                    user_agent=SCRAPER_USER_AGENT,
+                    timeout_seconds=PLAYWRIGHT_TIMEOUT_SECONDS,
+                    resolved_ip=resolved_ip,
+                ),
+                name="headless-render",
+            )
+        return render_task
+
+    fetched: Optional[FetchResult] = None
+    rendered: Optional[RenderResult] = None
+    spa: Optional[SpaScore] = None
+    extraction: Optional[PageExtraction] = None
+    try:
+        if PLAYWRIGHT_ENABLED:
+            done, _ = await asyncio.wait({static_task}, timeout=RENDER_HEDGE_DELAY_SECONDS)
+            if not done:
+                print(f"[Loader] Static fetch of {url} slow; hedging with headless render")
+                start_render()
+
+        pending = {t for t in (static_task, render_task) if t is not None}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            if static_task in done:
+                fetched = _task_result(static_task)
+                if fetched is not None and (fetched.not_modified or fetched.skipped_reason):
+                    return _from_static(url, fetched, None)
+                html = fetched.text if fetched else None
+                if not PLAYWRIGHT_ENABLED:
+                    # Nothing to hedge with; the caller extracts the page itself
+                    return _from_static(url, fetched, None)
+                if html:
+                    # Scored in the extraction pool, never on the event loop
+                    extraction = await extract_page(
+                        html, fetched.final_url, include_links=include_links, include_spa=True
+                    )
+                    spa = extraction.spa
+                usable = bool(html) and len(html) >= MIN_HTML_LENGTH and (spa is None or spa.score < SPA_SCORE_THRESHOLD)
+                if usable:
+                    return _from_static(url, fetched, spa, extraction)
+                if spa is not None and spa.score >= SPA_SCORE_THRESHOLD:
+                    print(f"[Loader] {url} looks like an SPA shell ({spa.score:.2f}: {', '.join(spa.signals)})")
+                else:
+                    print(f"[Loader] Static HTML for {url} too short; rendering")
+                task = start_render()
+                if task is not None and not task.done():
+                    pending.add(task)
+
+            if render_task is not None and render_task in done:
+                rendered = _task_result(render_task)
+                if rendered is not None and rendered.html and rendered.status_code < 400:
+                    return _from_render(rendered, fetched, spa)
+
+        # Neither result was clearly usable: keep whichever has content, static first
+        if fetched is not None and fetched.text:
+            return _from_static(url, fetched, spa, extraction)
+        if rendered is not None and rendered.html:
+            return _from_render(rendered, fetched, spa)
+        return _from_static(url, fetched, spa)
+    finally:
+        for task in (static_task, render_task):
+            if task is not None and not task.done():
+                task.cancel()
@@ -0,0 +1,68 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from selectolax.parser import HTMLParser
+
+
+# Attributes that carry contact details outside the visible text
+EMAIL_ATTRIBUTES = ("data-email", "data-mail")
+PHONE_ATTRIBUTES = ("data-phone", "data-tel", "data-telephone")
+# <... itemprop="email|telephone" content="..."> (schema.org microdata)
+ITEMPROP_EMAIL = {"email"}
+ITEMPROP_PHONE = {"telephone", "faxnumber"}
+
+
+@dataclass
+class PageScan:
+    """Contact candidates gathered in one walk over the visible DOM."""
+
+    # Visible text nodes, in document order
+    text: List[str] = field(default_factory=list)
+    # (raw href, anchor text) of every <a>/<area>, in document order (incl. mailto:/tel:)
+    anchors: List[Tuple[str, str]] = field(default_factory=list)
+    # Addresses from email attributes
+    emails: List[str] = field(default_factory=list)
+    # Numbers from phone attributes
+    phones: List[str] = field(default_factory=list)
+
+
+def scan_page(tree: HTMLParser) -> PageScan:
+    """Walk the tree once, collecting text nodes, anchors and contact attributes.
+
+    Expects a tree without script/style (ParsedPage.dom) so that
+    inline JS, JSON blobs and CSS never reach the matchers.
+    """
+    scan = PageScan()
+    root = tree.body or tree.root
+    if root is None:
+        return scan
+    for node in root.traverse(include_text=True):
+        tag = node.tag
+        if tag == "-text":
+            value = node.text_content
+            if value and not value.isspace():
+                scan.text.append(value)
+            continue
+        if tag == "_comment":
+            continue
+        attrs = node.attributes
+        if not attrs:
+            continue
+        if tag == "a" or tag == "area":
+            href = (attrs.get("href") or "").strip()
+            if href:
+                scan.anchors.append((href, " ".join((node.text() or "").split())[:200]))
+        itemprop = (attrs.get("itemprop") or "").lower()
+        if itemprop:
+            content = attrs.get("content") or attrs.get("href") or ""
+            if itemprop in ITEMPROP_EMAIL and content:
+                scan.emails.append(content.replace("mailto:", ""))
+            elif itemprop in ITEMPROP_PHONE and content:
+                scan.phones.append(content.replace("tel:", ""))
+        for name in EMAIL_ATTRIBUTES:
+            if attrs.get(name):
+                scan.emails.append(attrs[name])
+        for name in PHONE_ATTRIBUTES:
+            if attrs.get(name):
+                scan.phones.append(attrs[name])
+    return scan
@@ -1,57 +1,223 @@
-from typing import Optional, Tuple
+import json
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
 
 from selectolax.parser import HTMLParser
 from readability import Document
 
+from app.core.config import HTML_MINIMIZE, MAIN_TEXT_ENGINE, MAIN_TEXT_MIN_CHARS
+from .main_text import extract_main_text_fast
+from .link_index import LinkIndex, build_link_index
+from .minimize import MinimizedHtml, minimize_html
+from .page_scan import PageScan, scan_page
 
-def extract_title_and_meta(html: str) -> Tuple[Optional[str], Optional[str]]:
-    if not html:
+
+# Elements whose text is never shown to the reader
+INVISIBLE_TAGS = ["script", "style", "noscript", "template"]
+
+
+class ParsedPage:
+    """One page's HTML, parsed once and shared by every extractor.
+
+    Each view (DOM, visible text, link index, meta tags, JSON-LD, main text) is
+    computed on first access and memoized. The source is parsed into a
+    single tree: what the extractors need from script/noscript elements
+    (JSON-LD, noscript text, external script count) is collected first,
+    then the invisible elements are stripped so every view shares the same
+    read-only `dom`.
+
+    Every view is built from `html`, the source with inline script/style/svg
+    bodies, hydration blobs and long data: URIs stubbed out (HTML_MINIMIZE);
+    `source_html` is the document as fetched.
+    """
+
+    def __init__(self, html: str, url: Optional[str] = None):
+        self.source_html = html or ""
+        self.url = url
+        # Filled from the invisible elements while `dom` is built
+        self._json_ld_sources: List[str] = []
+        self._noscript_texts: List[str] = []
+        self._script_src_count = 0
+
+    @cached_property
+    def minimized(self) -> MinimizedHtml:
+        """source_html after the pre-minimizer, with bytes removed per category."""
+        if not HTML_MINIMIZE:
+            return MinimizedHtml(self.source_html)
+        return minimize_html(self.source_html)
+
+    @property
+    def html(self) -> str:
+        return self.minimized.html
+
+    @cached_property
+    def dom(self) -> HTMLParser:
+        """The page's only tree, without script/style/noscript/template."""
+        tree = HTMLParser(self.html)
+        for node in tree.css("script, noscript"):
+            if node.tag == "noscript":
+                self._noscript_texts.append(node.text() or "")
+            elif (node.attributes.get("type") or "").strip().lower() == "application/ld+json":
+                self._json_ld_sources.append(node.text() or "")
+            elif node.attributes.get("src"):
+                self._script_src_count += 1
+        tree.strip_tags(INVISIBLE_TAGS)
+        return tree
+
+    @property
+    def noscript_texts(self) -> List[str]:
+        self.dom  # builds the tree, collecting the invisible elements' content
+        return self._noscript_texts
+
+    @property
+    def script_src_count(self) -> int:
+        """<script src> elements in the document."""
+        self.dom  # builds the tree, collecting the invisible elements' content
+        return self._script_src_count
+
+    @cached_property
+    def scan(self) -> PageScan:
+        """Text nodes, anchors and contact attributes from one walk over dom."""
+        if not self.html:
+            return PageScan()
+        return scan_page(self.dom)
+
+    @cached_property
+    def visible_text(self) -> str:
+        """Whitespace-normalized body text without script/style/noscript/template."""
+        return " ".join(" ".join(self.scan.text).split())
+
+    @cached_property
+    def lang(self) -> Optional[str]:
+        """Declared page language, lowercased with "-" (<html lang>, else og:locale): "en-gb"."""
+        root = self.dom.root
+        lang = (root.attributes.get("lang") if root is not None else None) or self.meta.get("og:locale")
+        return lang.strip().lower().replace("_", "-") if lang and lang.strip() else None
+
+    @cached_property
+    def base_url(self) -> Optional[str]:
+        base_node = self.dom.css_first("base[href]")
+        if base_node and base_node.attributes.get("href"):
+            return urljoin(self.url or "", base_node.attributes["href"])
+        return self.url
+
+    @cached_property
+    def link_index(self) -> LinkIndex:
+        """Every anchor resolved against base_url, canonicalized and indexed by registrable domain."""
+        return build_link_index(self.scan.anchors, self.base_url)
+
+    @cached_property
+    def links(self) -> List[Tuple[str, str]]:
+        """Canonical absolute (url, anchor text) pairs for every navigable <a href>."""
+        return [(link.url, link.text) for link in self.link_index.links]
+
+    @cached_property
+    def meta(self) -> Dict[str, str]:
+        """<meta> content keyed by lowercased name/property; the first occurrence wins."""
+        meta: Dict[str, str] = {}
+        for node in self.dom.css("meta[content]"):
+            key = node.attributes.get("property") or node.attributes.get("name")
+            content = (node.attributes.get("content") or "").strip()
+            if key and content:
+                meta.setdefault(key.strip().lower(), content)
+        return meta
+
+    @cached_property
+    def json_ld(self) -> List[Any]:
+        """Parsed JSON-LD blocks; top-level arrays are flattened, invalid blocks skipped."""
+        blocks: List[Any] = []
+        self.dom  # builds the tree, collecting the invisible elements' content
+        for source in self._json_ld_sources:
+            try:
+                data = json.loads(source or "{}")
+            except Exception:
+                continue
+            if isinstance(data, list):
+                blocks.extend(data)
+            else:
+                blocks.append(data)
+        return blocks
+
+    @cached_property
+    def title_and_meta(self) -> Tuple[Optional[str], Optional[str]]:
+        tree = self.dom
+
+        # Title
+        # Prefer og:title, then <title>, then first H1
+        title = self.meta.get("og:title") or None
+        if not title:
+            title_node = tree.css_first("title")
+            if title_node and title_node.text():
+                title = title_node.text().strip() or None
+        if not title:
+            h1 = tree.css_first("h1")
+            if h1 and h1.text():
+                title = h1.text().strip() or None
+
+        # Meta description
+        meta_desc = self.meta.get("description") or self.meta.get("og:description") or None
+        return title, meta_desc
+
+    @cached_property
+    def main_text(self) -> Optional[str]:
+        """Article/body text without boilerplate, using MAIN_TEXT_ENGINE.
+
+        "fast" (selectolax density scoring) falls back to readability when
+        its output is shorter than MAIN_TEXT_MIN_CHARS on a page that has
+        more visible text than that. "readability" falls back to the fast
+        engine when readability fails.
+        """
+        if not self.html:
+            return None
+        if MAIN_TEXT_ENGINE == "readability":
+            return self.readability_text or self.fast_main_text
+        text = self.fast_main_text
+        if len(text or "") < MAIN_TEXT_MIN_CHARS and len(self.visible_text) > MAIN_TEXT_MIN_CHARS:
+            fallback = self.readability_text
+            if fallback and len(fallback) > len(text or ""):
+                return fallback
+        return text
+
+    @cached_property
+    def fast_main_text(self) -> Optional[str]:
+        if not self.html:
+            return None
+        try:
+            return extract_main_text_fast(self.dom)
+        except Exception:
+            return None
+
+    @cached_property
+    def readability_text(self) -> Optional[str]:
+        if not self.html:
+            return None
+        try:
+            doc = Document(self.html)
+            summary_html = doc.summary(html_partial=True)
+            tree = HTMLParser(summary_html)
+            # Remove script/style/nav (keep header/footer so addresses in footer aren't lost)
+            tree.strip_tags(["script", "style", "nav"])
+            text = tree.text(separator=" ")
+            text = " ".join(text.split())
+            return text if text else None
+        except Exception:
+            return None
+
+
+def as_page(page: Union[str, ParsedPage, None], url: Optional[str] = None) -> ParsedPage:
+    """Accept raw HTML or an existing ParsedPage."""
+    if isinstance(page, ParsedPage):
+        return page
+    return ParsedPage(page or "", url)
+
+
+def extract_title_and_meta(html: Union[str, ParsedPage]) -> Tuple[Optional[str], Optional[str]]:
+    page = as_page(html)
+    if not page.html:
         return None, None
-    tree = HTMLParser(html)
-    title = None
-    meta_desc = None
-
-    # Title
-    # Prefer og:title, then <title>, then first H1
-    og_title = tree.css_first('meta[property="og:title"], meta[name="og:title"]')
-    if og_title:
-        t = og_title.attributes.get("content")
-        if t:
-            title = t.strip() or None
-    if not title:
-        title_node = tree.css_first("title")
-        if title_node and title_node.text():
-            title = title_node.text().strip() or None
-    if not title:
-        h1 = tree.css_first("h1")
-        if h1 and h1.text():
-            title = h1.text().strip() or None
-
-    # Meta description
-    meta_node = tree.css_first('meta[name="description"], meta[name="Description"], meta[name="og:description"], meta[property="og:description"]')
-    if meta_node:
-        content = meta_node.attributes.get("content")
-        if content:
-            meta_desc = content.strip() or None
-
-    return title, meta_desc
-
-
-def extract_main_text(html: str) -> Optional[str]:
-    if not html:
-        return None
-    try:
-        doc = Document(html)
-        summary_html = doc.summary(html_partial=True)
-        tree = HTMLParser(summary_html)
-        # Remove script/style/nav (keep header/footer so addresses in footer aren't lost)
-        for sel in ("script", "style", "nav"):  # best-effort cleanup
-            for n in tree.css(sel):
-                n.decompose()
-        text = tree.text(separator=" ")
-        text = " ".join(text.split())
-        return text if text else None
-    except Exception:
-        return None
+    return page.title_and_meta
 
 
+def extract_main_text(html: Union[str, ParsedPage]) -> Optional[str]:
+    return as_page(html).main_text
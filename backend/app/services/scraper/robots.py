@@ -1,6 +1,27 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List
 from urllib.parse import urlparse, urlunparse
 import urllib.robotparser as robotparser
 
+from fastapi import HTTPException, status
+
+from app.core.config import (
+    SCRAPER_USER_AGENT,
+    ROBOTS_ENABLED,
+    ROBOTS_CACHE_TTL_SECONDS,
+    ROBOTS_ERROR_TTL_SECONDS,
+    ROBOTS_CACHE_MAX_ENTRIES,
+    ROBOTS_MAX_CRAWL_DELAY_SECONDS,
+)
+from .http_client import get_http_client
+
+
+# Larger robots.txt files are cut off here (Google applies a 500 KiB limit)
+ROBOTS_MAX_BYTES = 512 * 1024
+
 
 def robots_txt_url(target_url: str) -> str:
     parsed = urlparse(target_url)
@@ -8,14 +29,170 @@ def robots_txt_url(target_url: str) -> str:
     return urlunparse(robots)
 
 
-def can_fetch(user_agent: str, target_url: str) -> bool:
-    rp = robotparser.RobotFileParser()
-    rp.set_url(robots_txt_url(target_url))
+@dataclass
+class RobotsRules:
+    origin: str
+    parser: robotparser.RobotFileParser
+    # HTTP status of robots.txt, or 0 when it could not be fetched
+    status_code: int
+    expires_at: float
+
+    @property
+    def sitemaps(self) -> List[str]:
+        return list(self.parser.site_maps() or [])
+
+    def allows(self, user_agent: str, url: str) -> bool:
+        return self.parser.can_fetch(user_agent, url)
+
+    def crawl_delay(self, user_agent: str) -> float:
+        delay = self.parser.crawl_delay(user_agent)
+        if delay is None:
+            rate = self.parser.request_rate(user_agent)
+            if rate and rate.requests:
+                delay = rate.seconds / rate.requests
+        return min(float(delay or 0), ROBOTS_MAX_CRAWL_DELAY_SECONDS)
+
+
+# origin -> rules, least recently used first
+_robots_cache: "OrderedDict[str, RobotsRules]" = OrderedDict()
+# Concurrent lookups of the same origin share one robots.txt fetch
+_robots_inflight: Dict[str, "asyncio.Future[RobotsRules]"] = {}
+# origin -> monotonic time before which the next request should not start
+_next_request_at: Dict[str, float] = {}
+
+
+def _origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+
+
+def _cache_put(rules: RobotsRules) -> None:
+    _robots_cache[rules.origin] = rules
+    _robots_cache.move_to_end(rules.origin)
+    while len(_robots_cache) > ROBOTS_CACHE_MAX_ENTRIES:
+        _robots_cache.popitem(last=False)
+
+
+def _parser_from_lines(lines) -> robotparser.RobotFileParser:
+    parser = robotparser.RobotFileParser()
+    parser.parse(lines)
+    return parser
+
+
+async def _fetch_rules(origin: str) -> RobotsRules:
+    url = robots_txt_url(origin)
+    client = get_http_client()
     try:
-        rp.read()
-    except Exception:
-        # If robots can't be read, default to allowing (fail-open) per plan can be tuned
+        async with client.stream("GET", url) as resp:
+            status_code = resp.status_code
+            body = b""
+            if 200 <= status_code < 300:
+                async for chunk in resp.aiter_bytes():
+                    body += chunk
+                    if len(body) >= ROBOTS_MAX_BYTES:
+                        body = body[:ROBOTS_MAX_BYTES]
+                        break
+    except Exception as e:
+        # Unreachable robots.txt: fail open, but retry soon
+        print(f"[Robots] Could not fetch {url}: {e}")
+        parser = _parser_from_lines([])
+        parser.allow_all = True
+        return RobotsRules(origin, parser, 0, time.monotonic() + ROBOTS_ERROR_TTL_SECONDS)
+
+    if 200 <= status_code < 300:
+        parser = _parser_from_lines(body.decode("utf-8", errors="replace").splitlines())
+        ttl = ROBOTS_CACHE_TTL_SECONDS
+    else:
+        parser = _parser_from_lines([])
+        if 400 <= status_code < 500:
+            # No robots.txt (or not ours to read): everything is allowed (RFC 9309)
+            parser.allow_all = True
+            ttl = ROBOTS_CACHE_TTL_SECONDS
+        else:
+            # Server error: fail open like an unreachable file, and retry soon
+            parser.allow_all = True
+            ttl = ROBOTS_ERROR_TTL_SECONDS
+    return RobotsRules(origin, parser, status_code, time.monotonic() + ttl)
+
+
+async def get_robots_rules(url: str) -> RobotsRules:
+    """Parsed robots.txt for the origin of url, fetched at most once per TTL.
+
+    Rules are fetched through the shared scraper client and kept in an LRU
+    cache of ROBOTS_CACHE_MAX_ENTRIES origins for ROBOTS_CACHE_TTL_SECONDS.
+    Unreachable or 5xx robots.txt files allow everything and are retried
+    after ROBOTS_ERROR_TTL_SECONDS.
+    """
+    origin = _origin(url)
+    cached = _robots_cache.get(origin)
+    if cached and cached.expires_at > time.monotonic():
+        _robots_cache.move_to_end(origin)
+        return cached
+
+    pending = _robots_inflight.get(origin)
+    if pending is None:
+        # Fetched in its own task: a cancelled analysis stops waiting without
+        # cancelling the lookup for every other caller of this origin
+        pending = asyncio.ensure_future(_fetch_and_cache(origin))
+        _robots_inflight[origin] = pending
+        pending.add_done_callback(lambda task: _fetch_done(origin, task))
+    return await asyncio.shield(pending)
+
+
+async def _fetch_and_cache(origin: str) -> RobotsRules:
+    rules = await _fetch_rules(origin)
+    _cache_put(rules)
+    return rules
+
+
+def _fetch_done(origin: str, task: "asyncio.Future[RobotsRules]") -> None:
+    if _robots_inflight.get(origin) is task:
+        del _robots_inflight[origin]
+    if not task.cancelled():
+        # Mark retrieved so a fetch whose callers all gave up doesn't log a warning
+        task.exception()
+
+
+async def is_allowed(url: str, user_agent: str = SCRAPER_USER_AGENT) -> bool:
+    if not ROBOTS_ENABLED:
         return True
-    return rp.can_fetch(user_agent, target_url)
+    rules = await get_robots_rules(url)
+    return rules.allows(user_agent, url)
+
+
+async def ensure_allowed(url: str, user_agent: str = SCRAPER_USER_AGENT) -> None:
+    """Raise HTTP 403 when robots.txt disallows fetching url."""
+    if not await is_allowed(url, user_agent):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Fetching this URL is disallowed by the site's robots.txt",
+        )
+
+
+async def wait_for_crawl_slot(url: str, user_agent: str = SCRAPER_USER_AGENT) -> float:
+    """Sleep until the origin's Crawl-delay since our previous request has passed.
+
+    Each caller reserves the next slot before sleeping, so concurrent
+    requests to one origin are spaced out rather than released together.
+    Returns the number of seconds waited.
+    """
+    if not ROBOTS_ENABLED:
+        return 0.0
+    rules = await get_robots_rules(url)
+    delay = rules.crawl_delay(user_agent)
+    if delay <= 0:
+        return 0.0
+    now = time.monotonic()
+    if len(_next_request_at) >= ROBOTS_CACHE_MAX_ENTRIES:
+        for key in [k for k, t in _next_request_at.items() if t <= now]:
+            del _next_request_at[key]
+    start_at = max(now, _next_request_at.get(rules.origin, now))
+    _next_request_at[rules.origin] = start_at + delay
+    wait = start_at - now
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return wait
 
 
+def robots_cache_stats() -> Dict[str, int]:
+    return {"origins": len(_robots_cache), "in_flight": len(_robots_inflight)}
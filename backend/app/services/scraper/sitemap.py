@@ -0,0 +1,249 @@
+import asyncio
+import heapq
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+import xml.etree.ElementTree as ET
+
+from app.core.config import (
+    SITEMAP_MAX_FILES,
+    SITEMAP_MAX_URLS,
+    SITEMAP_MAX_BYTES,
+    SITEMAP_TIME_BUDGET_SECONDS,
+)
+from .crawler import LINK_KEYWORDS, SKIP_EXTENSIONS, score_link
+from .http_client import get_http_client
+from .link_index import canonicalize_url, site_host
+from .robots import get_robots_rules, is_allowed
+
+
+# Tried when robots.txt lists no sitemaps
+DEFAULT_SITEMAP_PATHS = ("/sitemap.xml", "/sitemap_index.xml")
+
+# Page groups we are looking for; discovery stops early once each has a top-level hit
+TARGET_GROUPS = {
+    "about": re.compile(r"about|ueber-uns|uber-uns|a-propos|quienes-somos|who-we-are|company", re.I),
+    "contact": re.compile(r"contact|kontakt|contacto|contatti|impressum|imprint", re.I),
+    "team": re.compile(r"team|leadership|people", re.I),
+    "pricing": re.compile(r"pricing|prices|plans", re.I),
+}
+
+# One pass over the raw <loc> text rejects most entries before any URL parsing
+# (matched against the lowercased URL; re.I makes the alternation several times slower)
+_ANY_KEYWORD = re.compile("|".join(f"(?:{p.pattern})" for p, _ in LINK_KEYWORDS))
+
+# Child sitemaps of an index are visited in this order (pages before posts/products)
+_CHILD_PRIORITY = (
+    (re.compile(r"post|blog|news|article|product|image|video|tag|categor|author", re.I), 2),
+    (re.compile(r"page|main|static|general", re.I), 0),
+)
+
+# Decompressed bytes handed to the XML parser per step
+_INFLATE_STEP = 256 * 1024
+
+
+@dataclass
+class _Discovery:
+    site: str
+    limit: int
+    seen: Set[str]
+    queue: List[str] = field(default_factory=list)
+    files: int = 0
+    scanned: int = 0
+    bytes_read: int = 0
+    # min-heap of (score, -order, url) holding the best `limit` candidates
+    best: List[Tuple[int, int, str]] = field(default_factory=list)
+    groups_found: Set[str] = field(default_factory=set)
+
+    @property
+    def exhausted(self) -> bool:
+        return (
+            self.scanned >= SITEMAP_MAX_URLS
+            or self.bytes_read >= SITEMAP_MAX_BYTES
+            or self.groups_found >= set(TARGET_GROUPS)
+        )
+
+    def offer(self, url: str) -> None:
+        self.scanned += 1
+        if not _ANY_KEYWORD.search(url.lower()):
+            return
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or site_host(url) != self.site:
+            return
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            return
+        canonical = canonicalize_url(url)
+        if canonical in self.seen:
+            return
+        score = score_link(url, "")
+        if score <= 0:
+            return
+        self.seen.add(canonical)
+        depth = len([p for p in parsed.path.split("/") if p])
+        if depth <= 1:
+            for name, pattern in TARGET_GROUPS.items():
+                if pattern.search(parsed.path):
+                    self.groups_found.add(name)
+        item = (score, -self.scanned, canonical)
+        if len(self.best) < self.limit:
+            heapq.heappush(self.best, item)
+        elif item > self.best[0]:
+            heapq.heapreplace(self.best, item)
+
+    def ranked(self) -> List[str]:
+        return [url for _, _, url in sorted(self.best, reverse=True)]
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_priority(url: str) -> int:
+    for pattern, priority in _CHILD_PRIORITY:
+        if pattern.search(urlparse(url).path):
+            return priority
+    return 1
+
+
+def _inflate(decompressor, chunk: bytes) -> Iterator[bytes]:
+    """Gunzip chunk in bounded steps so a compression bomb never expands at once."""
+    data = decompressor.decompress(chunk, _INFLATE_STEP)
+    while data:
+        yield data
+        if not decompressor.unconsumed_tail:
+            break
+        data = decompressor.decompress(decompressor.unconsumed_tail, _INFLATE_STEP)
+
+
+async def _scan_sitemap(url: str, state: _Discovery) -> List[str]:
+    """Stream one sitemap (plain or gzipped) and feed its <loc>s to state.
+
+    Returns the child sitemaps listed if this is a sitemap index.
+    """
+    children: List[str] = []
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    client = get_http_client()
+    async with client.stream("GET", url) as resp:
+        if resp.status_code >= 400:
+            return children
+        decompressor = None
+        first = True
+        # aiter_bytes undoes Content-Encoding; a .xml.gz file itself still needs gunzip
+        async for chunk in resp.aiter_bytes():
+            if first:
+                first = False
+                if chunk[:2] == b"\x1f\x8b":
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            pieces = _inflate(decompressor, chunk) if decompressor else (chunk,)
+            for data in pieces:
+                state.bytes_read += len(data)
+                parser.feed(data)
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        continue
+                    name = _local_name(elem.tag)
+                    if name not in ("url", "sitemap"):
+                        continue
+                    loc = next((c.text for c in elem if _local_name(c.tag) == "loc"), None)
+                    loc = (loc or "").strip()
+                    if loc:
+                        if not loc.startswith(("http://", "https://")):
+                            loc = urljoin(url, loc)
+                        if name == "sitemap":
+                            children.append(loc)
+                        else:
+                            state.offer(loc)
+                    # Drop processed entries so memory stays flat on huge files
+                    root.clear()
+                    if state.exhausted:
+                        return children
+                # A body with no entry ends (one huge text node, junk) is buffered by the parser;
+                # the byte cap has to hold for it too, not only after a <url>/<sitemap>
+                if state.bytes_read >= SITEMAP_MAX_BYTES:
+                    print(f"[Sitemap] {url}: stopped at the {SITEMAP_MAX_BYTES} byte cap")
+                    return children
+                # Let the time budget interrupt large files even when bytes arrive faster than we parse
+                await asyncio.sleep(0)
+    return children
+
+
+async def _sitemap_roots(landing_url: str) -> List[str]:
+    parsed = urlparse(landing_url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    listed: List[str] = []
+    try:
+        listed = (await get_robots_rules(landing_url)).sitemaps
+    except Exception as e:
+        print(f"[Sitemap] robots.txt lookup failed for {origin}: {e}")
+    if listed:
+        return listed
+    return [origin + path for path in DEFAULT_SITEMAP_PATHS]
+
+
+async def _discover(state: _Discovery, landing_url: str) -> None:
+    state.queue = await _sitemap_roots(landing_url)
+    visited: Set[str] = set()
+    while state.queue and state.files < SITEMAP_MAX_FILES and not state.exhausted:
+        url = state.queue.pop(0)
+        if url in visited:
+            continue
+        visited.add(url)
+        if not await is_allowed(url):
+            continue
+        state.files += 1
+        scanned_before = state.scanned
+        try:
+            children = await _scan_sitemap(url, state)
+        except ET.ParseError as e:
+            print(f"[Sitemap] {url}: invalid XML ({e})")
+            continue
+        except Exception as e:
+            print(f"[Sitemap] {url} failed: {e}")
+            continue
+        if (children or state.scanned > scanned_before) and urlparse(url).path in DEFAULT_SITEMAP_PATHS:
+            # Found the site's sitemap at a usual location; skip the other guesses
+            state.queue = [u for u in state.queue if urlparse(u).path not in DEFAULT_SITEMAP_PATHS]
+        if children:
+            state.queue.extend(sorted(children, key=_child_priority))
+
+
+async def discover_sitemap_urls(
+    landing_url: str,
+    limit: int,
+    time_budget_seconds: float = SITEMAP_TIME_BUDGET_SECONDS,
+    seen: Optional[Set[str]] = None,
+) -> List[str]:
+    """Best same-site about/contact/team/pricing URLs listed in the sitemaps.
+
+    Sitemaps come from robots.txt, falling back to /sitemap.xml and
+    /sitemap_index.xml. Index files are followed (page sitemaps before
+    post/product ones) up to SITEMAP_MAX_FILES. Each file is streamed,
+    gunzipped on the fly when needed and parsed incrementally, keeping only
+    the top `limit` candidates. Discovery stops early once every page group
+    has a top-level match, or when SITEMAP_MAX_URLS entries,
+    SITEMAP_MAX_BYTES or the time budget are used up. URLs in seen are
+    skipped. Ranked using the crawler's link scoring.
+    """
+    if limit <= 0:
+        return []
+    state = _Discovery(site=site_host(landing_url), limit=limit, seen=set(seen or ()))
+    state.seen.add(canonicalize_url(landing_url))
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(_discover(state, landing_url), timeout=time_budget_seconds)
+    except asyncio.TimeoutError:
+        print(f"[Sitemap] {landing_url}: time budget reached")
+    except Exception as e:
+        print(f"[Sitemap] {landing_url}: discovery failed: {e}")
+    ranked = state.ranked()
+    print(
+        f"[Sitemap] {landing_url}: {len(ranked)} candidates from {state.scanned} URLs in "
+        f"{state.files} files ({state.bytes_read} bytes, {time.monotonic() - started:.2f}s)"
+    )
+    return ranked
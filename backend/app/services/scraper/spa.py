@@ -0,0 +1,59 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Union
+
+from .parser import ParsedPage, as_page
+
+
+# Mount points used by common SPA frameworks (React, Vue, Angular, Next, Nuxt, Gatsby, Svelte)
+ROOT_IDS = {"root", "app", "__next", "__nuxt", "___gatsby", "app-root", "svelte", "main-app"}
+
+NOSCRIPT_JS_RE = re.compile(r"enable\s+javascript|javascript\s+(is\s+)?(required|disabled)|requires\s+javascript", re.I)
+
+
+@dataclass
+class SpaScore:
+    """How strongly static HTML suggests the content is rendered client-side (0..1)."""
+
+    score: float
+    signals: List[str] = field(default_factory=list)
+    text_length: int = 0
+
+
+def score_spa_shell(html: Union[str, ParsedPage]) -> SpaScore:
+    page = as_page(html)
+    # The document as fetched: inline bundles count towards its size
+    html = page.source_html
+    if not html:
+        return SpaScore(score=1.0, signals=["empty"])
+    tree = page.dom
+    signals: List[str] = []
+    score = 0.0
+
+    # Empty framework mount point
+    for node in tree.css("[id]"):
+        if (node.attributes.get("id") or "").lower() in ROOT_IDS:
+            if len((node.text() or "").strip()) < 50:
+                signals.append("empty-root")
+                score += 0.35
+            break
+
+    # <noscript> asking for JavaScript
+    for noscript in page.noscript_texts:
+        if NOSCRIPT_JS_RE.search(noscript):
+            signals.append("noscript-notice")
+            score += 0.25
+            break
+
+    text = page.visible_text
+
+    scripts = page.script_src_count
+    if scripts and len(text) < 200:
+        signals.append("bundle-only-body")
+        score += 0.3
+
+    if len(html) > 2000 and len(text) / len(html) < 0.02:
+        signals.append("low-text-density")
+        score += 0.2
+
+    return SpaScore(score=min(score, 1.0), signals=signals, text_length=len(text))
@@ -0,0 +1,285 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from selectolax.parser import Node
+
+from .address import format_postal_address
+from .extract_contact import SOCIAL_DOMAINS, SOCIAL_SHARE_REGEX, format_phone_number, infer_phone_region
+from .link_index import canonicalize_url, registrable_domain
+from .parser import ParsedPage, as_page
+
+
+# Confidence of a value by where the page published it
+JSON_LD_CONFIDENCE = 0.95
+MICRODATA_CONFIDENCE = 0.9
+OPENGRAPH_CONFIDENCE = 0.8
+# Industry read off a LocalBusiness subtype ("Dentist") rather than stated
+TYPE_INDUSTRY_PENALTY = 0.1
+
+# schema.org types describing the company itself, lowercased. Types without
+# an industry of their own; subtypes (Dentist, AutoRepair, ...) name one.
+GENERIC_ORG_TYPES = {
+    "organization", "corporation", "localbusiness", "onlinebusiness", "onlinestore", "store", "ngo",
+    "professionalservice", "project",
+}
+# No bare "service": schema.org Service is something offered, not the company
+ORG_TYPE_SUFFIXES = ("organization", "business", "store", "agency", "contractor", "clinic")
+# Offerings whose provider/brand is the company; never the company themselves
+OFFERING_TYPES = {
+    "service", "broadcastservice", "cableorsatelliteservice", "financialproduct", "foodservice",
+    "governmentservice", "taxiservice", "product", "brand",
+}
+LOCAL_BUSINESS_TYPES = {
+    "accountingservice", "attorney", "autodealer", "autorepair", "bakery", "bankorcreditunion", "barorpub",
+    "brewery", "cafeorcoffeeshop", "collegeoruniversity", "dentist", "electrician", "financialservice",
+    "healthclub", "hospital", "hotel", "legalservice", "locksmith", "pharmacy", "physician", "plumber",
+    "realestateagent", "restaurant", "school", "winery",
+}
+# Keys under which a page nests the entity it is about (top-level blocks are always read)
+ENTITY_KEYS = ("@graph", "mainEntity", "publisher", "provider", "brand", "about")
+
+CAMEL_SPLIT_REGEX = re.compile(r"(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+# OpenGraph contact properties (og:* and Facebook's business:contact_data:*)
+OG_ADDRESS_KEYS = ("street_address", "locality", "region", "postal_code", "country_name")
+
+
+@dataclass
+class StructuredField:
+    value: str
+    source: str  # "json-ld" | "microdata" | "opengraph"
+    confidence: float
+
+
+@dataclass
+class StructuredData:
+    """Company and contact fields the page publishes as structured data.
+
+    fields keys: name, description, industry, company_size, location,
+    target_audience, email, phone. socials is keyed like SOCIAL_DOMAINS.
+    """
+
+    fields: Dict[str, StructuredField] = field(default_factory=dict)
+    socials: Dict[str, StructuredField] = field(default_factory=dict)
+
+    def get(self, name: str, min_confidence: float = 0.0) -> Optional[str]:
+        f = self.fields.get(name)
+        return f.value if f and f.confidence >= min_confidence else None
+
+    def offer(self, name: str, value: Any, source: str, confidence: float) -> None:
+        """Keep value unless the field already holds one at least as confident."""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str) or not value.strip():
+            return
+        current = self.fields.get(name)
+        if current is None or confidence > current.confidence:
+            self.fields[name] = StructuredField(" ".join(value.split())[:500], source, confidence)
+
+    def merge(self, other: "StructuredData") -> None:
+        for name, f in other.fields.items():
+            self.offer(name, f.value, f.source, f.confidence)
+        for platform, f in other.socials.items():
+            current = self.socials.get(platform)
+            if current is None or f.confidence > current.confidence:
+                self.socials[platform] = f
+
+
+def _types(entity: Dict[str, Any]) -> List[str]:
+    types = entity.get("@type")
+    types = types if isinstance(types, list) else [types]
+    # "http://schema.org/Dentist" and "schema:Dentist" both mean Dentist
+    return [re.split(r"[/:#]", t)[-1] for t in types if isinstance(t, str) and t]
+
+
+def _is_org_type(t: str) -> bool:
+    lower = t.lower()
+    if lower in OFFERING_TYPES:
+        return False
+    return lower in GENERIC_ORG_TYPES or lower in LOCAL_BUSINESS_TYPES or lower.endswith(ORG_TYPE_SUFFIXES)
+
+
+def _industry_from_type(t: str) -> Optional[str]:
+    """Dentist -> "Dentist", MedicalOrganization -> "Medical", HVACBusiness -> "HVAC"."""
+    if t.lower() in GENERIC_ORG_TYPES:
+        return None
+    words = CAMEL_SPLIT_REGEX.sub(" ", t).split()
+    if len(words) > 1 and words[-1].lower() in ("organization", "business"):
+        words = words[:-1]
+    return " ".join(words) or None
+
+
+def _text(value: Any) -> Optional[str]:
+    """A string, a number, or the name/value of a schema.org object."""
+    if isinstance(value, list):
+        return next((t for t in map(_text, value) if t), None)
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("value") or value.get("audienceType")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def _employees(value: Any) -> Optional[str]:
+    """numberOfEmployees (a number, a string or a QuantitativeValue) as "51-200 employees"."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        low, high = value.get("minValue"), value.get("maxValue")
+        if low is not None and high is not None:
+            return f"{low}-{high} employees"
+        if low is not None:
+            return f"{low}+ employees"
+        value = value.get("value")
+    text = _text(value)
+    if not text:
+        return None
+    return text if "employee" in text.lower() else f"{text} employees"
+
+
+def _json_ld_entities(blocks: List[Any]) -> Iterator[Dict[str, Any]]:
+    """Top-level JSON-LD objects and the entities they nest under ENTITY_KEYS, in order."""
+    stack = list(reversed(blocks))
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, list):
+            stack.extend(reversed(obj))
+            continue
+        if not isinstance(obj, dict):
+            continue
+        yield obj
+        nested = [obj[k] for k in ENTITY_KEYS if isinstance(obj.get(k), (dict, list))]
+        stack.extend(reversed(nested))
+
+
+def _owner(node: Node) -> Optional[Node]:
+    parent = node.parent
+    while parent is not None and "itemscope" not in parent.attributes:
+        parent = parent.parent
+    return parent
+
+
+def _microdata_value(node: Node) -> Optional[str]:
+    attrs = node.attributes
+    if attrs.get("content"):
+        return attrs["content"]
+    if node.tag in ("a", "link", "area") and attrs.get("href"):
+        return attrs["href"]
+    if node.tag in ("img", "audio", "video", "source") and attrs.get("src"):
+        return attrs["src"]
+    if node.tag in ("time", "data", "meter") and (attrs.get("datetime") or attrs.get("value")):
+        return attrs.get("datetime") or attrs.get("value")
+    return " ".join((node.text() or "").split()) or None
+
+
+def _microdata_item(node: Node) -> Dict[str, Any]:
+    """One itemscope as a JSON-LD-shaped dict, nested items included."""
+    item: Dict[str, Any] = {"@type": (node.attributes.get("itemtype") or "").split()[:1]}
+    for prop in node.css("[itemprop]"):
+        owner = _owner(prop)
+        if owner is None or owner.mem_id != node.mem_id:
+            continue
+        value = _microdata_item(prop) if "itemscope" in prop.attributes else _microdata_value(prop)
+        if value is None:
+            continue
+        for name in (prop.attributes.get("itemprop") or "").split():
+            if name not in item:
+                item[name] = value
+            elif isinstance(item[name], list):
+                item[name].append(value)
+            else:
+                item[name] = [item[name], value]
+    return item
+
+
+def _read_entity(data: StructuredData, entity: Dict[str, Any], source: str, confidence: float, region: str) -> None:
+    org_types = [t for t in _types(entity) if _is_org_type(t)]
+    if not org_types:
+        return
+    data.offer("name", _text(entity.get("name")), source, confidence)
+    data.offer("description", _text(entity.get("description")) or _text(entity.get("slogan")), source, confidence)
+    data.offer("company_size", _employees(entity.get("numberOfEmployees")), source, confidence)
+    data.offer("target_audience", _text(entity.get("audience")), source, confidence)
+    # Not schema.org, but common enough in hand-written markup to trust
+    data.offer("industry", _text(entity.get("industry")), source, confidence)
+    for t in org_types:
+        data.offer("industry", _industry_from_type(t), source, round(confidence - TYPE_INDUSTRY_PENALTY, 2))
+    address = entity.get("address") or entity.get("location")
+    if isinstance(address, list):
+        address = address[0] if address else None
+    if isinstance(address, dict) and isinstance(address.get("address"), (dict, str)):
+        # location: {"@type": "Place", "address": {...}}
+        address = address["address"]
+    data.offer("location", format_postal_address(address), source, confidence)
+    email = _text(entity.get("email"))
+    if email:
+        data.offer("email", email.replace("mailto:", "").strip().lower(), source, confidence)
+    phone = _text(entity.get("telephone"))
+    if phone:
+        data.offer("phone", format_phone_number(phone.replace("tel:", ""), region), source, confidence)
+    same_as = entity.get("sameAs")
+    for url in same_as if isinstance(same_as, list) else [same_as]:
+        _offer_social(data, url, source, confidence)
+
+
+def _offer_social(data: StructuredData, url: Any, source: str, confidence: float) -> None:
+    if not isinstance(url, str) or not url.startswith(("http://", "https://")) or SOCIAL_SHARE_REGEX.search(url):
+        return
+    url = canonicalize_url(url)
+    domain = registrable_domain(url.split("/")[2])
+    for platform, domains in SOCIAL_DOMAINS.items():
+        if domain in domains:
+            current = data.socials.get(platform)
+            if current is None or confidence > current.confidence:
+                data.socials[platform] = StructuredField(url, source, confidence)
+            return
+
+
+def _read_opengraph(data: StructuredData, meta: Dict[str, str], region: str) -> None:
+    source, confidence = "opengraph", OPENGRAPH_CONFIDENCE
+    data.offer("name", meta.get("og:site_name"), source, confidence)
+    data.offer("description", meta.get("og:description"), source, confidence)
+    email = meta.get("business:contact_data:email") or meta.get("og:email")
+    if email:
+        data.offer("email", email.replace("mailto:", "").strip().lower(), source, confidence)
+    phone = meta.get("business:contact_data:phone_number") or meta.get("og:phone_number")
+    if phone:
+        data.offer("phone", format_phone_number(phone, region), source, confidence)
+    parts = [
+        meta.get(f"business:contact_data:{key}") or meta.get(f"og:{key.replace('_', '-')}")
+        for key in OG_ADDRESS_KEYS
+    ]
+    data.offer("location", ", ".join(p for p in parts if p), source, confidence)
+    handle = (meta.get("twitter:site") or "").lstrip("@").strip()
+    if handle and re.fullmatch(r"\w{1,15}", handle):
+        _offer_social(data, f"https://twitter.com/{handle}", source, confidence)
+
+
+def extract_structured_data(page: Union[str, ParsedPage]) -> StructuredData:
+    """Company fields from JSON-LD, microdata and OpenGraph, with provenance.
+
+    Each source is read once: schema.org Organization/LocalBusiness entities
+    (top level, @graph, mainEntity/publisher/provider/brand) from the JSON-LD
+    blocks, the same types from microdata itemscopes, then og:* and
+    business:contact_data:* meta tags. Per field the most confident value
+    wins; on a tie the first one seen.
+    """
+    data = StructuredData()
+    page = as_page(page)
+    if not page.html:
+        return data
+    region = infer_phone_region(page)
+    for entity in _json_ld_entities(page.json_ld):
+        _read_entity(data, entity, "json-ld", JSON_LD_CONFIDENCE, region)
+    # Cheap substring test before any CSS query; most pages have no microdata
+    if "itemscope" in page.html:
+        for node in page.dom.css("[itemscope][itemtype]"):
+            itemprop = node.attributes.get("itemprop")
+            # Nested items describe something else (an author, a member) unless they name the page's subject
+            if itemprop and itemprop not in ENTITY_KEYS:
+                continue
+            item = _microdata_item(node)
+            _read_entity(data, item, "microdata", MICRODATA_CONFIDENCE, region)
+    _read_opengraph(data, page.meta, region)
+    return data
@@ -0,0 +1,251 @@
+"""Extractor benchmarks over the stored HTML corpus.
+
+Run from backend/:
+
+    python -m benchmarks.run                          # full run, prints a table
+    python -m benchmarks.run --only huge --only emails
+    python -m benchmarks.run --save-baseline /tmp/base.json
+    python -m benchmarks.run --compare /tmp/base.json # exit 1 on regression
+
+Every case starts from the decoded HTML string, so parsing is part of the
+measured cost (the same as calling the extractor with raw HTML).
+"""
+import argparse
+import gc
+import gzip
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.scraper.extract_contact import (
+    extract_dom_location,
+    extract_emails,
+    extract_phone_numbers,
+    extract_social_links,
+)
+from app.services.scraper.extraction import extract_page_data
+from app.services.scraper.fetcher import sniff_encoding
+from app.services.scraper.minimize import minimize_html
+from app.services.scraper.parser import ParsedPage, extract_main_text, extract_title_and_meta
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "v1")
+
+# (case name, callable taking the decoded HTML)
+CASES: List[Tuple[str, Callable[[str], object]]] = [
+    # The pre-pass every other case now includes
+    ("minimize", minimize_html),
+    ("title_and_meta", extract_title_and_meta),
+    ("main_text", extract_main_text),
+    ("emails", extract_emails),
+    ("phone_numbers", extract_phone_numbers),
+    ("social_links", extract_social_links),
+    ("dom_location", extract_dom_location),
+    # Everything one analyzed page costs, sharing a single parse
+    ("page_data", lambda html: extract_page_data(ParsedPage(html))),
+]
+
+MIN_ITERATIONS = 5
+MAX_ITERATIONS = 200
+TIME_BUDGET_SECONDS = 2.0
+
+# Regressions smaller than these absolute deltas are treated as noise
+MIN_P50_DELTA_MS = 0.05
+MIN_PEAK_DELTA_KB = 64
+
+
+@dataclass
+class Fixture:
+    name: str
+    category: str
+    html: str
+    size_bytes: int
+    encoding: str
+
+
+@dataclass
+class CaseResult:
+    iterations: int
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+    pages_per_s: float
+    mb_per_s: float
+    peak_kb: float
+
+
+def load_corpus(corpus_dir: str = CORPUS_DIR) -> Tuple[int, List[Fixture]]:
+    with open(os.path.join(corpus_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    fixtures: List[Fixture] = []
+    for entry in manifest["fixtures"]:
+        with open(os.path.join(corpus_dir, entry["file"]), "rb") as f:
+            raw = f.read()
+        if entry["file"].endswith(".gz"):
+            raw = gzip.decompress(raw)
+        # Decode the way the fetcher would (no Content-Type header on disk)
+        encoding = sniff_encoding(raw[:4096], None)
+        fixtures.append(
+            Fixture(
+                name=entry["name"],
+                category=entry["category"],
+                html=raw.decode(encoding, errors="replace"),
+                size_bytes=len(raw),
+                encoding=encoding,
+            )
+        )
+    return manifest["version"], fixtures
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank: with few samples p99 is simply the slowest run
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _peak_kb(fn: Callable[[str], object], html: str) -> float:
+    """Peak Python heap allocated during one call.
+
+    tracemalloc only sees allocations made through Python's allocator, so
+    memory held inside selectolax (lexbor) and lxml trees is not counted.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(html)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_case(fn: Callable[[str], object], fixture: Fixture, iterations: Optional[int] = None) -> CaseResult:
+    fn(fixture.html)  # warm-up: imports, regex compilation, phonenumbers metadata
+    gc.collect()
+    timings: List[float] = []
+    started = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        fn(fixture.html)
+        timings.append(time.perf_counter() - t0)
+        if iterations is not None:
+            if len(timings) >= iterations:
+                break
+        elif len(timings) >= MAX_ITERATIONS or (
+            len(timings) >= MIN_ITERATIONS and time.perf_counter() - started >= TIME_BUDGET_SECONDS
+        ):
+            break
+    timings.sort()
+    mean = statistics.fmean(timings)
+    return CaseResult(
+        iterations=len(timings),
+        p50_ms=_percentile(timings, 50) * 1000,
+        p99_ms=_percentile(timings, 99) * 1000,
+        mean_ms=mean * 1000,
+        pages_per_s=1 / mean if mean else 0.0,
+        mb_per_s=fixture.size_bytes / mean / 1e6 if mean else 0.0,
+        # Measured separately: tracing slows every allocation down
+        peak_kb=_peak_kb(fn, fixture.html),
+    )
+
+
+def _selected(name: str, fixture: Fixture, only: List[str]) -> bool:
+    return not only or any(o in (name, fixture.name, fixture.category) for o in only)
+
+
+def run(corpus_dir: str, only: List[str], iterations: Optional[int]) -> Dict[str, object]:
+    version, fixtures = load_corpus(corpus_dir)
+    results: Dict[str, Dict[str, float]] = {}
+    print(
+        f"{'fixture':<20} {'case':<15} {'n':>4} {'p50 ms':>9} {'p99 ms':>9} "
+        f"{'pages/s':>9} {'MB/s':>7} {'peak KB':>9}"
+    )
+    for fixture in fixtures:
+        for name, fn in CASES:
+            if not _selected(name, fixture, only):
+                continue
+            result = run_case(fn, fixture, iterations)
+            results[f"{fixture.name}/{name}"] = asdict(result)
+            print(
+                f"{fixture.name:<20} {name:<15} {result.iterations:>4} {result.p50_ms:>9.2f} "
+                f"{result.p99_ms:>9.2f} {result.pages_per_s:>9.1f} {result.mb_per_s:>7.2f} {result.peak_kb:>9.0f}"
+            )
+    return {
+        "corpus_version": version,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Print deltas against a baseline; return the cases that regressed."""
+    if baseline.get("corpus_version") != current.get("corpus_version"):
+        print(
+            f"[Bench] Baseline is for corpus v{baseline.get('corpus_version')}, "
+            f"this run is v{current.get('corpus_version')}; timings are not comparable"
+        )
+        return []
+    regressions: List[str] = []
+    print(f"\n{'case':<36} {'p50 base':>9} {'p50 now':>9} {'delta':>8} {'peak base':>10} {'peak now':>9}")
+    for key, now in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        p50_delta = now["p50_ms"] - base["p50_ms"]
+        peak_delta = now["peak_kb"] - base["peak_kb"]
+        p50_ratio = p50_delta / base["p50_ms"] if base["p50_ms"] else 0.0
+        peak_ratio = peak_delta / base["peak_kb"] if base["peak_kb"] else 0.0
+        slower = p50_ratio > threshold and p50_delta > MIN_P50_DELTA_MS
+        bigger = peak_ratio > threshold and peak_delta > MIN_PEAK_DELTA_KB
+        flag = "  REGRESSION" if slower or bigger else ""
+        if flag:
+            regressions.append(key)
+        print(
+            f"{key:<36} {base['p50_ms']:>9.2f} {now['p50_ms']:>9.2f} {p50_ratio:>+8.1%} "
+            f"{base['peak_kb']:>10.0f} {now['peak_kb']:>9.0f}{flag}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the HTML extractors on the stored corpus")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="corpus directory containing manifest.json")
+    parser.add_argument(
+        "--only", action="append", default=[],
+        help="fixture name, category or case to run (repeatable)",
+    )
+    parser.add_argument("--iterations", type=int, help="fixed iteration count instead of the time budget")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="relative p50/peak increase counted as a regression (default 0.2 = 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    current = run(args.corpus, args.only, args.iterations)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"[Bench] Baseline written to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"[Bench] {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("[Bench] No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
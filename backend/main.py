@@ -4,10 +4,20 @@ import os
 from alembic import command as alembic_command
 from alembic.config import Config as AlembicConfig
 from app.api.router import api_router
-from app.core.config import REDIS_URL
+from app.core.config import REDIS_URL, JOB_QUEUE_BACKEND, JOB_WORKERS, JOB_LEASE_SECONDS, PLAYWRIGHT_ENABLED
 from app.core.rate_limit import init_rate_limiter, shutdown_rate_limiter
+from app.services.scraper.http_client import init_http_clients, shutdown_http_clients, http_pool_stats
+from app.services.scraper.browser import init_browser_pool, shutdown_browser_pool, browser_pool_stats
+from app.services.scraper.robots import robots_cache_stats
+from app.services.scraper.extraction import init_extraction_pool, shutdown_extraction_pool, extraction_pool_stats
+from app.services.ai.cache import init_llm_cache, shutdown_llm_cache, llm_cache_stats
+from app.services.ai.registry import init_ai_providers, shutdown_ai_providers, ai_provider_stats
+from app.services.jobs.queue import init_job_queue, shutdown_job_queue
+from app.services.jobs.worker import WorkerPool
+from app.features.analysis.jobs import process_job, mark_job_failed
 
 redis_client = None
+job_workers = None
 
 
 app = FastAPI()
@@ -28,12 +38,21 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "database": "connected"}
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "http_pool": http_pool_stats(),
+        "browser_pool": browser_pool_stats(),
+        "robots_cache": robots_cache_stats(),
+        "extraction_pool": extraction_pool_stats(),
+        "ai_providers": ai_provider_stats(),
+        "llm_cache": llm_cache_stats(),
+    }
 
 
 @app.on_event("startup")
 async def on_startup():
-    global redis_client
+    global redis_client, job_workers
     # 1) Run DB migrations automatically (helps on platforms without shell access)
     try:
         db_url = os.getenv("DATABASE_URL", "")
@@ -54,12 +73,63 @@ async def on_startup():
         redis_client = None
         print(f"[Startup] Rate limiter disabled: {e}")
 
+    # 3) Shared scraper HTTP client (keep-alive pool reused across analyses)
+    try:
+        await init_http_clients()
+        print("[Startup] HTTP client pool initialized")
+    except Exception as e:
+        print(f"[Startup] HTTP client pool init failed: {e}")
+
+    # 4) Warm headless browsers for the JS rendering fallback
+    if PLAYWRIGHT_ENABLED:
+        try:
+            await init_browser_pool()
+            print("[Startup] Browser pool started")
+        except Exception as e:
+            print(f"[Startup] Browser pool disabled, renders will launch Chromium per call: {e}")
+
+    # 5) Extraction workers (HTML parsing/extraction off the event loop), warmed up now
+    try:
+        await init_extraction_pool()
+        print("[Startup] Extraction pool started")
+    except Exception as e:
+        print(f"[Startup] Extraction pool disabled, extracting on the event loop: {e}")
+
+    # 6) AI providers: one client (and connection pool) per configured provider, reused by every request;
+    #    results cached in-process and in Redis (when the rate limiter's client is up)
+    init_llm_cache(redis_client)
+    try:
+        registry = await init_ai_providers()
+        print(f"[Startup] AI providers ready: {', '.join(registry.names()) or 'none'} (default: {registry.default})")
+    except Exception as e:
+        print(f"[Startup] AI provider registry init failed: {e}")
+
+    # 7) Background job queue + workers (falls back to in-process queue without Redis)
+    try:
+        queue = await init_job_queue(JOB_QUEUE_BACKEND, REDIS_URL)
+    except Exception as e:
+        print(f"[Startup] Job queue '{JOB_QUEUE_BACKEND}' unavailable, using in-process queue: {e}")
+        queue = await init_job_queue("memory", REDIS_URL)
+    if JOB_WORKERS > 0:
+        job_workers = WorkerPool(queue, process_job, JOB_WORKERS, JOB_LEASE_SECONDS, on_dead=mark_job_failed)
+        job_workers.start()
+        print(f"[Startup] {JOB_WORKERS} job workers started ({type(queue).__name__})")
+
 
 @app.on_event("shutdown")
 async def on_shutdown():
-    global redis_client
+    global redis_client, job_workers
+    if job_workers is not None:
+        await job_workers.stop()
+        job_workers = None
+    await shutdown_job_queue()
+    await shutdown_browser_pool()
+    await shutdown_extraction_pool()
+    await shutdown_ai_providers()
+    shutdown_llm_cache()
     await shutdown_rate_limiter(redis_client)
     redis_client = None
+    await shutdown_http_clients()
 
 
 app.include_router(api_router)
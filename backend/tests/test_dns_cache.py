@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.scraper import guard
+from app.services.scraper.guard import HostResolutionError, resolve_host
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Replace the system resolver; answers maps hostname -> IPs (None for NXDOMAIN)."""
+    calls = []
+    answers = {}
+
+    async def fake_lookup(hostname):
+        calls.append(hostname)
+        await asyncio.sleep(0.01)
+        return answers.get(hostname)
+
+    monkeypatch.setattr(guard, "_lookup", fake_lookup)
+    monkeypatch.setattr(guard, "_dns_cache", {})
+    monkeypatch.setattr(guard, "_dns_inflight", {})
+    return calls, answers
+
+
+def expire(hostname):
+    _, ips = guard._dns_cache[hostname]
+    guard._dns_cache[hostname] = (time.monotonic() - 1, ips)
+
+
+def test_answers_are_cached_for_the_positive_ttl(lookups):
+    calls, answers = lookups
+    answers["www.example.com"] = ["93.184.215.14"]
+
+    async def run():
+        first = await resolve_host("WWW.Example.com.")
+        second = await resolve_host("www.example.com")
+        return first, second
+
+    assert asyncio.run(run()) == (["93.184.215.14"], ["93.184.215.14"])
+    assert calls == ["www.example.com"]
+    expires_at, _ = guard._dns_cache["www.example.com"]
+    assert expires_at - time.monotonic() == pytest.approx(guard.DNS_CACHE_TTL_SECONDS, abs=5)
+
+
+def test_nxdomain_is_cached_for_the_negative_ttl(lookups):
+    calls, _ = lookups
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(HostResolutionError):
+                await resolve_host("missing.example")
+
+    asyncio.run(run())
+    assert calls == ["missing.example"]
+    expires_at, ips = guard._dns_cache["missing.example"]
+    assert ips is None
+    assert expires_at - time.monotonic() == pytest.approx(guard.DNS_NEGATIVE_TTL_SECONDS, abs=5)
+
+
+def test_expired_entries_are_looked_up_again(lookups):
+    calls, answers = lookups
+
+    async def run():
+        with pytest.raises(HostResolutionError):
+            await resolve_host("late.example")
+        expire("late.example")
+        answers["late.example"] = ["203.0.113.7"]
+        return await resolve_host("late.example")
+
+    assert asyncio.run(run()) == ["203.0.113.7"]
+    assert calls == ["late.example", "late.example"]
+
+
+def test_ip_literals_skip_the_resolver(lookups):
+    calls, _ = lookups
+    assert asyncio.run(resolve_host("203.0.113.7")) == ["203.0.113.7"]
+    assert calls == []
+
+
+def test_concurrent_lookups_share_one_call_and_survive_a_cancelled_caller(lookups):
+    calls, answers = lookups
+    answers["shared.example"] = ["203.0.113.8"]
+
+    async def run():
+        leader = asyncio.ensure_future(resolve_host("shared.example"))
+        follower = asyncio.ensure_future(resolve_host("shared.example"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == ["203.0.113.8"]
+    assert calls == ["shared.example"]
+    assert guard._dns_inflight == {}
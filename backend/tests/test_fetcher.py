@@ -0,0 +1,92 @@
+import asyncio
+import codecs
+from contextlib import asynccontextmanager
+
+from app.services.scraper.fetcher import CHARSET_SNIFF_BYTES, _stream_body, sniff_encoding
+
+
+class FakeResponse:
+    def __init__(self, chunks, content_type="text/html", status_code=200):
+        self.url = "https://www.example.com/"
+        self.status_code = status_code
+        self.headers = {"content-type": content_type} if content_type else {}
+        self.chunks = chunks
+        self.chunks_read = 0
+
+    async def aiter_bytes(self):
+        for chunk in self.chunks:
+            self.chunks_read += 1
+            yield chunk
+
+
+class FakeClient:
+    def __init__(self, response):
+        self.response = response
+
+    @asynccontextmanager
+    async def stream(self, method, url, headers=None):
+        yield self.response
+
+
+def fetch(chunks, max_bytes=1024 * 1024, **response_args):
+    response = FakeResponse(chunks, **response_args)
+    result = asyncio.run(_stream_body(FakeClient(response), response.url, {}, max_bytes))
+    return result, response
+
+
+def test_sniff_prefers_bom_then_header_then_meta():
+    meta = b'<meta charset="shift_jis">'
+    assert sniff_encoding(codecs.BOM_UTF8 + meta, "text/html; charset=windows-1252") == "utf-8-sig"
+    assert sniff_encoding(meta, "text/html; charset=windows-1252") == "cp1252"
+    assert sniff_encoding(meta, "text/html") == "shift_jis"
+
+
+def test_sniff_reads_http_equiv_and_ignores_unknown_charsets():
+    http_equiv = b'<meta http-equiv="Content-Type" content="text/html; charset=windows-1252" />'
+    assert sniff_encoding(http_equiv, None) == "cp1252"
+    assert sniff_encoding(b'<meta charset="no-such-codec">', "text/html; charset=bogus") == "utf-8"
+
+
+def test_sniff_only_looks_at_the_first_kilobyte():
+    late_meta = b" " * CHARSET_SNIFF_BYTES + b'<meta charset="shift_jis">'
+    assert sniff_encoding(late_meta, None) == "utf-8"
+
+
+def test_body_is_cut_at_max_bytes():
+    result, response = fetch([b"a" * 400] * 10, max_bytes=1000)
+    assert result.truncated
+    assert result.bytes_read == 1000
+    assert result.text == "a" * 1000
+    # Reading stops at the cap instead of draining the rest of the body
+    assert response.chunks_read == 3
+
+
+def test_body_under_the_cap_is_not_truncated():
+    result, _ = fetch([b"<p>hello</p>"], max_bytes=1000)
+    assert not result.truncated
+    assert result.text == "<p>hello</p>"
+    assert result.encoding == "utf-8"
+
+
+def test_multibyte_characters_split_across_chunks_decode_once():
+    body = ('<meta charset="shift_jis"><title>会社概要</title>' + "。" * 600).encode("shift_jis")
+    # Odd-sized chunks split the two-byte characters between chunks
+    chunks = [body[i:i + 333] for i in range(0, len(body), 333)]
+    result, _ = fetch(chunks)
+    assert result.encoding == "shift_jis"
+    assert "<title>会社概要</title>" in result.text
+    assert "�" not in result.text
+
+
+def test_non_html_body_is_not_read():
+    result, response = fetch([b"%PDF-1.7"], content_type="application/pdf")
+    assert result.skipped_reason == "content-type"
+    assert result.text is None
+    assert response.chunks_read == 0
+
+
+def test_not_modified_has_no_body():
+    result, response = fetch([b"ignored"], status_code=304)
+    assert result.not_modified
+    assert result.text is None
+    assert response.chunks_read == 0
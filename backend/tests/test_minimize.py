@@ -0,0 +1,44 @@
+from app.services.scraper.minimize import DATA_URI_MIN_CHARS, minimize_html
+
+
+def test_lowercase_regions_are_stubbed():
+    html = "<p>a</p><script>var x = 1;</script><style>p{}</style><!-- note --><p>b</p>"
+    result = minimize_html(html)
+    assert result.html == "<p>a</p><script></script><style></style><p>b</p>"
+    assert set(result.removed) == {"script", "style", "comment"}
+
+
+def test_mixed_case_tags_are_found():
+    html = "<p>a</p><SCRIPT src='/app.js'>init();</sCrIpT><Style>p{}</STYLE><p>b</p>"
+    assert minimize_html(html).html == "<p>a</p><SCRIPT src='/app.js'></sCrIpT><Style></STYLE><p>b</p>"
+
+
+def test_dotted_capital_i_keeps_offsets_aligned():
+    # "İ".lower() is two characters; unless swapped first, every offset after it would be shifted
+    text = "İstanbul İzmir " * 50
+    html = f"<p>{text}</p><SCRIPT>track();</SCRIPT><p>{text}</p><Script>more();</Script><p>end</p>"
+    result = minimize_html(html)
+    assert result.html == f"<p>{text}</p><SCRIPT></SCRIPT><p>{text}</p><Script></Script><p>end</p>"
+
+
+def test_json_ld_and_self_closing_tags_are_kept():
+    json_ld = '<script type="application/ld+json">{"@type": "Organization"}</script>'
+    html = f'<head>{json_ld}<script src="/a.js"/></head><body><p>x</p></body>'
+    result = minimize_html(html)
+    assert result.html == html
+    assert result.removed == {}
+
+
+def test_hydration_blobs_are_counted_separately():
+    html = '<div id="root"></div><script id="__NEXT_DATA__" type="application/json">{"props": {}}</script>'
+    result = minimize_html(html)
+    assert result.html == '<div id="root"></div><script id="__NEXT_DATA__" type="application/json"></script>'
+    assert set(result.removed) == {"hydration"}
+
+
+def test_long_data_uris_are_shortened_in_any_case():
+    payload = "A" * DATA_URI_MIN_CHARS
+    html = f'<img src="DATA:image/png;base64,{payload}"><img src="data:image/gif;base64,R0lGOD">'
+    result = minimize_html(html)
+    assert result.html == '<img src="data:,"><img src="data:image/gif;base64,R0lGOD">'
+    assert set(result.removed) == {"data_uri"}
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from app.core.config import STRUCTURED_DATA_MIN_CONFIDENCE, STRUCTURED_DATA_MIN_FIELDS
+from app.features.analysis.schemas import FieldSource
+from app.features.analysis.service import _confident_fields
+from app.services.scraper.structured_data import (
+    JSON_LD_CONFIDENCE,
+    MICRODATA_CONFIDENCE,
+    OPENGRAPH_CONFIDENCE,
+    extract_structured_data,
+)
+
+
+def test_structured_sources_clear_the_confidence_bar():
+    assert JSON_LD_CONFIDENCE >= STRUCTURED_DATA_MIN_CONFIDENCE
+    assert MICRODATA_CONFIDENCE >= STRUCTURED_DATA_MIN_CONFIDENCE
+
+
+def test_json_ld_and_microdata_fields_count():
+    provenance = {
+        "industry": FieldSource(source="json-ld", confidence=JSON_LD_CONFIDENCE),
+        "company_size": FieldSource(source="json-ld", confidence=JSON_LD_CONFIDENCE),
+        "location": FieldSource(source="microdata", confidence=MICRODATA_CONFIDENCE),
+    }
+    assert _confident_fields(provenance) == ["industry", "company_size", "location"]
+    assert len(_confident_fields(provenance)) >= STRUCTURED_DATA_MIN_FIELDS
+
+
+def test_heuristic_sources_never_count_however_confident():
+    provenance = {
+        "industry": FieldSource(source="opengraph", confidence=1.0),
+        "location": FieldSource(source="dom", confidence=1.0),
+        "target_audience": FieldSource(source="llm", confidence=1.0),
+        "company_size": FieldSource(source="json-ld", confidence=JSON_LD_CONFIDENCE),
+    }
+    assert _confident_fields(provenance) == ["company_size"]
+
+
+def test_low_confidence_and_non_inferred_fields_do_not_count():
+    provenance = {
+        "industry": FieldSource(source="json-ld", confidence=STRUCTURED_DATA_MIN_CONFIDENCE - 0.05),
+        "location": FieldSource(source="json-ld", confidence=None),
+        "contact_info.email": FieldSource(source="json-ld", confidence=JSON_LD_CONFIDENCE),
+    }
+    assert _confident_fields(provenance) == []
+
+
+def test_opengraph_location_stays_below_the_bar():
+    html = """<html><head>
+    <meta property="business:contact_data:locality" content="Leeds">
+    <meta property="business:contact_data:country_name" content="United Kingdom">
+    </head><body></body></html>"""
+    location = extract_structured_data(html).fields.get("location")
+    assert location is not None
+    assert location.source == "opengraph"
+    assert location.confidence == OPENGRAPH_CONFIDENCE